@@ -44,8 +44,22 @@ from PySide.QtCore import QProcess
 JOINT_TRANSLATION = {"Rotation": "rev",
                      "Linear Movement": "tran"}
 
+ANALYSIS_TYPE_TRANSLATION = {"Dynamic": "dynamic",
+                             "Kinematic": "kinematic"}
+
+LINEAR_SOLVER_TRANSLATION = {"Dense": "dense",
+                             "Sparse": "sparse",
+                             "Schur complement": "schur"}
+
+INTEGRATOR_TRANSLATION = {"DOP853": "dop853",
+                          "RK45": "RK45",
+                          "BDF": "BDF",
+                          "Radau": "Radau",
+                          "LSODA": "LSODA"}
+
 module_path = DapTools.get_module_path()
 sys.path.append(os.path.join(module_path, "dap_solver"))
+import bundle
 
 
 class DapSolverBuilder():
@@ -72,6 +86,12 @@ class DapSolverBuilder():
         self.t_initial = self.obj.StartTime
         self.t_final = self.obj.EndTime
         self.reporting_time = self.obj.ReportingTimeStep
+        self.analysis_type = ANALYSIS_TYPE_TRANSLATION[self.obj.AnalysisType]
+        self.linear_solver = LINEAR_SOLVER_TRANSLATION[self.obj.LinearSolver]
+        self.integrator = INTEGRATOR_TRANSLATION[self.obj.IntegrationMethod]
+        self.rtol = self.obj.RelativeTolerance
+        self.atol = self.obj.AbsoluteTolerance
+        self.text_outputs = self.obj.TextOutputs
         self.animate = False
         self.folder = self.obj.FileDirectory
         
@@ -140,12 +160,14 @@ class DapSolverBuilder():
 
     
     def writeInputFiles(self):
-        self.writeBodies()
-        self.writePoints()
-        self.writeJoints()
-        self.writeForces()
-        self.writeFunctions()
-        self.writeUVectors()
+        # the whole model is written to a single bundle of typed arrays (see dap_solver/bundle.py)
+        bundle.writeBundle(os.path.join(self.folder, bundle.BUNDLE_FILE),
+                           Bodies=self.dapBodies(),
+                           Points=self.dap_points,
+                           Joints=self.dap_joints,
+                           Forces=self.dap_forces,
+                           Functs=self.dap_funcs,
+                           Uvectors=self.dap_uvectors)
     
     def processForces(self):
         for force_obj in self.list_of_force_ojects:
@@ -173,9 +195,9 @@ class DapSolverBuilder():
                 gravity_norm_projected = self.projectPointOntoPlane(gravity_norm)
                 gravity_norm_rotated = self.global_rotation_matrix*gravity_norm_projected
                 
-                force['type'] = "'weight'"
+                force['type'] = 'weight'
                 force['gravity'] = gravity_mag
-                force['wgt'] = "np.array([[" + str(gravity_norm_rotated.x) + "," + str(gravity_norm_rotated.y)+"]]).T"
+                force['wgt'] = [gravity_norm_rotated.x, gravity_norm_rotated.y]
                 #gravity_mag
                 #force['x'] = gravity_norm_rotated.x
                 #force['y'] = gravity_norm_rotated.y
@@ -206,7 +228,7 @@ class DapSolverBuilder():
                     self.obj.object_to_point[str(force_obj.Label)+":"+str(Joint2)] = jIndex - 1
                 
                 #self.addJoint(joint_type, iIndex, jIndex)
-                force['type'] = "'ptp'"
+                force['type'] = 'ptp'
                 force['iPindex'] = iIndex
                 force['jPindex'] = jIndex
                 force['k'] = k
@@ -231,7 +253,7 @@ class DapSolverBuilder():
                     #self.obj.object_to_point[str(force_obj.Label)] = iIndex - 1
                 
                 #jIndex = self.addDapPointUsingJointCoordAndBodyLabel(body2_index, body2, force_coord_1)
-                force['type'] = "'rot_sda'"
+                force['type'] = 'rot_sda'
                 force['iBindex'] = body1_index
                 force['jBindex'] = body2_index
                 force['k'] = rot_stiffness
@@ -339,13 +361,13 @@ class DapSolverBuilder():
             
             uvector_out = {}
             uvector_out["Bindex"] = body_index_1
-            uvector_out["uLocal"] = "np.array([[" + str(uVector.x) +"," + str(uVector.y) +"]]).T"
+            uvector_out["ulocal"] = [uVector.x, uVector.y]
             self.dap_uvectors.append(uvector_out)
             iIndex = len(self.dap_uvectors)
             
             uvector_out = {}
             uvector_out["Bindex"] = body_index_2
-            uvector_out["uLocal"] = "np.array([[" + str(uVector.x) +"," + str(uVector.y) +"]]).T"
+            uvector_out["ulocal"] = [uVector.x, uVector.y]
             self.dap_uvectors.append(uvector_out)
             jIndex = len(self.dap_uvectors)
             
@@ -357,7 +379,7 @@ class DapSolverBuilder():
 
     def addJoint(self, joint_type, iIndex, jIndex, iUIndex=0, jUIndex=0, iBindex=0, jBindex=0, iFunc=0):
             joint = {}
-            joint["type"] = "'"+str(joint_type)+"'"
+            joint["type"] = str(joint_type)
             if joint_type == "tran" or joint_type == "rev":
                 #NOTE: DAP.py is currently not 0 indexing, hence these indices should be 1 indexing
                 joint["iPindex"] = iIndex 
@@ -383,13 +405,13 @@ class DapSolverBuilder():
         # if body index =0, then connecting body is ground, and coordinates should be 
         # defined in the global coordinates based on the current logic
         if body_index == 0:
-            point["sPlocal"] = "np.array([[" + str(rotated_coord.x) + "," + str(rotated_coord.y) + "]]).T"
+            point["sPlocal"] = [rotated_coord.x, rotated_coord.y]
         else:
             #FreeCAD.Console.PrintMessage("Body rotated CoG: " + str(self.cog_of_body_rotated[body_label]) + "\n")
             bodyCoG = self.cog_of_body_rotated[body_label]
             x = rotated_coord.x - bodyCoG.x
             y = rotated_coord.y - bodyCoG.y
-            point["sPlocal"] = "np.array([[" + str(x) + "," + str(y) + "]]).T"
+            point["sPlocal"] = [x, y]
             
         self.dap_points.append(point)
         
@@ -593,325 +615,157 @@ class DapSolverBuilder():
             self.total_mass_of_body[body_label] = total_mass
             self.cog_of_body_rotated[body_label] = self.global_rotation_matrix * self.cog_of_body_projected[body_label]
         #self.obj.BodiesCoG = self.centre_of_gravity_of_body
-    #TODO: find a more elegant way of writing the input files instead of line by line writing
-    def writeBodies(self):
+    def dapBodies(self):
         FreeCAD.Console.PrintMessage("Writing bodies \n")
         
-        bodies = [None]
-        file_path = os.path.join(self.folder,"inBodies.py")
-        fid = open(file_path, 'w')
-        fid.write("global Bodies \n")
-        
-        #for i in range(len(self.list_of_bodies)):
+        bodies = []
         for i in range(len(self.moving_bodies)):
             body_index = self.list_of_bodies.index(self.moving_bodies[i])
             body_label = self.list_of_bodies[body_index]
-            fid.write("B"+str(i+1)+" = Body_struct()\n")
-            fid.write("B"+str(i+1)+".m = " + str(self.total_mass_of_body[body_label]) + "\n")
-            fid.write("B"+str(i+1)+".J = " + str(self.J[body_label]) + "\n")
-            fid.write("B"+str(i+1)+".r = np.array([[" + str(self.cog_of_body_rotated[body_label].x) + ","
-                      + str(self.cog_of_body_rotated[body_label].y) + "]]).T\n")
-            fid.write("B"+str(i+1)+".p = " + str(0) + "\n")
-            
-            fid.write("B"+str(i+1)+".r_d = np.array([[" + 
-                      str(self.body_init[body_label]["init_x"]) +
-                      ", " +
-                      str(self.body_init[body_label]["init_y"]) + "]]).T\n")
-            fid.write("B"+str(i+1)+".p_d = " + str(self.body_init[body_label]["init_p"]) + "\n")
-            
-            fid.write("\n")
-            #bodies.append("B"+str(i))
-        fid.write('Bodies = np.array([[None')
-        for i in range(len(self.moving_bodies)):
-            fid.write(', B'+str(i+1))
-        fid.write("]]).T\n")
-        fid.close()
-        
-    def writePoints(self):
-        #FreeCAD.Console.PrintMessage(str(self.dap_points) + "\n")
-        file_path = os.path.join(self.folder,"inPoints.py")
-        fid = open(file_path, 'w')
-        fid.write('global Points\n')
-        for i in range(len(self.dap_points)):
-            fid.write("P"+str(i+1)+" = Point_struct()\n")
-            for key in self.dap_points[i].keys():
-                fid.write("P" + str(i+1) + "." + str(key) + " = " + str(self.dap_points[i][key])+"\n")
-
-            fid.write("\n")
-        
-        fid.write('Points = np.array([[None')
-        for i in range(len(self.dap_points)):
-            fid.write(', P'+str(i+1))
-        fid.write("]]).T\n")
-        fid.close()
-
-    def writeJoints(self):
-        #FreeCAD.Console.PrintMessage(str(self.dap_joints)+"\n")
-        file_path = os.path.join(self.folder,"inJoints.py")
-        fid = open(file_path, 'w')
-        fid.write('global Joints\n')
-        for i in range(len(self.dap_joints)):
-            fid.write("J"+str(i+1)+" = Joint_struct()\n")
-            for key in self.dap_joints[i].keys():
-                fid.write("J" + str(i+1) + "." + str(key) + " = " + str(self.dap_joints[i][key])+"\n")
-
-            fid.write("\n")
-            
-        fid.write('Joints = np.array([[None')
-        for i in range(len(self.dap_joints)):
-            fid.write(', J'+str(i+1))
-        fid.write("]]).T\n")
-        fid.close()
-        
-        
-    def writeForces(self):
-        file_path = os.path.join(self.folder,"inForces.py")
-        fid = open(file_path, 'w')
-        fid.write('global Forces\n')
-        for i in range(len(self.dap_forces)):
-            fid.write("F"+str(i+1)+" = Force_struct()\n")
-            for key in self.dap_forces[i].keys():
-                fid.write("F" + str(i+1) + "." + str(key) + " = " + str(self.dap_forces[i][key])+"\n")
-
-            fid.write("\n")
-            
-        fid.write('Forces = np.array([[None')
-        for i in range(len(self.dap_forces)):
-            fid.write(', F'+str(i+1))
-        fid.write("]]).T\n")
-        fid.close()
-        
-    def writeFunctions(self):
-        file_path = os.path.join(self.folder,"inFuncts.py")
-        fid = open(file_path, 'w')
-        fid.write('global Functs\n')
-        for i in range(len(self.dap_funcs)):
-            fid.write("F"+str(i+1)+" = Funct_struct()\n")
-            for key in self.dap_funcs[i].keys():
-                fid.write("F" + str(i+1) + "." + str(key) + " = " + str(self.dap_funcs[i][key])+"\n")
-
-            fid.write("\n")
-        
-        
-        #TODO include writer for functions
-        fid.write("\n")
-        fid.write('Functs = np.array([[None')
-        for i in range(len(self.dap_funcs)):
-            fid.write(', F'+str(i+1))
-        fid.write("]]).T\n")
-    
-    def writeUVectors(self):
-        file_path = os.path.join(self.folder,"inUvectors.py")
-        fid = open(file_path, 'w')
-        fid.write('global Uvectors\n')
-        for i in range(len(self.dap_uvectors)):
-            fid.write("U"+str(i+1)+" = Unit_struct()\n")
-            for key in self.dap_uvectors[i].keys():
-                fid.write("U" + str(i+1) + "." + str(key) + " = " + str(self.dap_uvectors[i][key])+"\n")
-
-        #TODO include writer for UVectors, needed for translational joints
-        fid.write("\n")
-        fid.write('Uvectors = np.array([[None')
-        for i in range(len(self.dap_uvectors)):
-            fid.write(', U'+str(i+1))
-        fid.write("]]).T\n")
-        
-
-    def solve(self):
+            body = {}
+            body['m'] = self.total_mass_of_body[body_label]
+            body['J'] = self.J[body_label]
+            body['r'] = [self.cog_of_body_rotated[body_label].x, self.cog_of_body_rotated[body_label].y]
+            body['p'] = 0
+            body['r_d'] = [self.body_init[body_label]["init_x"], self.body_init[body_label]["init_y"]]
+            body['p_d'] = self.body_init[body_label]["init_p"]
+            bodies.append(body)
+        return bodies
+        
+
+    def writeSolverSettings(self):
         #NOTE: Temporary for temp dap python solver, create input settings file that can be read by main solver
+        point_labels = ["Point" + str(Pi) for Pi in range(1, len(self.dap_points) + 1)]
+        for label, Pi in self.obj.object_to_point.items():
+            if Pi < len(point_labels):
+                point_labels[Pi] = label
+
         inputFile = os.path.join(self.folder,"dapInputSettings.py")
         fid = open(inputFile,'w')
         fid.write("animate = " + str(self.animate) + "\n")
         fid.write("t_initial = " + str(self.t_initial) + "\n")
         fid.write("dt = " + str(self.reporting_time) + "\n")
         fid.write("t_final = " + str(self.t_final) + "\n")
+        fid.write("analysis_type = '" + str(self.analysis_type) + "'\n")
+        fid.write("linear_solver = '" + str(self.linear_solver) + "'\n")
+        fid.write("integrator = '" + str(self.integrator) + "'\n")
+        fid.write("rtol = " + str(self.rtol) + "\n")
+        fid.write("atol = " + str(self.atol) + "\n")
         fid.write("folder = '" + str(self.folder) + "'\n")
+        fid.write("text_outputs = " + str(self.text_outputs) + "\n")
+        fid.write("restart = " + str(self.obj.RestartFromCheckpoint) + "\n")
+        fid.write("timing = " + str(self.obj.PhaseTimers) + "\n")
+        fid.write("profile = " + str(self.obj.ProfileSolver) + "\n")
+        fid.write("body_labels = " + repr(list(self.moving_bodies)) + "\n")
+        fid.write("point_labels = " + repr(point_labels) + "\n")
         fid.close()
+        # a restart only applies to the next run
+        self.obj.RestartFromCheckpoint = False
 
-        
-        cwd = DapTools.get_module_path()
-        #dap_solver = os.path.join(cwd,"dap_solver","dap_temp.py")
-        #exec(open(dap_solver).read())
-        
         self.dapResults = None
         self.resultsAvailable = False
         self.obj.DapResults = None
-        
 
-        #pythonCommand = "python3 " + str(dap_solver) + " " + str(self.folder)
+    def solve(self):
+        """ Solves in FreeCAD's process, see startSolve() for a solve that does not block FreeCAD """
+        self.writeSolverSettings()
 
-        
-        #from PySide.QtCore import QProcess
-        #process = QProcess()
-        #self.process = QtCore.QProcess()
-        #self.process.finished.connect(self.onFinished)
-        
-        
-        
-        #self.process.start("python3",[str(dap_solver), str(self.folder)])
-        #self.process.start(pythonCommand)
-        ##proc.waitForStarted()
-        #TODO need to overwrite waitForFinished to latch on to the output
-        #self.process.waitForFinished()
-        #output = self.process.readAllStandardOutput()
-        #FreeCAD.Console.PrintMessage(output)
-        #import subprocess
-        #import sys
-        #import os
-        #result = subprocess.run(["python", dap_solver, self.folder])
-        #os.system(dap_solver + " " + str(self.folder))
-        import dap_temp
-        dap_temp.folder = self.folder
-        dap_temp.readInputFiles()
-        dap_temp.initialize()
-        dap_temp.t_initial = self.t_initial
-        dap_temp.dt = self.reporting_time
-        dap_temp.t_final = self.t_final
+        import worker
         FreeCAD.Console.PrintMessage("DAP solver started.\n")
-        solution_success = dap_temp.solve()
-        if solution_success:
+        try:
+            self.dapSolver = worker.runSolver(self.folder)
+        except Exception as e:
+            FreeCAD.Console.PrintError("There was an error solving the system: " + str(e) + "\n")
+            return
+        FreeCAD.Console.PrintMessage("Solver solved Succesfully \n")
+        if self.dapSolver.write_success:
+            FreeCAD.Console.PrintMessage("Results successfully loaded. Should now be able to animate and \
+plot the generated results \n")
+            self.loadResults()
+
+    def startSolve(self, progress=None, finished=None):
+        """ Solves in a worker process (dap_solver/worker.py) and returns immediately. progress(t, t_final,
+        wall_time, steps, evaluations) is called as the worker reports it, and finished(success) when it has stopped,
+        after the results are loaded """
+        self.writeSolverSettings()
+        self.progress = progress
+        self.finished = finished
+        self.cancelled = False
+
+        try:
+            python = DapTools.getPythonExecutable()
+        except RuntimeError as e:
+            FreeCAD.Console.PrintError(str(e) + "\n")
+            if finished is not None:
+                finished(False)
+            return
+
+        worker = os.path.join(DapTools.get_module_path(), "dap_solver", "worker.py")
+        self.process = QProcess()
+        self.process.readyReadStandardOutput.connect(self.onReadyRead)
+        self.process.finished.connect(self.onFinished)
+        FreeCAD.Console.PrintMessage("DAP solver started.\n")
+        self.process.start(python, [worker, self.folder])
+
+    def isRunning(self):
+        return hasattr(self, "process") and self.process.state() != QProcess.NotRunning
+
+    def cancelSolve(self):
+        """ Asks the worker to stop (keeping the results and a checkpoint up to the current time),
+        and kills it if it has not stopped after 10 s """
+        if self.isRunning():
+            self.cancelled = True
+            self.process.write(b"cancel\n")
+            QtCore.QTimer.singleShot(10000, self.killSolve)
+
+    def killSolve(self):
+        if self.isRunning():
+            self.process.kill()
+
+    def onReadyRead(self):
+        while self.process.canReadLine():
+            line = bytes(self.process.readLine()).decode(errors='replace').rstrip()
+            items = line.split()
+            if len(items) == 6 and items[0] == "progress":
+                if self.progress is not None:
+                    self.progress(float(items[1]), float(items[2]), float(items[3]), int(items[4]), int(items[5]))
+            else:
+                FreeCAD.Console.PrintLog(line + "\n")
+
+    def onFinished(self, exitCode, exitStatus):
+        self.onReadyRead()
+        success = exitStatus == QProcess.NormalExit and exitCode == 0
+        if success:
             FreeCAD.Console.PrintMessage("Solver solved Succesfully \n")
-            dap_temp.writeOutputs()
-            if dap_temp.write_success:
-                FreeCAD.Console.PrintMessage("Results successfully loaded. Should now be able to animate and \
+            self.loadResults()
+            FreeCAD.Console.PrintMessage("Results successfully loaded. Should now be able to animate and \
 plot the generated results \n")
-                self.loadResults()
+        elif self.cancelled:
+            FreeCAD.Console.PrintWarning("Solver cancelled, set RestartFromCheckpoint to continue the run\n")
         else:
-            FreeCAD.Console.PrintError("There was an error solving the system. Proper error checking has not yet been\
-included. \n")
-        #FreeCAD.Console.PrintMessage("Python runnable" + sys.executable + "\n")
-        #result = subprocess.run([sys.executable, dap_solver, self.folder])
-        #FreeCAD.Console.PrintMessage(result)
-        
-        
-    #def onFinished(self,  exitCode,  exitStatus):
-        #if exitCode == 0:
-            #FreeCAD.Console.PrintMessage("Solver completed Succesfully \n")
-            #self.loadResults()
-            #self.resultsAvailable = True
-        #else:
-            #FreeCAD.Console.PrintError("Solver Failed: error codes not yet included (in the TODO list)\n")
-        
+            error = bytes(self.process.readAllStandardError()).decode(errors='replace')
+            FreeCAD.Console.PrintError("There was an error solving the system:\n" + error + "\n")
+        if self.finished is not None:
+            self.finished(success)
+
     def loadResults(self):
-        #results = os.path.join(self.folder, "dapResults.npy")
         self.dapResults = True
-        
-        #read body CoG positions
-        fid_DapBodyPositions = open(os.path.join(self.folder,"DapBodyPositions"))
-        Bodies_r = []
-        Bodies_p = []
-        reported_times = []
-        DapBodyPositions_lines = fid_DapBodyPositions.readlines()
-        for line in DapBodyPositions_lines[1::]:
-            items = line.split()
-            r = []
-            p = []
-            reported_times.append(float(items[0]))
-            for i in range(len(self.moving_bodies)):
-                x = float(items[i*3+1])
-                y = float(items[i*3+2])
-                phi = float(items[i*3+3])
-                r.append([x,y])
-                p.append(phi)
-            Bodies_r.append(r)
-            Bodies_p.append(p)
-        fid_DapBodyPositions.close()
-
-        #read body CoG velocities
-        fid = open(os.path.join(self.folder,"DapBodyVelocities"))
-        Bodies_r_d = []
-        Bodies_p_d = []
-        lines = fid.readlines()
-        for line in lines[1::]:
-            items = line.split()
-            r = []
-            p = []
-            for i in range(len(self.moving_bodies)):
-                x = float(items[i*3+1])
-                y = float(items[i*3+2])
-                phi = float(items[i*3+3])
-                r.append([x,y])
-                p.append(phi)
-            Bodies_r_d.append(r)
-            Bodies_p_d.append(p)
-        fid.close()
-        
-        #read body CoG accelerations
-        fid = open(os.path.join(self.folder,"DapBodyAccelerations"))
-        Bodies_r_d_d = []
-        Bodies_p_d_d = []
-        lines = fid.readlines()
-        for line in lines[1::]:
-            items = line.split()
-            r = []
-            p = []
-            for i in range(len(self.moving_bodies)):
-                x = float(items[i*3+1])
-                y = float(items[i*3+2])
-                phi = float(items[i*3+3])
-                r.append([x,y])
-                p.append(phi)
-            Bodies_r_d_d.append(r)
-            Bodies_p_d_d.append(p)
-        fid.close()
-        
-        #read point co-ordinate
-        fid = open(os.path.join(self.folder,"DapPointsPositions"))
-        Points_r = []
-        lines = fid.readlines()
-        for line in lines[1::]:
-            items = line.split()
-            r = []
-            for i in range(len(self.dap_points)):
-                x = float(items[i*2+1])
-                y = float(items[i*2+2])
-                r.append([x,y])
-            Points_r.append(r)
-        fid.close()
-        
-        #read point co-ordinate velocities
-        fid = open(os.path.join(self.folder,"DapPointsVelocities"))
-        Points_r_d = []
-        lines = fid.readlines()
-        for line in lines[1::]:
-            items = line.split()
-            r = []
-            for i in range(len(self.dap_points)):
-                x = float(items[i*2+1])
-                y = float(items[i*2+2])
-                r.append([x,y])
-            Points_r_d.append(r)
-        fid.close()
-        
-        #read body energies
-        fid = open(os.path.join(self.folder,"DapSystemEnergy"))
-        #Points_r_d = []
-        kinetic = []
-        potential = []
-        total = []
-        lines = fid.readlines()
-        for line in lines[1::]:
-            items = line.split()
 
-            kinetic.append(float(items[1]))
-            potential.append(float(items[2]))
-            total.append(float(items[3]))
-        fid.close()
-
-        
+        # the solver object only references the channels of the results store, they
+        # are read the first time the animation or a plot uses them
         self.obj.DapResults = self.dapResults
-        self.obj.Bodies_r = Bodies_r
-        self.obj.Bodies_p = Bodies_p
-        self.obj.Bodies_r_d = Bodies_r_d
-        self.obj.Bodies_p_d = Bodies_p_d
-        self.obj.Bodies_r_d_d = Bodies_r_d_d
-        self.obj.Bodies_p_d_d = Bodies_p_d_d
-        self.obj.Points_r = Points_r
-        self.obj.Points_r_d = Points_r_d
-        self.obj.kinetic_energy = kinetic
-        self.obj.potential_energy = potential
-        self.obj.total_energy = total
-        self.obj.ReportedTimes = reported_times
+        self.obj.Bodies_r = DapTools.ResultsList(self.folder, 'Bodies_r')
+        self.obj.Bodies_p = DapTools.ResultsList(self.folder, 'Bodies_p')
+        self.obj.Bodies_r_d = DapTools.ResultsList(self.folder, 'Bodies_r_d')
+        self.obj.Bodies_p_d = DapTools.ResultsList(self.folder, 'Bodies_p_d')
+        self.obj.Bodies_r_d_d = DapTools.ResultsList(self.folder, 'Bodies_r_d_d')
+        self.obj.Bodies_p_d_d = DapTools.ResultsList(self.folder, 'Bodies_p_d_d')
+        self.obj.Points_r = DapTools.ResultsList(self.folder, 'Points_r')
+        self.obj.Points_r_d = DapTools.ResultsList(self.folder, 'Points_r_d')
+        self.obj.kinetic_energy = DapTools.ResultsList(self.folder, 'energy', 0)
+        self.obj.potential_energy = DapTools.ResultsList(self.folder, 'energy', 1)
+        self.obj.total_energy = DapTools.ResultsList(self.folder, 'energy', 2)
+        self.obj.ReportedTimes = DapTools.ResultsList(self.folder, 'time')
         
         
         #DapBodyAccelerations
@@ -61,6 +61,19 @@ SELECTION_TYPE_HELPER_TEXT = ["Define the normal vector of the plane of motion",
 Valid selections include a plane, a face or a sketch."
                               ]
 
+ANALYSIS_TYPES = ["Dynamic",
+                  "Kinematic"]
+
+LINEAR_SOLVERS = ["Dense",
+                  "Sparse",
+                  "Schur complement"]
+
+INTEGRATION_METHODS = ["DOP853",
+                       "RK45",
+                       "BDF",
+                       "Radau",
+                       "LSODA"]
+
 def makeDapSolver(name="DapSolver"):
     obj = FreeCAD.ActiveDocument.addObject("Part::FeaturePython", name)
     _DapSolver(obj)
@@ -121,6 +134,22 @@ class _DapSolver:
         addObjectProperty(obj, 'EndTime', 0.5, "App::PropertyFloat","","Start Time")
         addObjectProperty(obj, 'ReportingTimeStep', 0.01, "App::PropertyFloat","","Time intervals for the solution")
         addObjectProperty(obj, "UnitVector", FreeCAD.Vector(0, 0, 0), "App::PropertyVector", "", "Vector Normal to Planar Motion")
+        addObjectProperty(obj, 'AnalysisType', ANALYSIS_TYPES, "App::PropertyEnumeration", "", 
+                          "Dynamic: integrate the equations of motion, Kinematic: solve the joints of a fully driven mechanism")
+        addObjectProperty(obj, 'LinearSolver', LINEAR_SOLVERS, "App::PropertyEnumeration", "", 
+                          "Linear solver for the equations of motion (Sparse scales better for large mechanisms)")
+        addObjectProperty(obj, 'IntegrationMethod', INTEGRATION_METHODS, "App::PropertyEnumeration", "", 
+                          "Time integration method (BDF, Radau or LSODA for stiff contacts and springs)")
+        addObjectProperty(obj, 'RelativeTolerance', 1e-6, "App::PropertyFloat", "", "Relative tolerance of the time integration")
+        addObjectProperty(obj, 'AbsoluteTolerance', 1e-12, "App::PropertyFloat", "", "Absolute tolerance of the time integration")
+        addObjectProperty(obj, 'RestartFromCheckpoint', False, "App::PropertyBool", "", 
+                          "Resume the last run from its checkpoint, or extend it to a later EndTime (once)")
+        addObjectProperty(obj, 'TextOutputs', False, "App::PropertyBool", "", 
+                          "Also write the results as Dap* text files (the results are always stored in DapResults)")
+        addObjectProperty(obj, 'PhaseTimers', False, "App::PropertyBool", "", 
+                          "Time the phases of the solver, written to DapResults/timings.json")
+        addObjectProperty(obj, 'ProfileSolver', False, "App::PropertyBool", "", 
+                          "Profile the solver, written to DapResults/dapSolve.prof and dapSolve.collapsed (flame graphs)")
         addObjectProperty(obj, 'DapResults', None, "App::PropertyPythonObject", "", "")
         addObjectProperty(obj, 'ReportedTimes', None, "App::PropertyPythonObject", "", "")
         #addObjectProperty(obj, 'BodiesCoG', None, "App::PropertyPythonObject", "", "")
@@ -39,6 +39,10 @@
 
 import FreeCAD
 import os
+import sys
+import shutil
+import subprocess
+import numpy as np
 from FreeCAD import Units
 
 def setActiveAnalysis(analysis):
@@ -217,6 +221,43 @@ def get_module_path():
     """
     return os.path.dirname(__file__)
 
+PYTHON_CHECK = "import numpy, scipy"
+python_executable = None
+
+def getPythonExecutable():
+    """ Returns the Python interpreter for the solver worker: preferably the one that comes with
+    FreeCAD, otherwise python3 on the path. Each candidate must be able to import numpy and scipy,
+    a RuntimeError is raised if none can """
+    global python_executable
+    if python_executable is not None:
+        return python_executable
+
+    candidates = []
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        candidates.append(sys.executable)
+    for folder in [os.path.dirname(sys.executable), os.path.join(FreeCAD.getHomePath(), "bin")]:
+        for name in ["python.exe", "python3", "python"]:
+            if os.path.isfile(os.path.join(folder, name)):
+                candidates.append(os.path.join(folder, name))
+    candidates += [shutil.which(name) for name in ["python3", "python"] if shutil.which(name)]
+
+    tried = []
+    for candidate in candidates:
+        if candidate in tried:
+            continue
+        tried.append(candidate)
+        try:
+            check = subprocess.run([candidate, "-c", PYTHON_CHECK], stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL, timeout=60)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if check.returncode == 0:
+            python_executable = candidate
+            return python_executable
+    raise RuntimeError("No Python interpreter with numpy and scipy was found for the solver (tried: " +
+                       (", ".join(tried) or "none") + "). Install numpy and scipy for the Python "
+                       "interpreter of FreeCAD or for python3 on the path")
+
 def gravityChecker():
     counter=0
     active_analysis=getActiveAnalysis()
@@ -271,3 +312,67 @@ def projectPointOntoPlane(plane_norm, point, plane_origin = FreeCAD.Vector(0,0,0
     
     #FreeCAD.Console.PrintMessage("Projected point " + str(point) + ": " + str(projected_point) + "\n")
     return projected_point
+
+
+class ResultsList:
+    """ Read-only list view of a channel of the results store (dap_solver/results.py) in folder:
+    results[timeIndex][body_index][0] indexes the array. The channel is read the first time
+    it is used, and only the reference to it is saved with the document """
+    def __init__(self, folder, channel, column=None):
+        self.folder = folder
+        self.channel = channel
+        self.column = column
+        self.values = None
+
+    @property
+    def array(self):
+        if self.values is None:
+            self.values = readResultsChannel(self.folder, self.channel, self.column)
+        return self.values
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        return self.array[index]
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.array, dtype=dtype)
+
+    def tolist(self):
+        return self.array.tolist()
+
+    def __getstate__(self):
+        return {'folder': self.folder, 'channel': self.channel, 'column': self.column}
+
+    def __setstate__(self, state):
+        self.values = None
+        if isinstance(state, dict):
+            self.folder = state['folder']
+            self.channel = state['channel']
+            self.column = state['column']
+        else:
+            # saved before the results were kept in the results store
+            self.folder = self.channel = self.column = None
+            self.values = np.array(state, dtype=float)
+
+
+def readResultsChannel(folder, channel, column=None):
+    """ Reads a channel of the results store, or an empty array (with an error message)
+    if the results are no longer available """
+    dap_solver_path = os.path.join(get_module_path(), "dap_solver")
+    if dap_solver_path not in sys.path:
+        sys.path.append(dap_solver_path)
+    import results
+    try:
+        # Not memory mapped, so that the files can be overwritten by the next run
+        values = results.readChannel(folder, channel, mmap_mode=None)
+    except (OSError, ValueError):
+        FreeCAD.Console.PrintError("Results " + str(channel) + " not found in " + str(folder) + ", please rerun the solver\n")
+        return np.zeros((0,))
+    if column is not None:
+        values = values[:,column]
+    return values
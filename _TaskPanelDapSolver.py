@@ -88,6 +88,9 @@ class TaskPanelDapSolver:
 
         self.form.solveButton.clicked.connect(self.solveButtonClicked)
 
+        self.form.cancelButton.clicked.connect(self.cancelButtonClicked)
+        self.builder = None
+
         self.form.pbBrowseFileDirectory.clicked.connect(self.getFolderDirectory)
 
         #self.form.pbAddRef.clicked.connect(self.addButtonClicked)
@@ -139,6 +142,8 @@ class TaskPanelDapSolver:
         return
 
     def reject(self):
+        if self.builder is not None and self.builder.isRunning():
+            self.builder.cancelSolve()
         FreeCADGui.Selection.removeObserver(self)
         doc = FreeCADGui.getDocument(self.obj.Document)
         doc_name = str(self.obj.Document.Name)
@@ -188,16 +193,47 @@ class TaskPanelDapSolver:
         self.checkValidityOfTime()
         
         
+        if self.builder is not None and self.builder.isRunning():
+            FreeCAD.Console.PrintError("The solver is already running\n")
+            return
+
         self.builder = DapSolverBuilder.DapSolverBuilder(self.obj)
 
         
         FreeCAD.Console.PrintMessage("DAP SOLVER STARTED \n")
 
         self.builder.writeInputFiles()
-        self.builder.solve()
+        # the solver runs in a worker process, see onSolverProgress and onSolverFinished
+        self.form.solveButton.setEnabled(False)
+        self.form.cancelButton.setEnabled(True)
+        self.form.progressBar.setValue(0)
+        self.form.lblProgress.setText("Starting solver")
+        self.builder.startSolve(self.onSolverProgress, self.onSolverFinished)
         
         #builder.computeCentreOfGravity()
 
+    def cancelButtonClicked(self):
+        if self.builder is not None and self.builder.isRunning():
+            self.form.lblProgress.setText("Cancelling")
+            self.builder.cancelSolve()
+
+    def onSolverProgress(self, t, t_final, wall_time, steps, evaluations):
+        if t_final > self.obj.StartTime:
+            self.form.progressBar.setValue(int(1000*(t - self.obj.StartTime)/(t_final - self.obj.StartTime)))
+        self.form.lblProgress.setText("t = {0:.4f}s / {1:.4f}s after {2:.1f}s, {3} steps, {4} evaluations".format(
+            t, t_final, wall_time, steps, evaluations))
+
+    def onSolverFinished(self, success):
+        self.form.solveButton.setEnabled(True)
+        self.form.cancelButton.setEnabled(False)
+        if success:
+            self.form.progressBar.setValue(self.form.progressBar.maximum())
+            self.form.lblProgress.setText("Solved")
+        elif self.builder.cancelled:
+            self.form.lblProgress.setText("Cancelled")
+        else:
+            self.form.lblProgress.setText("Failed, see the report view")
+
     def cmbPlaneChanged(self): #Mod
         type_index = self.form.cmbPlaneofMotion.currentIndex()
         self.form.lblPlaneDescr.setText(DapSolverRunner.MOTION_PLANES_HELPER_TEXT[type_index])
@@ -165,26 +165,24 @@ class TaskPanelPlot:
             y = []
             if part in list(self.solver_object.object_to_moving_body.keys()):
                 body_index = self.solver_object.object_to_moving_body[part]
-                for timeIndex in range(len(times)):
-                    if type == "Position" or type == "Path Trace":
-                        x.append(self.solver_object.Bodies_r[timeIndex][body_index][0])
-                        y.append(self.solver_object.Bodies_r[timeIndex][body_index][1])
-                    if type == "Velocity":
-                        x.append(self.solver_object.Bodies_r_d[timeIndex][body_index][0])
-                        y.append(self.solver_object.Bodies_r_d[timeIndex][body_index][1])
+                if type == "Position" or type == "Path Trace":
+                    values = np.asarray(self.solver_object.Bodies_r)[0:len(times), body_index]
+                if type == "Velocity":
+                    values = np.asarray(self.solver_object.Bodies_r_d)[0:len(times), body_index]
+                x = values[:,0].tolist()
+                y = values[:,1].tolist()
             if part in list(self.solver_object.object_to_point.keys()):
                 point_index = self.solver_object.object_to_point[part]
                 #FreeCAD.Console.PrintMessage("In extract plot disp vel, part: " + str(part) + "\n")
                 #FreeCAD.Console.PrintMessage("In extract plot disp vel, point_index: " + str(point_index) + "\n")
                 #FreeCAD.Console.PrintMessage("In extract plot disp vel, self.solver_object.object_to_point.keys(): " + str(self.solver_object.object_to_point.keys()) + "\n")
                 
-                for timeIndex in range(len(times)):
-                    if type == "Position" or type == "Path Trace":
-                        x.append(self.solver_object.Points_r[timeIndex][point_index][0])
-                        y.append(self.solver_object.Points_r[timeIndex][point_index][1])
-                    if type == "Velocity":
-                        x.append(self.solver_object.Points_r_d[timeIndex][point_index][0])
-                        y.append(self.solver_object.Points_r_d[timeIndex][point_index][1])
+                if type == "Position" or type == "Path Trace":
+                    values = np.asarray(self.solver_object.Points_r)[0:len(times), point_index]
+                if type == "Velocity":
+                    values = np.asarray(self.solver_object.Points_r_d)[0:len(times), point_index]
+                x = values[:,0].tolist()
+                y = values[:,1].tolist()
             x_list.append(x)
             y_list.append(y)
             
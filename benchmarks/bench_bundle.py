@@ -0,0 +1,38 @@
+# Load time of spring chain models from the model bundle (one np.load) and from
+# the in*.py input files executed by the legacy reader.
+#
+#   python benchmarks/bench_bundle.py [n_bodies ...]
+
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dap_solver'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bundle
+import models
+
+
+def timePerCall(fun, repeat=5):
+    number = 1
+    while timeit.timeit(fun, number=number) < 0.2:
+        number = number*2
+    return min(timeit.repeat(fun, number=number, repeat=repeat))/number
+
+
+def main(body_counts):
+    print("%10s %14s %14s %8s" % ("bodies", "exec [ms]", "bundle [ms]", "speedup"))
+    for n in body_counts:
+        with tempfile.TemporaryDirectory() as folder:
+            models.springChain(folder, n)
+            models.springChain(folder, n, writer=models.writeLegacyModel)
+            t_exec   = timePerCall(lambda: bundle.readInputFiles(folder))
+            t_bundle = timePerCall(lambda: bundle.readBundle(os.path.join(folder, bundle.BUNDLE_FILE)))
+        print("%10d %14.2f %14.2f %8.1f" % (n, 1e3*t_exec, 1e3*t_bundle, t_exec/t_bundle))
+
+
+if __name__ == '__main__':
+    body_counts = [int(a) for a in sys.argv[1:]] or [10, 100, 1000]
+    main(body_counts)
@@ -0,0 +1,67 @@
+# Wall time of a stiffness sweep on the sliding pendulum with a ptp spring, solved
+# serially with DapSolver and as one ensemble.
+#
+#   python benchmarks/bench_ensemble.py [n_variants ...]
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dap_solver'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from dapSolver import DapSolver
+import bundle
+import ensemble
+import models
+
+T_FINAL = 2.0
+DT      = 0.01
+
+
+def writeModel(folder):
+    models.slidingPendulum(folder, [{'type': 'ptp', 'iPindex': 2, 'jPindex': 4, 'k': 50.0, 'L0': 1.0, 'dc': 0.5}])
+
+
+def serial(folder, stiffness):
+    bundle_file = os.path.join(folder, bundle.BUNDLE_FILE)
+    with np.load(bundle_file) as model:
+        arrays = {key: model[key] for key in model.files}
+    k0 = arrays['Forces.k'][1]
+    for k in stiffness:
+        arrays['Forces.k'][1] = k
+        np.savez(bundle_file, **arrays)
+        solver = DapSolver(folder)
+        solver.t_initial, solver.dt, solver.t_final = 0.0, DT, T_FINAL
+        solver.solve()
+    arrays['Forces.k'][1] = k0
+    np.savez(bundle_file, **arrays)
+
+
+def main(counts):
+    print("%10s %12s %12s" % ("variants", "serial [s]", "ensemble [s]"))
+    with tempfile.TemporaryDirectory() as folder:
+        writeModel(folder)
+        with open(os.path.join(folder, 'dapInputSettings.py'), 'w') as fid:
+            fid.write("")
+        for n in counts:
+            stiffness = np.linspace(10.0, 100.0, n)
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                serial(folder, stiffness)
+                t_serial = time.perf_counter() - t0
+
+                t0 = time.perf_counter()
+                sweep = ensemble.DapEnsemble(folder, [{'Forces[2].k': k} for k in stiffness])
+                sweep.solve(0.0, T_FINAL, DT)
+                t_ensemble = time.perf_counter() - t0
+            print("%10d %12.2f %12.2f" % (n, t_serial, t_ensemble))
+
+
+if __name__ == '__main__':
+    counts = [int(a) for a in sys.argv[1:]] or [10, 100]
+    main(counts)
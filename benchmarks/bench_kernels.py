@@ -0,0 +1,57 @@
+# RHS evaluations (analysis() calls) per second with the NumPy and the Numba
+# kernels, on the tutorial pendulum models and a 100-link chain.
+#
+#   python benchmarks/bench_kernels.py
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dap_solver'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from dapSolver import DapSolver
+import kernels
+import models
+
+MODELS = [("simple pendulum",  lambda folder: models.pendulumChain(folder, 1)),
+          ("double pendulum",  lambda folder: models.pendulumChain(folder, 2)),
+          ("sliding pendulum", models.slidingPendulum),
+          ("100-link chain",   lambda folder: models.pendulumChain(folder, 100, L=0.1))]
+
+
+def evaluationsPerSecond(solver, u, repeat=5):
+    fun = lambda: solver.analysis(0.0, u)
+    number = 10
+    while timeit.timeit(fun, number=number) < 0.2:
+        number = number*2
+    return number/min(timeit.repeat(fun, number=number, repeat=repeat))
+
+
+def main():
+    backends = ['numpy'] + (['numba'] if kernels.HAVE_NUMBA else [])
+    if not kernels.HAVE_NUMBA:
+        print("Numba is not installed, only the NumPy kernels are timed")
+    print("%-18s" % "model" + "".join("%16s" % (b + " [1/s]") for b in backends))
+    for name, model in MODELS:
+        with tempfile.TemporaryDirectory() as folder:
+            model(folder)
+            with contextlib.redirect_stdout(io.StringIO()):
+                solver = DapSolver(folder)
+        u = np.ravel(solver.Bodies_to_u(None))
+        
+        rates = []
+        for backend in backends:
+            kernels.set_backend(backend)
+            with contextlib.redirect_stdout(io.StringIO()):
+                solver.analysis(0.0, u)         # compile
+                rates.append(evaluationsPerSecond(solver, u))
+        print("%-18s" % name + "".join("%16.0f" % rate for rate in rates))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Wall time of driven slider-cranks (1 to 100 copies in one model) solved by kinematic
+# analysis and by integrating their equations of motion, and the largest difference of
+# the body positions.
+#
+#   python benchmarks/bench_kinematic.py [n_cranks ...]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dap_solver'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from dapSolver import DapSolver
+import models
+import results
+
+DT      = 0.01
+T_FINAL = 2.0
+SPARSE_CRANKS = 10                  # the sparse linear solver is used above this size
+
+
+def solve(folder, analysis_type, t_final, linear_solver):
+    solver = DapSolver(folder, linear_solver)
+    solver.analysis_type = analysis_type
+    solver.t_initial, solver.dt, solver.t_final = 0.0, DT, t_final
+    t0 = time.perf_counter()
+    solver.solve()
+    wall_time = time.perf_counter() - t0
+    return wall_time, solver.num, np.array(results.readChannel(folder, 'Bodies_r'))
+
+
+def main(counts):
+    print("%10s %8s %14s %14s %12s %12s %8s %12s" % ("cranks", "solver", "dynamic [s]", "kinematic [s]", "RHS evals",
+                                                       "iterations", "speedup", "max diff"))
+    for n in counts:
+        with tempfile.TemporaryDirectory() as folder:
+            models.sliderCrank(folder, n_cranks=n)
+            linear_solver = 'sparse' if n > SPARSE_CRANKS else 'dense'
+            t_dynamic, evaluations, r_dynamic = solve(folder, 'dynamic', T_FINAL, linear_solver)
+            t_kinematic, iterations, r_kinematic = solve(folder, 'kinematic', T_FINAL, linear_solver)
+        print("%10d %8s %14.3f %14.3f %12d %12d %8.1f %12.2e" % (n, linear_solver, t_dynamic, t_kinematic, evaluations, iterations,
+                                                                 t_dynamic/t_kinematic, np.abs(r_dynamic - r_kinematic).max()))
+
+
+if __name__ == '__main__':
+    counts = [int(a) for a in sys.argv[1:]] or [1, 10, 100]
+    main(counts)
@@ -0,0 +1,48 @@
+# Cost of one force evaluation versus the number of point-to-point springs,
+# comparing the batched kernel (SDA_ptp_batch) with the per-spring SDA_ptp loop.
+#
+#   python benchmarks/bench_ptp.py [n_springs ...]
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dap_solver'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dapSolver import DapSolver
+import models
+
+
+def timePerCall(fun, repeat=5):
+    number = 10
+    while timeit.timeit(fun, number=number) < 0.2:
+        number = number*2
+    return min(timeit.repeat(fun, number=number, repeat=repeat))/number
+
+
+def loopForces(solver):
+    solver.fn_array[:] = solver.fn_const_array
+    for Fi in solver.F_ptp:
+        solver.SDA_ptp(Fi)
+
+
+def main(spring_counts):
+    print("%10s %14s %14s %8s" % ("springs", "loop [us]", "batched [us]", "speedup"))
+    for n in spring_counts:
+        with tempfile.TemporaryDirectory() as folder:
+            models.springChain(folder, n)
+            with contextlib.redirect_stdout(io.StringIO()):
+                solver = DapSolver(folder)
+
+        t_loop  = timePerCall(lambda: loopForces(solver))
+        t_batch = timePerCall(lambda: solver.Force_array(0.0))
+        print("%10d %14.1f %14.1f %8.1f" % (n, t_loop*1e6, t_batch*1e6, t_loop/t_batch))
+
+
+if __name__ == '__main__':
+    counts = [int(a) for a in sys.argv[1:]] or [1, 10, 100, 1000]
+    main(counts)
@@ -0,0 +1,130 @@
+# Benchmark suite: generic versions of the mechanisms of the tutorials (simple, double
+# and sliding pendulum) and synthetic scaling models (pendulum chains, spring grids and contact
+# drops with 10 to 2000 bodies), solved headlessly. Every case runs in a process of
+# its own, and the wall time, RHS evaluations, integrator steps, peak memory and
+# time per RHS evaluation are written to a JSON file.
+#
+#   python benchmarks/bench_suite.py [--sizes 10 100 1000 2000] [--t-final 0.2] [--output bench_suite.json]
+#
+# The tutorial cases (*_generic) have the bodies, joints and forces of the tutorials
+# but not their geometry: they are generated by models.py with uniform 1 m rods and the
+# slider of slidingPendulum, as the masses and inertias of the tutorials are computed by
+# FreeCAD from the shapes in the .FCStd files. The sliding pendulum has the spring of its
+# tutorial (20 N/m, 0.6 m).
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dap_solver'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import models
+
+try:
+    import resource
+except ImportError:                 # Windows
+    resource = None
+
+DT = 0.01
+SPARSE_BODIES = 100                 # the sparse linear solver is used above this size
+
+# name: (model generator, arguments)
+TUTORIAL_SPRING = {'type': 'ptp', 'iPindex': 2, 'jPindex': 1, 'k': 20.0, 'L0': 0.6, 'dc': 0.0}
+
+TUTORIALS = {'simple_pendulum_generic':  (models.pendulumChain, (1,)),
+             'double_pendulum_generic':  (models.pendulumChain, (2,)),
+             'sliding_pendulum_generic': (models.slidingPendulum, ([TUTORIAL_SPRING],))}
+
+SCALING = {'pendulum_chain': models.pendulumChain,
+           'spring_grid':    models.springGrid,
+           'contact_drop':   models.contactDrop}
+
+
+def peakMemory():
+    """ Peak resident memory of this process [MB] (None if unknown) """
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return maxrss/1024**2 if sys.platform == 'darwin' else maxrss/1024
+
+
+def runCase(name, generator, arguments, t_final, linear_solver):
+    """ Writes and solves one case. Runs in a process of its own """
+    from dapSolver import DapSolver
+
+    result = {'case': name, 'linear_solver': linear_solver, 't_final': t_final, 'dt': DT}
+    with tempfile.TemporaryDirectory() as folder, contextlib.redirect_stdout(io.StringIO()):
+        generator(folder, *arguments)
+        t0 = time.perf_counter()
+        solver = DapSolver(folder, linear_solver)
+        solver.t_initial, solver.dt, solver.t_final = 0.0, DT, t_final
+        steps = [0]
+        def progress(t, wall_time, n_steps, evaluations):
+            steps[0] = n_steps
+        solver.progress = progress
+        t1 = time.perf_counter()
+        success = solver.solve()
+        t2 = time.perf_counter()
+
+    # the moving bodies, without the ground
+    result.update(bodies=int(solver.nB) - 1,
+                  success=bool(success),
+                  setup_time=t1 - t0,
+                  wall_time=t2 - t1,
+                  evaluations=int(solver.num),
+                  steps=int(steps[0]),
+                  time_per_evaluation=(t2 - t1)/max(solver.num, 1),
+                  peak_memory_mb=peakMemory())
+    return result
+
+
+def cases(sizes, t_final):
+    for name, (generator, arguments) in TUTORIALS.items():
+        yield name, generator, arguments, t_final, 'dense'
+    for size in sizes:
+        for name, generator in SCALING.items():
+            yield (name + "_" + str(size), generator, (size,), t_final,
+                   'sparse' if size > SPARSE_BODIES else 'dense')
+
+
+def main(sizes, t_final, output):
+    # a fresh interpreter per case, so that the peak memory is that of the case alone
+    context = multiprocessing.get_context('spawn')
+    report = {'python': platform.python_version(),
+              'numpy': np.__version__,
+              'platform': platform.platform(),
+              'cases': []}
+    print("%-24s %7s %8s %10s %8s %10s %12s %10s" % ("case", "bodies", "solver", "wall [s]", "steps",
+                                                     "RHS evals", "RHS [ms]", "peak [MB]"))
+    for case in cases(sizes, t_final):
+        with context.Pool(1) as pool:
+            result = pool.apply(runCase, case)
+        report['cases'].append(result)
+        peak = result['peak_memory_mb']
+        print("%-24s %7d %8s %10.3f %8d %10d %12.4f %10s" % (result['case'], result['bodies'], result['linear_solver'],
+                                                             result['wall_time'], result['steps'], result['evaluations'],
+                                                             1e3*result['time_per_evaluation'],
+                                                             "-" if peak is None else "%.1f" % peak))
+        with open(output, 'w') as fid:
+            json.dump(report, fid, indent=1)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="DAP solver benchmark suite")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 2000],
+                        help="numbers of bodies of the scaling models")
+    parser.add_argument('--t-final', type=float, default=0.2, help="end time of every case [s]")
+    parser.add_argument('--output', default='bench_suite.json', help="JSON file of the results")
+    args = parser.parse_args()
+    main(args.sizes, args.t_final, args.output)
@@ -0,0 +1,160 @@
+# Generators for the benchmark models. Each writes the model bundle that
+# DapSolverBuilder would write, so the models can be read by DapSolver.readInputFiles().
+# Passing writer=writeLegacyModel writes the in*.py input files used before instead.
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dap_solver'))
+
+import bundle
+
+
+def _vector(x, y):
+    return [float(x), float(y)]
+
+
+def _source(value):
+    if isinstance(value, list):
+        return "np.array([[" + ",".join(str(v) for v in value) + "]]).T"
+    return repr(value)
+
+
+def _writeStructs(folder, file_name, name, prefix, struct, items):
+    """ items is a list of dictionaries of attribute name: value """
+    with open(os.path.join(folder, file_name), 'w') as fid:
+        fid.write("global " + name + "\n")
+        for i, item in enumerate(items, start=1):
+            fid.write(prefix + str(i) + " = " + struct + "()\n")
+            for attr, value in item.items():
+                fid.write(prefix + str(i) + "." + attr + " = " + _source(value) + "\n")
+            fid.write("\n")
+        fid.write(name + " = np.array([[None" + "".join(", " + prefix + str(i) for i in range(1, len(items)+1)) + "]]).T\n")
+
+
+def writeModel(folder, bodies, points, joints=[], forces=[], uvectors=[], functs=[]):
+    os.makedirs(folder, exist_ok=True)
+    bundle.writeBundle(os.path.join(folder, bundle.BUNDLE_FILE), Bodies=bodies, Points=points, Joints=joints,
+                       Forces=forces, Uvectors=uvectors, Functs=functs)
+
+
+def writeLegacyModel(folder, bodies, points, joints=[], forces=[], uvectors=[], functs=[]):
+    os.makedirs(folder, exist_ok=True)
+    _writeStructs(folder, 'inBodies.py', "Bodies", "B", "Body_struct", bodies)
+    _writeStructs(folder, 'inPoints.py', "Points", "P", "Point_struct", points)
+    _writeStructs(folder, 'inJoints.py', "Joints", "J", "Joint_struct", joints)
+    _writeStructs(folder, 'inForces.py', "Forces", "F", "Force_struct", forces)
+    _writeStructs(folder, 'inUvectors.py', "Uvectors", "U", "Unit_struct", uvectors)
+    _writeStructs(folder, 'inFuncts.py', "Functs", "C", "Funct_struct", functs)
+
+
+def _body(m, J, x, y, p=0.0, xd=0.0, yd=0.0, pd=0.0):
+    return {'m': m, 'J': J, 'r': _vector(x, y), 'p': p, 'r_d': _vector(xd, yd), 'p_d': pd}
+
+
+def _point(Bi, x, y):
+    return {'Bindex': Bi, 'sPlocal': _vector(x, y)}
+
+
+def _gravity():
+    return {'type': 'weight', 'gravity': 9.81, 'wgt': _vector(0, -1)}
+
+
+def pendulumChain(folder, n_links, L=1.0, writer=writeModel):
+    """ Horizontal chain of n_links rods connected by revolute joints, the first one
+    pinned to the ground (n_links = 1, 2: the mechanisms of the simple and double pendulum
+    tutorials, with uniform rods instead of their geometry) """
+    bodies = [_body(1.0, L**2/12, (i - 0.5)*L, 0.0) for i in range(1, n_links+1)]
+    # P1 is on the ground, P(2i) and P(2i+1) are the ends of body i
+    points = [_point(0, 0.0, 0.0)]
+    for i in range(1, n_links+1):
+        points += [_point(i, -L/2, 0.0), _point(i, L/2, 0.0)]
+    joints = [{'type': 'rev', 'iPindex': 1 if i == 1 else 2*i - 1, 'jPindex': 2*i}
+              for i in range(1, n_links+1)]
+    writer(folder, bodies, points, joints, [_gravity()])
+
+
+def slidingPendulum(folder, forces=[], writer=writeModel):
+    """ The mechanism of the sliding pendulum tutorial, not its geometry: a slider on a
+    horizontal translational joint with a pendulum hinged to it. forces are added after
+    the weight """
+    bodies = [_body(2.0, 0.2, 0.0, 0.0, xd=0.3),
+              _body(1.0, 0.05, 0.0, -0.5, xd=1.3, pd=2.0)]
+    points = [_point(0, -1.0, 0.0), _point(1, 1.0, 0.0), _point(1, 0.0, 0.0), _point(2, 0.0, 0.5)]
+    uvectors = [{'Bindex': 0, 'ulocal': _vector(1, 0)}, {'Bindex': 1, 'ulocal': _vector(1, 0)}]
+    joints = [{'type': 'tran', 'iPindex': 1, 'jPindex': 2, 'iUindex': 1, 'jUindex': 2},
+              {'type': 'rev', 'iPindex': 3, 'jPindex': 4}]
+    writer(folder, bodies, points, joints, [_gravity()] + forces, uvectors)
+
+
+def sliderCrank(folder, omega=2*np.pi, a=0.1, b=0.3, phi0=0.5, n_cranks=1, writer=writeModel):
+    """ Slider-crank driven at a constant crank speed omega by a rel-rot joint (a fully
+    driven mechanism), with a crank of length a at the angle phi0 and a coupler of length
+    b. The initial positions and velocities are consistent with the driver. n_cranks
+    copies are placed 0.5 apart in y, each with its own driver """
+    s, c = np.sin(phi0), np.cos(phi0)
+    w = np.sqrt(b**2 - (a*s)**2)
+    beta, beta_d = -np.arcsin(a*s/b), -a*c*omega/w
+    A, A_d = np.array([a*c, a*s]), a*omega*np.array([-s, c])
+    B, B_d = np.array([a*c + w, 0.0]), np.array([-a*omega*s*(1 + a*c/w), 0.0])
+    bodies, points, uvectors, joints = [], [], [], []
+    for k in range(n_cranks):
+        y = 0.5*k
+        # bodies 3k+1..3k+3, points 7k+1..7k+7, unit vectors 2k+1, 2k+2
+        B1, P1, U1 = 3*k, 7*k, 2*k
+        bodies += [_body(0.5, 0.5*a**2/12, A[0]/2, A[1]/2 + y, p=phi0, xd=A_d[0]/2, yd=A_d[1]/2, pd=omega),
+                   _body(1.0, 1.0*b**2/12, (A + B)[0]/2, (A + B)[1]/2 + y, p=beta,
+                         xd=(A_d + B_d)[0]/2, yd=(A_d + B_d)[1]/2, pd=beta_d),
+                   _body(2.0, 0.01, B[0], B[1] + y, xd=B_d[0])]
+        points += [_point(0, 0.0, y), _point(B1+1, -a/2, 0.0), _point(B1+1, a/2, 0.0),
+                   _point(B1+2, -b/2, 0.0), _point(B1+2, b/2, 0.0), _point(B1+3, 0.0, 0.0), _point(0, 0.0, y)]
+        uvectors += [{'Bindex': 0, 'ulocal': _vector(1, 0)}, {'Bindex': B1+3, 'ulocal': _vector(1, 0)}]
+        joints += [{'type': 'rev', 'iPindex': P1+2, 'jPindex': P1+1},
+                   {'type': 'rev', 'iPindex': P1+3, 'jPindex': P1+4},
+                   {'type': 'rev', 'iPindex': P1+5, 'jPindex': P1+6},
+                   {'type': 'tran', 'iPindex': P1+7, 'jPindex': P1+6, 'iUindex': U1+1, 'jUindex': U1+2},
+                   {'type': 'rel-rot', 'iBindex': B1+1, 'jBindex': 0, 'iFunct': 1}]
+    functs = [{'type': 'a', 'coeff': [phi0, omega, 0.0]}]
+    writer(folder, bodies, points, joints, [_gravity()], uvectors, functs)
+
+
+def springChain(folder, n_springs, L=0.2, k=50.0, dc=0.5, writer=writeModel):
+    """ Cable-like model: n_springs free bodies hanging from the ground, each
+    connected to the previous one by a point-to-point spring-damper """
+    bodies = [_body(0.1, 0.001, i*L, 0.0) for i in range(1, n_springs+1)]
+    # P1 is on the ground, P(i+1) is at the centre of body i
+    points = [_point(i, 0.0, 0.0) for i in range(0, n_springs+1)]
+    forces = [_gravity()]
+    forces += [{'type': 'ptp', 'iPindex': i+1, 'jPindex': i, 'k': k, 'L0': L, 'dc': dc}
+               for i in range(1, n_springs+1)]
+    writer(folder, bodies, points, forces=forces)
+
+
+def springGrid(folder, n_bodies, L=0.2, k=200.0, dc=1.0, writer=writeModel):
+    """ Net of free bodies on a square grid, connected to their right and lower neighbours
+    by point-to-point spring-dampers, with the top row hung from the ground """
+    n_columns = int(np.ceil(np.sqrt(n_bodies)))
+    bodies = [_body(0.1, 0.001, (i % n_columns)*L, -(i // n_columns + 1)*L) for i in range(n_bodies)]
+    # P(i) is at the centre of body i, P(n_bodies + j) is on the ground above body j of the top row
+    points = [_point(i, 0.0, 0.0) for i in range(1, n_bodies+1)]
+    points += [_point(0, j*L, 0.0) for j in range(min(n_columns, n_bodies))]
+    forces = [_gravity()]
+    for i in range(n_bodies):
+        if (i + 1) % n_columns != 0 and i + 1 < n_bodies:
+            forces.append({'type': 'ptp', 'iPindex': i+2, 'jPindex': i+1, 'k': k, 'L0': L, 'dc': dc})
+        if i + n_columns < n_bodies:
+            forces.append({'type': 'ptp', 'iPindex': i+n_columns+1, 'jPindex': i+1, 'k': k, 'L0': L, 'dc': dc})
+        if i < n_columns:
+            forces.append({'type': 'ptp', 'iPindex': i+1, 'jPindex': n_bodies+i+1, 'k': k, 'L0': L, 'dc': dc})
+    writer(folder, bodies, points, forces=forces)
+
+
+def contactDrop(folder, n_bodies, R=0.05, k=1e5, e=0.8, writer=writeModel):
+    """ n_bodies discs dropped from different heights onto the ground (y = 0), each
+    with a contact point at the bottom of the disc """
+    bodies = [_body(1.0, 0.5*R**2, 3*R*i, R + 0.1 + 0.05*(i % 7)) for i in range(n_bodies)]
+    points = [_point(i, 0.0, -R) for i in range(1, n_bodies+1)]
+    forces = [_gravity()]
+    forces += [{'type': 'contact', 'iPindex': i, 'k': k, 'e': e} for i in range(1, n_bodies+1)]
+    writer(folder, bodies, points, forces=forces)
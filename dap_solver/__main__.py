@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dapSolver
+import results
+import sweep
+import timers
+import worker
+# Command line entry point, runs the solver without FreeCAD:
+#   python -m dap_solver run <folder> [--t-final 2.0 --rtol 1e-8 ...]
+#   python -m dap_solver sweep <base folder> <parameter table.csv> <output folder> [--processes 4]
+# The folder is a DapSolverBuilder folder (model bundle and dapInputSettings.py); the
+# options override the settings of dapInputSettings.py.
+
+
+def _seconds(value):
+    seconds = float(value)
+    if seconds < 0:
+        raise argparse.ArgumentTypeError("must not be negative: " + value)
+    return seconds
+
+
+def run(arguments):
+    if not os.path.isdir(arguments.folder):
+        print("No model folder " + arguments.folder, file=sys.stderr)
+        return 1
+    settings = worker.readSettings(arguments.folder)
+    for key in settings:
+        value = getattr(arguments, key, None)
+        if value is not None:
+            settings[key] = value
+
+    progress = None
+    if arguments.progress is not None:
+        def progress(t, wall_time, steps, evaluations):
+            print("t = {:.6g} / {:.6g} s after {:.1f} s, {} steps, {} evaluations".format(
+                  t, settings['t_final'], wall_time, steps, evaluations), file=sys.stderr, flush=True)
+
+    t0 = time.perf_counter()
+    try:
+        solver = worker.runSolver(arguments.folder, settings=settings, progress=progress,
+                                  progress_interval=worker.PROGRESS_INTERVAL if arguments.progress is None
+                                  else arguments.progress)
+    except Exception as e:
+        print("Solve failed after {:.3f} s: {}: {}".format(time.perf_counter() - t0, type(e).__name__, e), file=sys.stderr)
+        return 1
+    wall_time = time.perf_counter() - t0
+
+    # the last reporting time, t_final itself is not reported
+    t_last = results.readChannel(arguments.folder, 'time')[-1]
+    print("Solved {} to t = {:.6g} in {:.3f} s ({} evaluations), results in {}".format(
+          arguments.folder, t_last, wall_time, solver.num,
+          os.path.join(arguments.folder, results.RESULTS_FOLDER)))
+    if solver.timers is not None:
+        print(timers.formatTimings(solver.timers.report()))
+    return 0
+
+
+def runSweep(arguments):
+    summary = sweep.runSweep(arguments.base_folder, sweep.readTable(arguments.table), arguments.output_folder,
+                             arguments.processes)
+    return 0 if all(row['success'] for row in summary) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m dap_solver", description="Planar multibody solver")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_run = commands.add_parser('run', help="solve a model folder and write its results")
+    parser_run.add_argument('folder')
+    parser_run.add_argument('--analysis', dest='analysis_type', choices=['dynamic', 'kinematic'],
+                            help="kinematic: solve the constraints of a fully driven mechanism instead of integrating")
+    parser_run.add_argument('--t-initial', dest='t_initial', type=float)
+    parser_run.add_argument('--dt', type=float, help="reporting time step")
+    parser_run.add_argument('--t-final', dest='t_final', type=float)
+    parser_run.add_argument('--linear-solver', dest='linear_solver', choices=['dense', 'sparse', 'schur'])
+    parser_run.add_argument('--integrator', choices=list(dapSolver.INTEGRATORS))
+    parser_run.add_argument('--rtol', type=float)
+    parser_run.add_argument('--atol', type=float)
+    parser_run.add_argument('--text', dest='text_outputs', action='store_const', const=True,
+                            help="also write the Dap* text files")
+    parser_run.add_argument('--restart', action='store_const', const=True,
+                            help="resume from the checkpoint of an earlier run, or extend it to --t-final")
+    parser_run.add_argument('--timing', action='store_const', const=True,
+                            help="time the phases of the solve, written to DapResults/timings.json")
+    parser_run.add_argument('--profile', action='store_const', const=True,
+                            help="profile the solve, written to DapResults/dapSolve.prof and dapSolve.collapsed")
+    parser_run.add_argument('--progress', type=_seconds, metavar='SECONDS',
+                            help="write the progress to stderr every SECONDS of wall time (0: every step)")
+    parser_run.set_defaults(function=run)
+
+    parser_sweep = commands.add_parser('sweep', help="solve every row of a parameter table in a process pool")
+    parser_sweep.add_argument('base_folder')
+    parser_sweep.add_argument('table')
+    parser_sweep.add_argument('output_folder')
+    parser_sweep.add_argument('--processes', type=int)
+    parser_sweep.set_defaults(function=runSweep)
+
+    arguments = parser.parse_args(argv)
+    return arguments.function(arguments)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
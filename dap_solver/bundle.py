@@ -0,0 +1,125 @@
+import os
+import numpy as np
+
+from structures import Body_struct, Force_struct, Joint_struct, Point_struct, Unit_struct, Funct_struct
+# Model bundle: the input structures of a model stored as typed arrays in a single
+# .npz file, one array per structure attribute (e.g. 'Bodies.m' with one entry per
+# body, 'Points.sPlocal' with one row per point). It is written by DapSolverBuilder
+# and read by DapSolver with one np.load call, instead of executing the in*.py files.
+#
+# Attribute kinds: 'f' float, 'i' integer (indices, flags), 's' string, 'v' 2-vector
+# (stored as a row, a column vector in the structure) and 'c' coefficient column of
+# variable length (padded with zeros, with its length in '<name>.<attr>_len').
+
+BUNDLE_FILE = 'dapModel.npz'
+
+SCHEMA = {'Bodies':   (Body_struct,  {'m': 'f', 'J': 'f', 'r': 'v', 'p': 'f', 'r_d': 'v', 'p_d': 'f'}),
+          'Points':   (Point_struct, {'Bindex': 'i', 'sPlocal': 'v'}),
+          'Uvectors': (Unit_struct,  {'Bindex': 'i', 'ulocal': 'v'}),
+          'Joints':   (Joint_struct, {'type': 's', 'iBindex': 'i', 'jBindex': 'i', 'iPindex': 'i', 'jPindex': 'i',
+                                      'iUindex': 'i', 'jUindex': 'i', 'iFunct': 'i', 'L': 'f', 'R': 'f',
+                                      'x0': 'f', 'p0': 'f', 'fix': 'i'}),
+          'Forces':   (Force_struct, {'type': 's', 'iPindex': 'i', 'jPindex': 'i', 'iBindex': 'i', 'jBindex': 'i',
+                                      'k': 'f', 'L0': 'f', 'theta0': 'f', 'dc': 'f', 'f_a': 'f', 'T_a': 'f',
+                                      'gravity': 'f', 'wgt': 'v', 'flocal': 'v', 'f': 'v', 't': 'f', 'e': 'f',
+                                      'model': 'i', 'iFunct': 'i'}),
+          'Functs':   (Funct_struct, {'type': 's', 't_start': 'f', 'f_start': 'f', 't_end': 'f', 'f_end': 'f',
+                                      'dfdt_end': 'f', 'ncoeff': 'i', 'coeff': 'c'})}
+
+LEGACY_FILES = {'Bodies':   'inBodies.py',
+                'Forces':   'inForces.py',
+                'Functs':   'inFuncts.py',
+                'Joints':   'inJoints.py',
+                'Points':   'inPoints.py',
+                'Uvectors': 'inUvectors.py'}
+
+
+
+#%%% writeBundle
+def writeBundle(file_name, **items):
+    """ Writes a model bundle. items are lists of dictionaries of attribute: value, one per
+    element, e.g. Bodies=[{'m': 1.0, 'J': 0.1, 'r': [0.5, 0.0]}], Points=[...]; attributes
+    that are not given take the default of the structure """
+    arrays = {}
+    for name, (struct, attributes) in SCHEMA.items():
+        elements = items.get(name, [])
+        default = struct().__dict__
+        for element in elements:
+            for attr in element:
+                if attr not in attributes:
+                    raise ValueError("Unknown attribute " + name + "." + attr)
+
+        for attr, kind in attributes.items():
+            values = [element.get(attr, default[attr]) for element in elements]
+            key = name + "." + attr
+            if kind == 'f':
+                arrays[key] = np.array(values, dtype=float).reshape(-1)
+            elif kind == 'i':
+                arrays[key] = np.array(values, dtype=int).reshape(-1)
+            elif kind == 's':
+                arrays[key] = np.array(values, dtype=str).reshape(-1)
+            elif kind == 'v':
+                arrays[key] = np.array([np.ravel(v) for v in values], dtype=float).reshape(-1,2)
+            elif kind == 'c':
+                values  = [np.ravel(v).astype(float) for v in values]
+                lengths = np.array([len(v) for v in values], dtype=int)
+                padded  = np.zeros((len(values), max(lengths, default=0)))
+                for i, v in enumerate(values):
+                    padded[i,0:len(v)] = v
+                arrays[key] = padded
+                arrays[key + "_len"] = lengths
+    np.savez(file_name, **arrays)
+
+#%%% readBundle
+def readBundle(file_name):
+    """ Reads a model bundle into the structure arrays used by DapSolver (index 0 is None) """
+    with np.load(file_name) as bundle:
+        arrays = {key: bundle[key] for key in bundle.files}
+
+    model = {}
+    for name, (struct, attributes) in SCHEMA.items():
+        # attributes added after a bundle was written keep the default of the structure
+        columns = {attr: arrays[name + "." + attr] for attr in attributes if name + "." + attr in arrays}
+        n = len(next(iter(columns.values())))
+        structs = np.empty((n + 1,1), dtype=object)
+        for i in range(n):
+            element = struct()
+            for attr, kind in attributes.items():
+                if attr not in columns:
+                    continue
+                value = columns[attr][i]
+                if kind == 'f':
+                    value = float(value)
+                elif kind == 'i':
+                    value = int(value)
+                elif kind == 's':
+                    value = str(value)
+                elif kind == 'v':
+                    value = value.reshape(2,1).copy()
+                elif kind == 'c':
+                    value = value[0:arrays[name + "." + attr + "_len"][i]].reshape(-1,1).copy()
+                setattr(element, attr, value)
+            structs[i + 1,0] = element
+        model[name] = structs
+    return model
+
+#%%% readInputFiles
+def readInputFiles(folder):
+    """ Reads the in*.py input files of folders written before the model bundle was
+    introduced. The files are executed in a namespace of their own """
+    model = {'np': np,
+             'Body_struct': Body_struct, 'Force_struct': Force_struct, 'Joint_struct': Joint_struct,
+             'Point_struct': Point_struct, 'Unit_struct': Unit_struct, 'Funct_struct': Funct_struct}
+    for file_name in LEGACY_FILES.values():
+        exec(open(os.path.join(folder, file_name)).read(), model)
+    return {name: model[name] for name in LEGACY_FILES}
+
+#%%% convertInputFiles
+def convertInputFiles(folder):
+    """ Writes the bundle of a folder with in*.py input files """
+    model = readInputFiles(folder)
+    items = {}
+    for name, (struct, attributes) in SCHEMA.items():
+        items[name] = [{attr: getattr(element, attr) for attr in attributes if hasattr(element, attr)}
+                       for element in model[name][1:,0]]
+    writeBundle(os.path.join(folder, BUNDLE_FILE), **items)
@@ -1,128 +1,635 @@
-import os
+##-------------------------------------------------%%% Imports
 import numpy as np
-
-from structures import Body_struct, Force_struct, Joint_struct, Point_struct, Unit_struct, Funct_struct
+from scipy import integrate
+from scipy import sparse
+from scipy.sparse.linalg import spsolve, splu
+from scipy.linalg import cho_factor, cho_solve, lu_factor, lu_solve
+from scipy.sparse.csgraph import connected_components
+import os
+import time
 
 from helper_functions import Matrix_A, s_rot
+import bundle
+import kernels
+import profiling
+import results
+import timers
+
+INTEGRATORS = {'dop853': integrate.DOP853,
+               'RK45':   integrate.RK45,
+               'BDF':    integrate.BDF,
+               'Radau':  integrate.Radau,
+               'LSODA':  integrate.LSODA}
+
+CHECKPOINT_FILE = 'dapCheckpoint.npz'
+
+KINEMATIC_DOF_ERROR = "Kinematic analysis needs a fully driven mechanism, {} degrees of freedom are not constrained or driven"
+
+
+
 class DapSolver():
+    # The model and all of the solver state are held by the instance, so several models
+    # can be loaded (and solved from different threads) at the same time:
+    #   solver = DapSolver(folder)                  # reads the input files and initializes
+    #   solver.t_initial, solver.dt, solver.t_final = 0.0, 0.01, 1.0
+    #   solver.solve()
+    #   solver.writeOutputs()
     
-    def __init__(self, folder):
-        
+    def __init__(self, folder, linear_solver='dense', integrator='dop853', rtol=1e-6, atol=1e-12):
         self.folder = folder
         
-        self.readInputFiles()
-        self.initalize()
+        ##-------------------------------------------------%%% Solver settings 
+        self.linear_solver = linear_solver  # 'dense': np.linalg.solve on the full KKT matrix, 'sparse': sparse KKT solve,
+                                            # 'schur': Cholesky solve of D M^-1 D' for the Lagrange multipliers only
+        self.integrator    = integrator     # explicit: 'dop853', 'RK45', implicit (stiff): 'BDF', 'Radau', 'LSODA'
+        self.rtol          = rtol           # relative and absolute integration tolerances
+        self.atol          = atol
         
-        return
-    
-    def readInputFiles(self):
-        exec(open(os.path.join(self.folder, 'inBodies.py')).read())
-        exec(open(os.path.join(self.folder, 'inForces.py')).read())
-        exec(open(os.path.join(self.folder, 'inFuncts.py')).read())
-        exec(open(os.path.join(self.folder, 'inJoints.py')).read())
-        exec(open(os.path.join(self.folder, 'inPoints.py')).read())
-        exec(open(os.path.join(self.folder, 'inUvectors.py')).read())
+        self.analysis_type = 'dynamic'      # 'dynamic': integrates the equations of motion, 'kinematic': solves the
+                                            # constraints of a fully driven mechanism at each reporting time
+        self.kinematic_tol        = 1e-10   # largest constraint violation of the position solution (kinematic)
+        self.kinematic_iterations = 25      # Newton iterations per reporting time (kinematic)
+
+        self.t_initial = 0.0                # reporting times
+        self.dt        = 0.01
+        self.t_final   = 1.0
         
-        self.Bodies = Bodies
-        self.Forces = Forces
-        self.Functs = Functs
-        self.Joints = Joints
-        self.Points = Points
-        self.Uvectors = Uvectors
+        self.restart             = False    # resume solve() from the checkpoint of an earlier run
+        self.checkpoint_interval = 60.0     # wall time [s] between checkpoints, None: only at the end
+        self.progress            = None     # called as progress(t, wall_time, steps, evaluations) during solve()
+        self.progress_interval   = 0.2      # wall time [s] between progress calls (0: every step), and once at the end
+        self.timing              = False    # time the phases of solve(), see timers.py
+        self.profile             = False    # write cProfile and sampled profiles of solve(), see profiling.py
+        self.timers              = None
+
+        self.solution_success = False
+        self.write_success    = False
+        
+        self.readInputFiles()
+        self.initialize()
     
-    def initalize(self):
+    ################################################################
+    #
+    #ANALYSIS
+    #
+    ################################################################
+    def analysis(self, t, u):
+
+        self.u_to_Bodies(u)
+        self.Update_Position()
+        self.Update_Velocity()
+
+        h_a  = self.Force_array(t)
+        h_a_ = np.atleast_2d(h_a[1:3*(self.nB-1)+1,0]).T
+
+        if self.nConst == 0:
+            c_dd = self.M_inv_array_ * h_a_
+        elif self.linear_solver == 'sparse':
+            self.D      = self.Jacobian_sparse(t)
+            rhsA   = self.RHSAcc(t)
+            rhs    = np.concatenate( (h_a_, rhsA), axis=0 )
+            sol    = self.KKT_solve_sparse(rhs)
+            c_dd   = sol[0:3*(self.nB-1)]
+            self.Lambda = sol[3*(self.nB-1):len(sol)]
+        elif self.linear_solver == 'schur':
+            self.D = self.Jacobian(t)
+            rhsA   = self.RHSAcc(t)
+            c_dd   = self.Schur_solve(self.D[:,0:3*(self.nB-1)], h_a_, rhsA)
+        else:
+            self.D = self.Jacobian(t)
+            rhsA   = self.RHSAcc(t)
+            sol    = self.KKT_solve_dense(self.D[:,0:3*(self.nB-1)], np.concatenate( (h_a_, rhsA), axis=0 ))
+            c_dd   = sol[0:3*(self.nB-1)]
+            self.Lambda = sol[3*(self.nB-1):len(sol)]
+
+        self.qdd_array[1:] = c_dd.reshape(self.nB-1,3)
+
+        u_d = self.Bodies_to_u_d()
+
+        self.num = self.num + 1
+        self.t_last = t
+        self.u_last[:] = np.ravel(u)
+
+        return np.concatenate((u_d), axis=None)
+
+
+
+    ################################################################
+    #
+    # Constraints
+    #
+    ################################################################
+
+    def Constraints(self, t):
+        # Constraint violations at time t, the rev and tran joints for all joints of the type at once
+        self.t = t
+        phi = np.zeros((self.nConst,1))
+
+        group = self.J_rev_group
+        phi[group['rows'],0] = (self.rP_array[group['iP']] - self.rP_array[group['jP']]).ravel()
+
+        group = self.J_tran_group
+        d = self.rP_array[group['iP']] - self.rP_array[group['jP']]
+        phi[group['rows'],0] = np.stack((np.einsum('ij,ij->i', self.uvec_r_array[group['jU']], d),
+                                         self.q_array[group['iB'],2] - self.q_array[group['jB'],2] - group['p0']), axis=1).ravel()
+
+        for Ji in self.J_other:
+            if self.Joints[Ji,0].type == 'rev':
+                f=self.C_rev(Ji)
+
+            if self.Joints[Ji,0].type == 'tran':
+                f=self.C_tran(Ji)
+
+            if self.Joints[Ji,0].type == 'rev_rev':
+                f=self.C_rev_rev(Ji)
+
+            if self.Joints[Ji,0].type == 'rev_tran':
+                f=self.C_rev_tran(Ji)
+
+            if self.Joints[Ji,0].type == 'rigid':
+                f=self.C_rigid(Ji)
+
+            if self.Joints[Ji,0].type == 'disc':
+                f=self.C_disc(Ji)
+
+            if self.Joints[Ji,0].type == 'rel_rot':
+                f=self.C_rel_rot(Ji)
+
+            if self.Joints[Ji,0].type == 'rel_tran':
+                f=self.C_rel_tran(Ji)
+
+            rs = self.Joints[Ji,0].rows -1
+            re = self.Joints[Ji,0].rowe
+            phi[rs:re] = np.reshape(f, (-1,1))
+        return phi
+
+
+    ################################################################
+    #
+    # Forces
+    #
+    ################################################################
+
+
+    #%% Forces
+    #%%% Contact_batch
+    def Contact_batch(self):                                     # All point contacts with the ground (y = 0) at once
+        pen   = -self.rP_array[self.F_con_P,1]
+        pen_d = -self.rP_d_array[self.F_con_P,1]
+        active = pen > 0
+
+        # the penetration velocity at impact is kept until the contact opens
+        impact = active & (self.flags[:,0] == 0)
+        self.pen_d0[impact,0] = pen_d[impact]
+        self.flags[:,0] = active
+
+        if not np.any(active):
+            return
+        delta  = np.where(active, pen, 0.0)
+        deld0  = np.where(self.pen_d0[:,0] > 0, self.pen_d0[:,0], np.inf)     # no damping without an impact velocity
+        K, e   = self.F_con_par[:,0], self.F_con_par[:,1]
+        fy = np.where(self.F_con_par[:,2] == 1, self.Contact_LN(delta, pen_d, deld0, K, e),
+                                                 self.Contact_FM(delta, pen_d, deld0, K, e))
+        fy = np.where(active, np.maximum(fy, 0.0), 0.0)                   # the ground only pushes
+
+        fi = np.zeros((len(fy),2))
+        fi[:,1] = fy
+        ni = np.einsum('ij,ij->i', self.sP_r_array[self.F_con_P], fi)
+        np.add.at(self.fn_array[:,0:2], self.F_con_B, fi)
+        np.add.at(self.fn_array[:,2], self.F_con_B, ni)
+
+    #%%% Contact_FM
+    def Contact_FM(self, delta, deld, deld0, K, e):                 #Contact force model Flores-Machado-Silva-Martins
+        fn = K*(delta**1.5)*(1 + 8*(1 - e)*deld/(5*e*deld0))
+        return fn
+
+    #%%% Contatc_LN
+    def Contact_LN(self, delta, deld, deld0, K, e):                 # Contact force model Lankarani-Nikravesh
+        fn = K*(delta**1.5)*(1 + 3*(1 - e**2)*deld/(4*deld0))
+        return fn
+
+    #%%% Friction_A
+    def Friction_A(self, mu_s, mu_d, v_s, p, k_t, v, fN):           # Friction force based on Anderson et al. model [Viscous friction not included]
+        ff = fN*(mu_d + (mu_s - mu_d)*np.exp(-(abs(v)/v_s)**p))*np.tanh(k_t*v)
+        return ff
+
+    #%%% Friction_B
+    def Friction_B(self, mu_s, mu_d, mu_v, v_t, fnt, v, fN):       # Friction force based on Brown-McPhee model [Viscous friction is included]
+        vr = v/v_t
+        ff = fN*(mu_d*np.tanh(4*vr) + (mu_s - mu_d)*vr/(0.25*vr**2 + 0.75)**2) + mu_v*v*np.tanh(4*fN/fnt)
+        return ff
+
+    #%%% SDA_ptp
+    def SDA_ptp(self, Fi):                                         # Point-to-point spring-damper-actuator
+
+        Pi     = self.Forces[Fi,0].iPindex
+        Pj     = self.Forces[Fi,0].jPindex
+        Bi     = self.Forces[Fi,0].iBindex
+        Bj     = self.Forces[Fi,0].jBindex
+        d      = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        d_dot  = self.Points[Pi,0].rP_d - self.Points[Pj,0].rP_d
+        L     = np.sqrt(d.T @ d)
+        L_dot = (d.T @ d_dot)/L
+        self.delta_ptp    = L - self.Forces[Fi,0].L0
+        u      = d/L
+
+        f = self.Forces[Fi,0].k*self.delta_ptp + self.Forces[Fi,0].dc*L_dot + self.Forces[Fi,0].f_a
+        fi = f*u
+        # row 0 of fn_array is ground and is never read back
+        self.fn_array[Bi,0:2] -= fi[:,0]
+        self.fn_array[Bi,2]   -= (self.Points[Pi,0].sP_r.T @ fi)[0,0]
+        self.fn_array[Bj,0:2] += fi[:,0]
+        self.fn_array[Bj,2]   += (self.Points[Pj,0].sP_r.T @ fi)[0,0]
+
+    #%%% SDA_ptp_batch
+    def SDA_ptp_batch(self):                                     # All point-to-point spring-damper-actuators at once
+        d     = self.rP_array[self.F_ptp_iP] - self.rP_array[self.F_ptp_jP]
+        d_dot = self.rP_d_array[self.F_ptp_iP] - self.rP_d_array[self.F_ptp_jP]
+        L     = np.sqrt(np.einsum('ij,ij->i', d, d))
+        L_dot = np.einsum('ij,ij->i', d, d_dot)/L
+
+        f  = self.F_ptp_par[:,0]*(L - self.F_ptp_par[:,1]) + self.F_ptp_par[:,2]*L_dot + self.F_ptp_par[:,3]
+        fi = (f/L)[:,np.newaxis]*d
+        ni = np.einsum('ij,ij->i', self.sP_r_array[self.F_ptp_iP], fi)
+        nj = np.einsum('ij,ij->i', self.sP_r_array[self.F_ptp_jP], fi)
+
+        # row 0 of fn_array is ground and is never read back
+        np.subtract.at(self.fn_array[:,0:2], self.F_ptp_iB, fi)
+        np.subtract.at(self.fn_array[:,2], self.F_ptp_iB, ni)
+        np.add.at(self.fn_array[:,0:2], self.F_ptp_jB, fi)
+        np.add.at(self.fn_array[:,2], self.F_ptp_jB, nj)
+
+    #%%% SDA_rot
+    def SDA_rot(self, Fi): #Rotational spring-damper-actuator
+        Bi = self.Forces[Fi,0].iBindex
+        Bj = self.Forces[Fi,0].jBindex
+
+        # ground rows of q_array/qd_array are zero
+        theta   = self.q_array[Bi,2] - self.q_array[Bj,2]
+        theta_d = self.qd_array[Bi,2] - self.qd_array[Bj,2]
+        T = self.Forces[Fi,0].k*(theta - self.Forces[Fi,0].theta0) + self.Forces[Fi,0].dc*theta_d + self.Forces[Fi,0].T_a
+        self.fn_array[Bi,2] -= T
+        self.fn_array[Bj,2] += T
+
+    #%%% Force_array
+    def Force_array(self, t):
+        # force elements are grouped by type in initialize(); the load independent
+        # terms (weight, f, trq) are summed once into fn_const_array
+        self.fn_array[:] = self.fn_const_array
+
+        if len(self.F_ptp) > 0:
+            self.SDA_ptp_batch()
+
+        if len(self.F_rot) > 0:
+            # ground rows of q_array/qd_array are zero
+            theta   = self.q_array[self.F_rot_i,2]  - self.q_array[self.F_rot_j,2]
+            theta_d = self.qd_array[self.F_rot_i,2] - self.qd_array[self.F_rot_j,2]
+            T = self.F_rot_par[:,0]*(theta - self.F_rot_par[:,1]) + self.F_rot_par[:,2]*theta_d + self.F_rot_par[:,3]
+            np.subtract.at(self.fn_array[:,2], self.F_rot_i, T)
+            np.add.at(self.fn_array[:,2], self.F_rot_j, T)
+
+        if len(self.F_loc_B) > 0:
+            np.add.at(self.fn_array[:,0:2], self.F_loc_B, np.einsum('nij,nj->ni', self.A_array[self.F_loc_B], self.F_loc_array))
+
+        if len(self.F_con) > 0:
+            self.Contact_batch()
+
+        g = np.zeros((self.nB3,1))
+        g[1:3*(self.nB-1)+1,0] = self.fn_array[1:].ravel()
+        return g
+
+
+
+
+    ################################################################
+    #
+    # Functions
+    #
+    ################################################################
+    # The coefficients are stored 0-based: coeff[0] is c_1 of the function definitions
+    #%%% funct_a
+    def funct_a(self, Ci, x): # Funciton type 'a'
+        c    = self.Functs[Ci,0].coeff
+        f    = c[0,0] + c[1,0]*x + c[2,0]*(x**2)
+        f_d  = c[1,0] + c[3,0]*x
+        f_dd = c[3,0]
+        return f, f_d, f_dd
+
+    #%%% funct_b
+    def funct_b(self, Ci, xx): #Function type 'b'
+        c = self.Functs[Ci,0].coeff
+
+        if xx <= self.Functs[Ci,0].t_start:
+            f    = self.Functs[Ci,0].f_start
+            f_d  = 0
+            f_dd = 0
+        elif xx > self.Functs[Ci,0].t_start and xx < self.Functs[Ci,0].t_end:
+            x    = xx - self.Functs[Ci,0].t_start
+            f    = c[0,0]*x**3 + c[1,0]*x**4 + c[2,0]*x**5 + self.Functs[Ci,0].f_start
+            f_d  = c[3,0]*x**2 + c[4,0]*x**3 + c[5,0]*x**4
+            f_dd = c[6,0]*x   + c[7,0]*x**2 + c[8,0]*x**3
+        else:
+            f    = self.Functs[Ci,0].f_end;
+            f_d  = 0
+            f_dd = 0
+
+        return f, f_d, f_dd
+
+    #%%% funct_c
+    def funct_c(self, Ci, xx): #Function type 'c'
+        c = self.Functs[Ci,0].coeff
+
+        if xx <= self.Functs[Ci,0].t_start:
+            f    = self.Functs[Ci,0].f_start
+            f_d  = 0
+            f_dd = 0
+        elif xx > self.Functs[Ci,0].t_start and xx < self.Functs[Ci,0].t_end:
+            x    = xx - self.Functs[Ci,0].t_start
+            f    = c[0,0]*x**4 + c[1,0]*x**5 + c[2,0]*x**6 + self.Functs[Ci,0].f_start
+            f_d  = c[3,0]*x**3 + c[4,0]*x**4 + c[5,0]*x**5
+            f_dd = c[6,0]*x**2 + c[7,0]*x**3 + c[8,0]*x**4
+        else:
+            # continues with the end slope
+            xe   = self.Functs[Ci,0].t_end - self.Functs[Ci,0].t_start
+            f    = c[0,0]*xe**4 + c[1,0]*xe**5 + c[2,0]*xe**6 + self.Functs[Ci,0].f_start + \
+                   self.Functs[Ci,0].dfdt_end*(xx - self.Functs[Ci,0].t_end)
+            f_d  = self.Functs[Ci,0].dfdt_end
+            f_dd = 0
+
+        return f, f_d, f_dd
+
+    #%%% functs
+    def functs(self, Ci, t):
+        if self.Functs[Ci,0].type == 'a':
+            _f_ =  self.funct_a(Ci,t)
+        elif self.Functs[Ci,0].type == 'b':
+            _f_ =  self.funct_b(Ci,t)
+        elif self.Functs[Ci,0].type == 'c':
+            _f_ =  self.funct_c(Ci,t)
+        elif self.Functs[Ci,0].type == 'd':
+            _f_ =  self.funct_d(Ci,t)
+        return _f_
+
+    #%%% functData
+    def functionData(self, Ci):
+        if self.Functs[Ci,0].type == 'a':
+            self.Functs[Ci,0].ncoeff = 4
+            c = np.zeros((4,1))
+            c[0:min(3, len(self.Functs[Ci,0].coeff)),0] = self.Functs[Ci,0].coeff[0:3,0]
+            c[3,0] = 2*c[2,0]
+            self.Functs[Ci,0].coeff = c
+        elif self.Functs[Ci,0].type == 'b':
+            self.Functs[Ci,0].ncoeff = 9
+            xe = self.Functs[Ci,0].t_end - self.Functs[Ci,0].t_start
+            fe = self.Functs[Ci,0].f_end - self.Functs[Ci,0].f_start
+            C = np.array([  [xe**3,     xe**4,      xe**5],
+                            [3*xe**2,   4*xe**3,    5*xe**4],
+                            [6*xe,      12*xe**2,   20*xe**3] ])
+            sol = np.linalg.solve( C, np.array([ [fe], [0], [0] ]) )
+
+            s1, s2, s3 = sol[:,0]
+            self.Functs[Ci,0].coeff = np.array([[s1, s2, s3, 3*s1, 4*s2, 5*s3, 6*s1, 12*s2, 20*s3]]).T
+        elif self.Functs[Ci,0].type == 'c':
+            self.Functs[Ci,0].ncoeff = 9
+            xe                  = self.Functs[Ci,0].t_end - self.Functs[Ci,0].t_start
+            fpe                 = self.Functs[Ci,0].dfdt_end
+            C                   = np.array([ [4*xe**3,   5*xe**4,    6*xe**5],
+                                             [12*xe**2,  20*xe**3,   30*xe**4],
+                                             [24*xe,     60*xe**2,   120*xe**3] ])
+            sol = np.linalg.solve( C, np.array([ [fpe], [0], [0] ]) )
+            s1, s2, s3 = sol[:,0]
+            self.Functs[Ci,0].coeff = np.array([[s1, s2, s3, 4*s1, 5*s2, 6*s3, 12*s1, 20*s2, 30*s3]]).T
+
+
+
+
+    ################################################################
+    #
+    # initialise
+    #
+    ################################################################
+    def initialize(self):
+        bodycolor = ['r', 'g' ,'b', 'c', 'm']
+
+        self.num = 0 # number of function evaluations
+        self.t_last = None          # time and state of the last call to analysis()
+        self.u_last = np.zeros(6*len(self.Bodies))
+
+    #%%% Bodies
         self.nB  = len(self.Bodies)
         self.nB3 = 3*(self.nB)
         self.nB6 = 6*(self.nB)
-        
-        for Bi in range(self.nB): 
-            self.Bodies[Bi,0].irc    = 3*Bi
-            self.Bodies[Bi,0].irv    = self.nB3 + 3*Bi
+
+        for Bi in range(1, self.nB):
+            self.Bodies[Bi,0].irc    = 3*(Bi-1) + 1
+            self.Bodies[Bi,0].irv    = 3*(self.nB-1) + 3*(Bi-1) + 1
             self.Bodies[Bi,0].m_inv  = 1/self.Bodies[Bi,0].m
             self.Bodies[Bi,0].J_inv  = 1/self.Bodies[Bi,0].J
             self.Bodies[Bi,0].A      = Matrix_A(self.Bodies[Bi,0].p)
-            #self.Bodies[Bi,0].color  = bodycolor[Bi]
+            self.Bodies[Bi,0].color  = bodycolor[Bi % len(bodycolor)]
 
-        #%%% Mass (inertia) matrix as an array 
+    #%%% Mass (inertia) matrix as an array
         self.M_array     = np.zeros((self.nB3,1))
         self.M_inv_array = np.zeros((self.nB3,1))
-        
-        for Bi in range(self.nB): 
-            is_ = 3*Bi
-            ie = is_ + 3
+
+        for Bi in range(1, self.nB):
+            is_                   = 3*(Bi - 1) + 1
+            ie                    = is_ + 2 + 1
             self.M_array[is_:ie,0]     = [self.Bodies[Bi,0].m, self.Bodies[Bi,0].m, self.Bodies[Bi,0].J ]
             self.M_inv_array[is_:ie,0] = [self.Bodies[Bi,0].m_inv, self.Bodies[Bi,0].m_inv, self.Bodies[Bi,0].J_inv]
-            
-        #%%% self.Points 
+
+        # moving bodies only, as used in analysis()
+        self.M_array_     = np.atleast_2d(self.M_array[1:3*(self.nB-1)+1,0]).T
+        self.M_inv_array_ = np.atleast_2d(self.M_inv_array[1:3*(self.nB-1)+1,0]).T
+
+    #%%% Points
         self.nP      = len(self.Points)
-        self.nPtot = self.nP 
-        
-        
-        for Pi in range(self.nPtot): 
-            if self.Points[Pi,0].Bindex == -1:
+        #nPanim  = len(Points_anim)
+        #nPtot   = nP + nPanim - 1
+        self.nPtot = self.nP
+        #Points  = np.concatenate( (Points, Points_anim),axis=0 )
+
+        for Pi in range(1,self.nPtot):
+            if self.Points[Pi,0].Bindex == 0:
                 self.Points[Pi,0].sP     = self.Points[Pi,0].sPlocal
                 self.Points[Pi,0].sP_r   = s_rot(self.Points[Pi,0].sP)
                 self.Points[Pi,0].rP     = self.Points[Pi,0].sP
-            
-            for Bi in range(self.nB): 
+
+            for Bi in range(1,self.nB):
                 if int(self.Points[Pi,0].Bindex) == int(Bi):
-                    length = len(self.Bodies[Bi,0].pts) #current length of pts
-                    self.Bodies[Bi,0].pts = np.concatenate((self.Bodies[Bi,0].pts,np.array([[Pi]])), axis=0 )
-                    
-        #%%% Unit vectors 
+                    length           = len(self.Bodies[Bi,0].pts) #current length of pts
+                    self.Bodies[Bi,0].pts = np.concatenate( (self.Bodies[Bi,0].pts,np.array([ [Pi] ]) ), axis=0 )
+
+    #%%% Unit vectors
         self.nU = len(self.Uvectors)
-        
-        for Vi in range(self.nU): 
+
+        for Vi in range(1,self.nU):
             if self.Uvectors.size == 0:
                 pass
-            elif self.Uvectors[Vi,0].Bindex == -1:
+            elif self.Uvectors[Vi,0].Bindex == 0:
                 self.Uvectors[Vi,0].u   = self.Uvectors[Vi,0].ulocal
                 self.Uvectors[Vi,0].u_r = s_rot(self.Uvectors[Vi,0].u)
-                
-        #%%% Force elements 
+
+    #%%% State arrays
+    # Bodies, points and unit vectors are stored as contiguous arrays (row 0 is ground,
+    # which stays at the origin with A = I). The structure attributes are bound as views
+    # into these arrays, so the joint and force functions still see the current state
+    # while u_to_Bodies, Update_Position, Update_Velocity and Bodies_to_u_d work on
+    # whole arrays instead of looping over the structures.
+        self.q_array   = np.zeros((self.nB,3))        # x, y, phi
+        self.qd_array  = np.zeros((self.nB,3))        # x_dot, y_dot, phi_dot
+        self.qdd_array = np.zeros((self.nB,3))        # x_dot2, y_dot2, phi_dot2
+        self.A_array   = np.zeros((self.nB,2,2))      # rotational transformation matrices
+        self.A_array[:] = np.eye(2)
+
+        for Bi in range(1, self.nB):
+            self.q_array[Bi,0:2]  = np.ravel(self.Bodies[Bi,0].r)
+            self.q_array[Bi,2]    = self.Bodies[Bi,0].p
+            self.qd_array[Bi,0:2] = np.ravel(self.Bodies[Bi,0].r_d)
+            self.qd_array[Bi,2]   = self.Bodies[Bi,0].p_d
+
+        self.PBindex       = np.zeros(self.nP, dtype=int)
+        self.sPlocal_array = np.zeros((self.nP,2))
+        self.sP_array      = np.zeros((self.nP,2))
+        self.sP_r_array    = np.zeros((self.nP,2))
+        self.rP_array      = np.zeros((self.nP,2))
+        self.sP_d_array    = np.zeros((self.nP,2))
+        self.rP_d_array    = np.zeros((self.nP,2))
+
+        for Pi in range(1, self.nP):
+            self.PBindex[Pi]       = self.Points[Pi,0].Bindex
+            self.sPlocal_array[Pi] = np.ravel(self.Points[Pi,0].sPlocal)
+
+        self.UBindex      = np.zeros(self.nU, dtype=int)
+        self.ulocal_array = np.zeros((self.nU,2))
+        self.uvec_array   = np.zeros((self.nU,2))
+        self.uvec_r_array = np.zeros((self.nU,2))
+        self.uvec_d_array = np.zeros((self.nU,2))
+
+        for Vi in range(1, self.nU):
+            self.UBindex[Vi]      = self.Uvectors[Vi,0].Bindex
+            self.ulocal_array[Vi] = np.ravel(self.Uvectors[Vi,0].ulocal)
+
+        for Bi in range(1, self.nB):
+            self.Bodies[Bi,0].r    = self.q_array[Bi,0:2].reshape(2,1)
+            self.Bodies[Bi,0].p    = self.q_array[Bi,2:3].reshape(())
+            self.Bodies[Bi,0].r_d  = self.qd_array[Bi,0:2].reshape(2,1)
+            self.Bodies[Bi,0].p_d  = self.qd_array[Bi,2:3].reshape(())
+            self.Bodies[Bi,0].r_dd = self.qdd_array[Bi,0:2].reshape(2,1)
+            self.Bodies[Bi,0].p_dd = self.qdd_array[Bi,2:3].reshape(())
+            self.Bodies[Bi,0].A    = self.A_array[Bi]
+
+        for Pi in range(1, self.nP):
+            self.Points[Pi,0].sP   = self.sP_array[Pi].reshape(2,1)
+            self.Points[Pi,0].sP_r = self.sP_r_array[Pi].reshape(2,1)
+            self.Points[Pi,0].rP   = self.rP_array[Pi].reshape(2,1)
+            self.Points[Pi,0].sP_d = self.sP_d_array[Pi].reshape(2,1)
+            self.Points[Pi,0].rP_d = self.rP_d_array[Pi].reshape(2,1)
+
+        for Vi in range(1, self.nU):
+            self.Uvectors[Vi,0].u   = self.uvec_array[Vi].reshape(2,1)
+            self.Uvectors[Vi,0].u_r = self.uvec_r_array[Vi].reshape(2,1)
+            self.Uvectors[Vi,0].u_d = self.uvec_d_array[Vi].reshape(2,1)
+
+        self.Update_Position()
+        self.Update_Velocity()
+
+    #%%% Force elements
         self.nF = len(self.Forces)
-        
-        for Fi in range(self.nF): 
-            # define switch 
-            if self.Forces[Fi,0].type == "weight":
+
+        for Fi in range(1,self.nF):
+            if self.Forces[Fi,0].type == 'weight':
                 ug = self.Forces[Fi,0].gravity*self.Forces[Fi,0].wgt
                 for Bi in range(1,self.nB):
                     self.Bodies[Bi,0].wgt = self.Bodies[Bi,0].m*ug
-            elif self.Forces[Fi,0].type == "ptp":
-                Pi = self.Forces[Fi,0].iPindex  
-                Pj = self.Forces[Fi,0].jPindex 
+            elif self.Forces[Fi,0].type == 'ptp':
+                Pi = self.Forces[Fi,0].iPindex
+                Pj = self.Forces[Fi,0].jPindex
                 self.Forces[Fi,0].iBindex = self.Points[Pi,0].Bindex
                 self.Forces[Fi,0].jBindex = self.Points[Pj,0].Bindex
 
+    #%%% Force groups
+    # Force elements are compiled into one group per type so that Force_array()
+    # does not dispatch on the type of every element on every call.
+        self.fn_array       = np.zeros((self.nB,3))   # f_x, f_y, n of each body (row 0 is ground)
+        self.fn_const_array = np.zeros((self.nB,3))   # load independent part: weight, f, trq
+        self.wgt_array      = np.zeros((self.nB,2))   # total weight of each body
+        self.F_ptp   = []
+        self.F_rot   = []
+        self.F_loc_B = []
+        self.F_con   = []
+        F_loc   = []
+
+        for Fi in range(1,self.nF):
+            ftype = self.Forces[Fi,0].type
+            Bi    = self.Forces[Fi,0].iBindex
+            if ftype == 'weight':
+                for Bj in range(1,self.nB):
+                    self.wgt_array[Bj] += np.ravel(self.Bodies[Bj,0].wgt)
+            elif ftype == 'ptp':
+                self.F_ptp.append(Fi)
+            elif ftype == 'rot_sda':
+                self.F_rot.append(Fi)
+            elif ftype == 'flocal':
+                self.F_loc_B.append(Bi)
+                F_loc.append(np.ravel(self.Forces[Fi,0].flocal))
+            elif ftype == 'f':
+                self.fn_const_array[Bi,0:2] += np.ravel(self.Forces[Fi,0].f)
+            elif ftype == 'trq':
+                self.fn_const_array[Bi,2] += self.Forces[Fi,0].t
+            elif ftype == 'contact':
+                self.F_con.append(Fi)
+            else:
+                print('Force type ' + str(ftype) + ' is not supported and is ignored')
+        self.fn_const_array[:,0:2] += self.wgt_array
+        self.fn_const_array[0,:] = 0
 
-        #%%% self.Joints 
+        self.F_rot_i   = np.array([self.Forces[Fi,0].iBindex for Fi in self.F_rot], dtype=int)
+        self.F_rot_j   = np.array([self.Forces[Fi,0].jBindex for Fi in self.F_rot], dtype=int)
+        self.F_rot_par = np.array([[self.Forces[Fi,0].k, self.Forces[Fi,0].theta0, self.Forces[Fi,0].dc, self.Forces[Fi,0].T_a]
+                              for Fi in self.F_rot], dtype=float).reshape(-1,4)
+        self.F_ptp_iP  = np.array([self.Forces[Fi,0].iPindex for Fi in self.F_ptp], dtype=int)
+        self.F_ptp_jP  = np.array([self.Forces[Fi,0].jPindex for Fi in self.F_ptp], dtype=int)
+        self.F_ptp_iB  = np.array([self.Forces[Fi,0].iBindex for Fi in self.F_ptp], dtype=int)
+        self.F_ptp_jB  = np.array([self.Forces[Fi,0].jBindex for Fi in self.F_ptp], dtype=int)
+        self.F_ptp_par = np.array([[self.Forces[Fi,0].k, self.Forces[Fi,0].L0, self.Forces[Fi,0].dc, self.Forces[Fi,0].f_a]
+                              for Fi in self.F_ptp], dtype=float).reshape(-1,4)
+        self.F_loc_B     = np.array(self.F_loc_B, dtype=int)
+        self.F_loc_array = np.array(F_loc, dtype=float).reshape(-1,2)
+        self.F_con_P   = np.array([self.Forces[Fi,0].iPindex for Fi in self.F_con], dtype=int)
+        self.F_con_B   = np.array([self.Points[self.Forces[Fi,0].iPindex,0].Bindex for Fi in self.F_con], dtype=int)
+        self.F_con_par = np.array([[self.Forces[Fi,0].k, self.Forces[Fi,0].e, self.Forces[Fi,0].model]
+                              for Fi in self.F_con], dtype=float).reshape(-1,3)
+        self.flags  = np.zeros( (len(self.F_con),1) )     # contact is closed
+        self.pen_d0 = np.zeros( (len(self.F_con),1) )     # penetration velocity at impact
+
+    #%%% Joints
         self.nJ = len(self.Joints)
-        cfriction = 0
-        
-        # Assign number of constraints and number of bodies to each joint type  
-        for Ji in range(self.nJ): 
-            # define switch 
+        self.cfriction = 0
 
-            if self.Joints[Ji,0].type == "rev":
-                self.Joints[Ji,0].mrows = 2 
+        # Assign number of constraints and number of bodies to each joint type
+        for Ji in range(1,self.nJ):
+            # the joint types are also written with hyphens (rel-rot etc.)
+            self.Joints[Ji,0].type = self.Joints[Ji,0].type.replace('-', '_')
+            if self.Joints[Ji,0].type == 'rev':
+                self.Joints[Ji,0].mrows = 2
                 self.Joints[Ji,0].nbody = 2
-                Pi = self.Joints[Ji,0].iPindex 
+                Pi = self.Joints[Ji,0].iPindex
                 Pj = self.Joints[Ji,0].jPindex
                 Bi = self.Points[Pi,0].Bindex
                 self.Joints[Ji,0].iBindex = Bi
                 Bj = self.Points[Pj,0].Bindex
                 self.Joints[Ji,0].jBindex = Bj
-                
+
                 if self.Joints[Ji,0].fix == 1:
                     self.Joints[Ji,0].mrows = 3
-                    if Bi == -1:
+                    if Bi == 0:
                         self.Joints[Ji,0].p0 = - self.Bodies[Bj,0].p
-                    elif Bj == -1:
+                    elif Bj == 0:
                         self.Joints[Ji,0].p0 = self.Bodies[Bi,0].p
                     else:
                         self.Joints[Ji,0].p0 = self.Bodies[Bi,0].p - self.Bodies[Bj,0].p
-                        
-            elif self.Joints[Ji,0].type == "tran":
+            elif self.Joints[Ji,0].type == 'tran':
                 self.Joints[Ji,0].mrows = 2;
                 self.Joints[Ji,0].nbody = 2
                 Pi = self.Joints[Ji,0].iPindex
@@ -133,208 +640,1348 @@ class DapSolver():
                 self.Joints[Ji,0].jBindex = Bj
                 if self.Joints[Ji,0].fix == 1:
                     self.Joints[Ji,0].mrows = 3
-                    if Bi == -1:
-                        self.Joints[Ji,0].p0 = np.linalg.norm(self.Points[Pi,0].rP - self.Bodies[Bj,0].r - 
-                                                        self.Bodies[Bj,0].A@self.Points[Pj,0].sPlocal)
-                    elif Bj == -1:
-                        self.Joints[Ji,0].p0 = np.linalg.norm(self.Bodies[Bi,0].r + self.Bodies[Bi,0].A@self.Points[Pi,0].sPlocal - 
-                                                        self.Points[Pj,0].rP)
+                    if Bi == 0:
+                        self.Joints[Ji,0].p0 = np.linalg.norm(self.Points[Pi,0].rP - self.Bodies[Bj,0].r -
+                                                         self.Bodies[Bj,0].A@self.Points[Pj,0].sPlocal)
+                    elif Bj == 0:
+                        self.Joints[Ji,0].p0 = np.linalg.norm(self.Bodies[Bi,0].r + self.Bodies[Bi,0].A@self.Points[Pi,0].sPlocal -
+                                                         self.Points[Pj,0].rP)
                     else:
-                        self.Joints[Ji,0].p0 = np.linalg.norm(self.Bodies[Bi,0].r + self.Bodies[Bi,0].A@self.Points[Pi,0].sPlocal - 
-                                                        self.Bodies[Bj,0].r - self.Bodies[Bj,0].A@self.Points[Pj,0].sPlocal)
-            elif self.Joints[Ji,0].type == "rev-rev":
-                self.Joints[Ji,0].mrows = 1 
+                        self.Joints[Ji,0].p0 = np.linalg.norm(self.Bodies[Bi,0].r + self.Bodies[Bi,0].A@self.Points[Pi,0].sPlocal -
+                                                         self.Bodies[Bj,0].r - self.Bodies[Bj,0].A@self.Points[Pj,0].sPlocal)
+            elif self.Joints[Ji,0].type == 'rev_rev':
+                self.Joints[Ji,0].mrows = 1
                 self.Joints[Ji,0].nbody = 2
                 Pi = self.Joints[Ji,0].iPindex; Pj = self.Joints[Ji,0].jPindex
                 self.Joints[Ji,0].iBindex = self.Points[Pi,0].Bindex
                 self.Joints[Ji,0].jBindex = self.Points[Pj,0].Bindex
-
-            elif self.Joints[Ji,0].type == "rev-tran":
+            elif self.Joints[Ji,0].type == 'rev_tran':
                 self.Joints[Ji,0].mrows = 1
                 self.Joints[Ji,0].nbody = 2
                 Pi = self.Joints[Ji,0].iPindex
                 Pj = self.Joints[Ji,0].jPindex
                 self.Joints[Ji,0].iBindex = self.Points[Pi,0].Bindex
                 self.Joints[Ji,0].jBindex = self.Points[Pj,0].Bindex
-
-            elif self.Joints[Ji,0].type == "rel-rot":
+            elif self.Joints[Ji,0].type == 'rel_rot':
                 self.Joints[Ji,0].mrows = 1
                 self.Joints[Ji,0].nbody = 1
-
-            elif self.Joints[Ji,0].type == "rel-tran":
+            elif self.Joints[Ji,0].type == 'rel_tran':
                 self.Joints[Ji,0].mrows = 1
-                self.Joints[Ji,0].nbody = 1  
-
-            elif self.Joints[Ji,0].type == "disc":
-                self.Joints[Ji,0].mrows = 2 
                 self.Joints[Ji,0].nbody = 1
-
-            elif self.Joints[Ji,0].type == "rigid":
-                self.Joints[Ji,0].mrows = 3; 
+                Pi = self.Joints[Ji,0].iPindex
+                Pj = self.Joints[Ji,0].jPindex
+                self.Joints[Ji,0].iBindex = self.Points[Pi,0].Bindex
+                self.Joints[Ji,0].jBindex = self.Points[Pj,0].Bindex
+            elif self.Joints[Ji,0].type == 'disc':
+                self.Joints[Ji,0].mrows = 2
+                self.Joints[Ji,0].nbody = 1
+            elif self.Joints[Ji,0].type == 'rigid':
+                self.Joints[Ji,0].mrows = 3;
                 self.Joints[Ji,0].nbody = 2;
-                Bi = self.Joints[Ji,0].iBindex   
+                Bi = self.Joints[Ji,0].iBindex
                 Bj = self.Joints[Ji,0].jBindex
-                if Bi == -1:
-                    self.Joints[Ji,0].d0 = -self.Bodies[Bj,0].A.T @ self.Bodies[Bj,0].r
+                if Bi == 0:
+                    self.Joints[Ji,0].d0 = -self.Bodies[Bj,0].A.T@self.Bodies[Bj,0].r
                     self.Joints[Ji,0].p0 = -self.Bodies[Bj,0].p
-                elif Bj == -1:
-                    self.Joints[Ji,0].d0 = self.Bodies[Bi,0].r
+                elif Bj == 0:
+                    self.Joints[Ji,0].d0 = self.Bodies[Bi,0].r.copy()
                     self.Joints[Ji,0].p0 = self.Bodies[Bi,0].p
                 else:
-                    self.Joints[Ji,0].d0 = self.Bodies[Bj,0].A.T @ (self.Bodies[Bi,0].r - self.Bodies[Bj,0].r)
+                    self.Joints[Ji,0].d0 = self.Bodies[Bj,0].A.T@(self.Bodies[Bi,0].r - self.Bodies[Bj,0].r)
                     self.Joints[Ji,0].p0 = self.Bodies[Bi,0].p - self.Bodies[Bj,0].p
-                        
-
-        #%%% Functions 
-        #NOTE: TODO: Need to still properly port the functions
-        #TODO TODO
-        ##Requires defining FunctionData
-        #self.nFc = len(self.Functs)
-        #if self.Functs.size == 0:
-            #pass
-        ##else:
-            ##for Ci in range(1,self.nFc):
-                ##functionData(Ci)
-            
-        # Compute number of constraints and determine row/column pointer
+            else:
+                print("Undefined joint type")
+
+
+
+    #%%% Functions
+        self.nFc = len(self.Functs)
+        if self.Functs.size == 0:
+            pass
+        else:
+            for Ci in range(1,self.nFc):
+                self.functionData(Ci)
+
+    #%%% Constraints & row/col. pointers
+    # Compute number of constraints and determine row/column pointer
         self.nConst = 0
 
-        #for Ji in range(1,self.nJ): 
-            #self.Joints[Ji,0].rows = self.nConst
-            #self.Joints[Ji,0].rowe = self.nConst + self.Joints[Ji,0].mrows
-            #self.nConst = self.Joints[Ji,0].rowe
-            #Bi = self.Joints[Ji,0].iBindex
-            #if Bi != -1:
-                #self.Joints[Ji,0].colis = 3*(Bi)
-                #self.Joints[Ji,0].colie = 3*Bi + 1
-
-            #Bj = self.Joints[Ji,0].jBindex
-            #if Bj != -1:
-                #self.Joints[Ji,0].coljs = 3*(Bj)
-                #self.Joints[Ji,0].colje = 3*Bj + 1
-            
-
-    #def u_to_Bodies(self, u):
-        #for Bi in range(1,self.nB):
-            #ir  = self.Bodies[Bi,0].irc
-            #ird = self.Bodies[Bi,0].irv
-            
-            #self.Bodies[Bi,0].r  = np.atleast_2d( u[ir:ir +1 +1].flatten() ).T
-            #self.Bodies[Bi,0].p  = u[ir+2]
-            #self.Bodies[Bi,0].r_d = np.atleast_2d( u[ird:ird +1 +1].flatten() ).T    
-            #self.Bodies[Bi,0].p_d = u[ird+2] 
-        #return None
-
-    #def Bodies_to_u(self, u):
-        #u = np.zeros((self.nB6,1))
-        #for Bi in range(1,self.nB):
-            #ir  = self.Bodies[Bi,0].irc
-            #ird = self.Bodies[Bi,0].irv
-            #u[ir:ir+2+1]   = np.atleast_2d(np.concatenate((self.Bodies[Bi,0].r, self.Bodies[Bi,0].p),axis=None)).T
-            #u[ird:ird+2+1] = np.atleast_2d(np.concatenate((self.Bodies[Bi,0].r_d, self.Bodies[Bi,0].p_d),axis=None)).T
-        #return u
-        
-    ## Transfer self.Bodies to u
-    #def Bodies_to_u_d(self):
-        #u_d = np.zeros((self.nB6, 1))
-        #for Bi in range(1, self.nB):
-            #ir = self.Bodies[Bi,0].irc
-            #ird = self.Bodies[Bi,0].irv
-            #u_d[ir:ir + 2+1] = np.atleast_2d(np.concatenate((self.Bodies[Bi,0].r_d, self.Bodies[Bi,0].p_d), axis=None)).T
-            #u_d[ird:ird + 2+1] = np.atleast_2d(np.concatenate((self.Bodies[Bi,0].r_dd, self.Bodies[Bi,0].p_dd), axis=None)).T
-        #return u_d 
-
-
-    #def Update_Position(self):
-        ## Compute A's
-        #for Bi in range(1, self.nB):
-            #B_A_ = np.concatenate( (Matrix_A(self.Bodies[Bi,0].p)), axis=None)
-            #B_A_1 = np.array([ [ B_A_[0],B_A_[1] ] ])
-            #B_A_2 = np.array([ [ B_A_[2],B_A_[3] ] ])
-            #self.Bodies[Bi,0].A = np.concatenate( (B_A_1, B_A_2),axis=0)
-        
-        ## Compute sP = A * sP_prime; rP = r + sP    
-        #for Pi in range(1, self.nP):
-            #Bi = self.Points[Pi,0].Bindex
-            #if Bi != 0:
-                #self.Points[Pi,0].sP = np.matmul(self.Bodies[Bi,0].A, self.Points[Pi,0].sPlocal)
-                #self.Points[Pi,0].sP_r = s_rot(self.Points[Pi,0].sP)
-                #self.Points[Pi,0].rP = self.Bodies[Bi,0].r + self.Points[Pi,0].sP
-                
-        #for Vi in range(1, self.nU):
-            #Bi = self.Uvectors[Vi,0].Bindex
-            #if Bi != 0:
-                #self.Uvectors[Vi,0].u = np.matmul(self.Bodies[Bi,0].A, self.Uvectors[Vi,0].ulocal)
-                #self.Uvectors[Vi,0].u_r = s_rot(self.Uvectors[Vi,0].u)
-                        
-    ##%%% Update_Velocity
-    #def Update_Velocity(self):
-        #for Pi in range(1, self.nP):
-            #Bi = self.Points[Pi,0].Bindex
-            #if Bi != 0:
-                #self.Points[Pi,0].sP_d = self.Points[Pi,0].sP_r * self.Bodies[Bi,0].p_d
-                #self.Points[Pi,0].rP_d = self.Bodies[Bi,0].r_d + self.Points[Pi,0].sP_d
-        
-        ## Compute u_dot vectors
-        #for Vi in range(1, self.nU):
-            #Bi = self.Uvectors[Vi,0].Bindex
-            #if Bi != 0:
-                #self.Uvectors[Vi,0].u_d = self.Uvectors[Vi,0].u_r * self.Bodies[Bi,0].p_d
+        for Ji in range(1,self.nJ):
+            self.Joints[Ji,0].rows = self.nConst + 1
+            self.Joints[Ji,0].rowe = self.nConst + self.Joints[Ji,0].mrows
+            self.nConst = self.Joints[Ji,0].rowe
+            Bi = self.Joints[Ji,0].iBindex
+            if Bi != 0:
+                self.Joints[Ji,0].colis = 3*(Bi - 1) + 1
+                self.Joints[Ji,0].colie = 3*Bi
 
+            Bj = self.Joints[Ji,0].jBindex
+            if Bj != 0:
+                self.Joints[Ji,0].coljs = 3*(Bj - 1) + 1
+                self.Joints[Ji,0].colje = 3*Bj
 
+    #%%% Joint groups
+    # rev and tran joints (without the fix option) are evaluated for all joints of the type
+    # at once by the kernels module; the other joints are evaluated joint by joint.
+    # D_offset holds the start of the Di and Dj entries of each joint in D_data.
+        self.D_offset = np.zeros((self.nJ,2), dtype=int)
+        k = 0
+        for Ji in range(1,self.nJ):
+            n = 3*self.Joints[Ji,0].mrows
+            self.D_offset[Ji,0] = k
+            if self.Joints[Ji,0].iBindex != 0:
+                k = k + n
+            self.D_offset[Ji,1] = k
+            if self.Joints[Ji,0].jBindex != 0:
+                k = k + n
 
-import sys
-folder = sys.argv[1]
-solver = DapSolver(folder)
-solver.initalize()
+        self.J_rev_group   = self.Joint_group([Ji for Ji in range(1,self.nJ) if self.Joints[Ji,0].type == 'rev'  and self.Joints[Ji,0].fix != 1])
+        self.J_tran_group  = self.Joint_group([Ji for Ji in range(1,self.nJ) if self.Joints[Ji,0].type == 'tran' and self.Joints[Ji,0].fix != 1])
+        self.J_other = [Ji for Ji in range(1,self.nJ) if Ji not in self.J_rev_group['J'] and Ji not in self.J_tran_group['J']]
+        # the second row of a tran joint keeps the initial relative angle of its bodies
+        self.J_tran_group['p0'] = self.q_array[self.J_tran_group['iB'],2] - self.q_array[self.J_tran_group['jB'],2]
 
-for i in range(solver.nB):
-    print("Bodies",i)
-    print(solver.Bodies[i,0])
-    
-for i in range(Points.shape[0]):
-    print("Points",i)
-    print(solver.Points[i,0])
+    #%%% Sparsity pattern
+        self.D_sparse = None
+        if self.linear_solver == 'sparse' and self.nConst > 0:
+            self.Sparsity_pattern()
 
-for i in range(Forces.shape[0]):
-    print("Forces",i)
-    print(solver.Forces[i,0])
-    
-    
-for i in range(Functs.shape[0]):
-    print("Functs",i)
-    print(solver.Functs[i,0])
 
-for i in range(Joints.shape[0]):
-    print("Joints",i)
-    print(solver.Joints[i,0])
-    
-    
-for i in range(Uvectors.shape[0]):
-    print("Uvectors",i)
-    print(solver.Uvectors[i,0])
-
-    #print(solver.Bodies[i,0]     )
-    #print(solver.Bodies[i,0].J     )
-    #print(solver.Bodies[i,0].r     )
-    #print(solver.Bodies[i,0].p     )
-    #print(solver.Bodies[i,0].r_d   )
-    #print(solver.Bodies[i,0].p_d   )
-    #print(solver.Bodies[i,0].A     )
-    #print(solver.Bodies[i,0].r_dd  )
-    #print(solver.Bodies[i,0].p_dd  )
-    #print(solver.Bodies[i,0].irc   )
-    #print(solver.Bodies[i,0].irv   )
-    #print(solver.Bodies[i,0].ira   )
-    ##print(solver.Bodies[,0i])
-    #print(solver.Bodies[i,0].m_inv )
-    #print(solver.Bodies[i,0].J_inv )
-    #print(solver.Bodies[i])
-    #print(solver.Bodies[i])
-    ##print(solver.Bodies[i])
-    #print(solver.Bodies[i])
-#print(solver.Forces  )
-#print(solver.Functs  )
-#print(solver.Joints  )
-#print(solver.Points  )
-#print(solver.Uvectors)
+
+    ################################################################
+    #
+    # Jacobian
+    #
+    ################################################################
+
+    #%%% Sparsity_pattern
+    def Sparsity_pattern(self):
+        # A joint only fills the 3-column blocks of its (at most) two moving bodies, so the pattern
+        # of the Jacobian and of the KKT matrix [M -D'; D 0] is fixed. The entries are stored joint
+        # by joint (body i block, then body j block, row-major), which is the order in which
+        # Jacobian_sparse fills D_data; D_perm and KKT_perm map that order onto the CSR/CSC storage.
+        n3 = 3*(self.nB-1)
+        D_row_index = []
+        D_col_index = []
+        for Ji in range(1,self.nJ):
+            rows = np.arange(self.Joints[Ji,0].rows - 1, self.Joints[Ji,0].rowe)
+            if self.Joints[Ji,0].iBindex != 0:
+                cols = np.arange(self.Joints[Ji,0].colis - 1, self.Joints[Ji,0].colie)
+                D_row_index.append(np.repeat(rows, 3))
+                D_col_index.append(np.tile(cols, len(rows)))
+            if self.Joints[Ji,0].jBindex != 0:
+                cols = np.arange(self.Joints[Ji,0].coljs - 1, self.Joints[Ji,0].colje)
+                D_row_index.append(np.repeat(rows, 3))
+                D_col_index.append(np.tile(cols, len(rows)))
+        D_row_index = np.concatenate(D_row_index)
+        D_col_index = np.concatenate(D_col_index)
+        nnz = len(D_row_index)
+
+        # entries are tagged with their position (+1, so that none of them is zero)
+        self.D_data   = np.zeros(nnz)
+        self.D_sparse = sparse.csr_matrix( (np.arange(1, nnz+1, dtype=float), (D_row_index, D_col_index)),
+                                      shape=(self.nConst, n3) )
+        self.D_perm   = self.D_sparse.data.astype(int) - 1
+
+        KKT_rows = np.concatenate( (np.arange(n3), n3 + D_row_index, D_col_index) )
+        KKT_cols = np.concatenate( (np.arange(n3), D_col_index, n3 + D_row_index) )
+        self.KKT_sparse = sparse.csc_matrix( (np.arange(1, n3 + 2*nnz + 1, dtype=float), (KKT_rows, KKT_cols)),
+                                        shape=(n3 + self.nConst, n3 + self.nConst) )
+        self.KKT_perm = self.KKT_sparse.data.astype(int) - 1
+        self.KKT_data = np.zeros(n3 + 2*nnz)
+        self.KKT_data[0:n3] = self.M_array[1:n3+1,0]
+
+    #%%% Joint_group
+    def Joint_group(self, J_list):
+        # Index arrays of a group of joints with 2 rows each: the kernels fill the (n,2,3)
+        # blocks Di, Dj and the (n,2) gamma, 'sel' picks the entries of the moving bodies
+        # from [Di, Dj] and 'data'/'dense' are their positions in D_data and in D
+        n = len(J_list)
+        group = {'J': J_list}
+        for key, attr in (('iP','iPindex'), ('jP','jPindex'), ('iB','iBindex'), ('jB','jBindex'), ('iU','iUindex'), ('jU','jUindex')):
+            group[key] = np.array([getattr(self.Joints[Ji,0], attr) for Ji in J_list], dtype=int)
+        group['Di']    = np.zeros((n,2,3))
+        group['Dj']    = np.zeros((n,2,3))
+        group['gamma'] = np.zeros((n,2))
+
+        sel   = []
+        data  = []
+        dense = []
+        rows  = []
+        block = np.arange(6).reshape(2,3)
+        for m, Ji in enumerate(J_list):
+            rs = self.Joints[Ji,0].rows - 1
+            rows.append(rs + np.arange(2))
+            if self.Joints[Ji,0].iBindex != 0:
+                cs = self.Joints[Ji,0].colis - 1
+                sel.append(6*m + block.ravel())
+                data.append(self.D_offset[Ji,0] + block.ravel())
+                dense.append(((rs + np.arange(2))[:,np.newaxis]*self.nB3 + cs + np.arange(3)).ravel())
+            if self.Joints[Ji,0].jBindex != 0:
+                cs = self.Joints[Ji,0].coljs - 1
+                sel.append(6*(n + m) + block.ravel())
+                data.append(self.D_offset[Ji,1] + block.ravel())
+                dense.append(((rs + np.arange(2))[:,np.newaxis]*self.nB3 + cs + np.arange(3)).ravel())
+        group['sel']   = np.concatenate(sel).astype(int) if sel else np.zeros(0, dtype=int)
+        group['data']  = np.concatenate(data).astype(int) if data else np.zeros(0, dtype=int)
+        group['dense'] = np.concatenate(dense).astype(int) if dense else np.zeros(0, dtype=int)
+        group['rows']  = np.concatenate(rows).astype(int) if rows else np.zeros(0, dtype=int)
+        return group
+
+    #%%% Joint_group_jacobian
+    def Joint_group_jacobian(self):
+        # Fills the blocks of the rev and tran groups, returns their entries in the 'sel' order
+        kernels.rev_jacobian(self.J_rev_group['iP'], self.J_rev_group['jP'], self.sP_r_array, self.J_rev_group['Di'], self.J_rev_group['Dj'])
+        kernels.tran_jacobian(self.J_tran_group['iP'], self.J_tran_group['jP'], self.J_tran_group['jU'], self.sP_array, self.rP_array,
+                              self.uvec_array, self.uvec_r_array, self.J_tran_group['Di'], self.J_tran_group['Dj'])
+        return [(group, np.concatenate((group['Di'].ravel(), group['Dj'].ravel()))[group['sel']])
+                for group in (self.J_rev_group, self.J_tran_group)]
+
+    def Joint_Jacobian(self, Ji):
+        Dj = None
+        if self.Joints[Ji,0].type == 'rev':
+            Di, Dj = self.J_rev(Ji)
+        elif self.Joints[Ji,0].type == 'tran':
+            Di, Dj = self.J_tran(Ji)
+        elif self.Joints[Ji,0].type == 'disc':
+            Di = self.J_disc(Ji)
+        elif self.Joints[Ji,0].type == 'rev_rev':
+            Di, Dj = self.J_rev_rev(Ji)
+        elif self.Joints[Ji,0].type == 'rev_tran':
+            Di, Dj = self.J_rev_tran(Ji)
+        elif self.Joints[Ji,0].type == 'rel_rot':
+            Di, Dj = self.J_rel_rot(Ji)
+        elif self.Joints[Ji,0].type == 'rel_tran':
+            Di, Dj = self.J_rel_tran(Ji)
+        elif self.Joints[Ji,0].type == 'rigid':
+            Di, Dj = self.J_rigid(Ji)
+        return Di, Dj
+
+    def Jacobian(self, t):
+
+        self.D = np.zeros((self.nConst,self.nB3))
+
+        for group, values in self.Joint_group_jacobian():
+            self.D.flat[group['dense']] = values
+
+        for Ji in self.J_other:
+            Di, Dj = self.Joint_Jacobian(Ji)
+
+            rs  = self.Joints[Ji,0].rows -1
+            re  = self.Joints[Ji,0].rowe
+
+            if self.Joints[Ji,0].iBindex != 0:
+                cis = self.Joints[Ji,0].colis -1
+                cie = self.Joints[Ji,0].colie
+                self.D[rs:re,cis:cie] = Di
+
+            if self.Joints[Ji,0].jBindex != 0:
+                cjs = self.Joints[Ji,0].coljs -1
+                cje = self.Joints[Ji,0].colje
+                self.D[rs:re,cjs:cje] = Dj
+
+        return self.D
+
+    #%%% Jacobian_sparse
+    def Jacobian_sparse(self, t):
+        # Fills the fixed sparsity pattern computed in initialize() (columns of moving bodies only)
+
+        for group, values in self.Joint_group_jacobian():
+            self.D_data[group['data']] = values
+
+        for Ji in self.J_other:
+            Di, Dj = self.Joint_Jacobian(Ji)
+
+            if self.Joints[Ji,0].iBindex != 0:
+                k = self.D_offset[Ji,0]
+                self.D_data[k:k+np.size(Di)] = np.ravel(Di)
+
+            if self.Joints[Ji,0].jBindex != 0:
+                k = self.D_offset[Ji,1]
+                self.D_data[k:k+np.size(Dj)] = np.ravel(Dj)
+
+        self.D_sparse.data[:] = self.D_data[self.D_perm]
+        return self.D_sparse
+
+    #%%% KKT_solve_dense
+    def KKT_solve_dense(self, D_, rhs):
+        DMD1 = np.concatenate( (np.diag(self.M_array_[:,0]), -D_.T),axis=1 )
+        DMD2 = np.concatenate( (D_, np.zeros((self.nConst,self.nConst)) ),axis=1 )
+        DMD  = np.concatenate( (DMD1, DMD2), axis=0 )
+        return np.linalg.solve(DMD, rhs)
+
+    #%%% Schur_solve
+    def Schur_solve(self, D_, h_a_, rhsA):
+        # M is diagonal: c_dd = M^-1 (h + D' Lambda) with (D M^-1 D') Lambda = rhsA - D M^-1 h
+        DMi  = D_ * self.M_inv_array_.T
+        DMD  = DMi @ D_.T
+        rhs  = rhsA - DMi @ h_a_
+        try:
+            self.Lambda = cho_solve(cho_factor(DMD), rhs)
+        except np.linalg.LinAlgError:
+            # redundant constraints make D M^-1 D' singular
+            self.Lambda = np.linalg.lstsq(DMD, rhs, rcond=None)[0]
+        return self.M_inv_array_ * (h_a_ + D_.T @ self.Lambda)
+
+    #%%% KKT_solve_sparse
+    def KKT_solve_sparse(self, rhs):
+        # Solves [M -D'; D 0] [c_dd; Lambda] = rhs with the D entries of the last Jacobian_sparse call
+
+        nnz = len(self.D_data)
+        n3  = len(self.KKT_data) - 2*nnz
+        self.KKT_data[n3:n3+nnz] = self.D_data
+        self.KKT_data[n3+nnz:]   = -self.D_data
+        self.KKT_sparse.data[:]  = self.KKT_data[self.KKT_perm]
+
+        sol = spsolve(self.KKT_sparse, rhs)
+        return np.atleast_2d(sol).T
+
+
+
+    ################################################################
+    #
+    # JOINTS
+    #
+    ################################################################
+
+    def A_disc(self, Ji):
+        f = np.array([[0],
+                  [0]])
+        return f
+
+    def C_disc(self, Ji):
+        Bi = self.Joints[Ji,0].iBindex
+        f = np.array([ [self.Bodies[Bi,0].r[2,0] - self.Joints[Ji,0].R],
+                        [self.Bodies[Bi,0].r[1,0] - self.Joints[Ji,0].x0 + self.Joints[Ji,0].R*(self.Bodies[Bi,0].p - self.Joints[Ji,0].p0)] ])
+        return f
+
+    def J_disc(self, Ji):
+        Di = np.array([ [0, 1, 0],
+                   [1, 0, self.Joints[Ji,0].R] ])
+        return Di
+
+    #%%%% rel-rot
+    def A_rel_rot(self, Ji,t):
+        fun, fun_d, fun_dd = self.functs(self.Joints[Ji,0].iFunct, t)
+        f = fun_dd
+        return f
+
+    def C_rel_rot(self, Ji):
+        fun, fun_d, fun_dd = self.functs(self.Joints[Ji,0].iFunct, self.t)
+        Bi = self.Joints[Ji,0].iBindex
+        Bj = self.Joints[Ji,0].jBindex
+
+        f = np.array([[self.q_array[Bi,2] - self.q_array[Bj,2] - fun]])
+
+        return f
+
+    def J_rel_rot(self, Ji):
+        Di = np.array([ [0, 0,  1] ])
+        Dj = np.array([ [0, 0, -1] ])
+
+        return Di, Dj
+
+    def V_rel_rot(self, Ji):
+        fun, fun_d, fun_dd = self.functs(self.Joints[Ji,0].iFunct, self.t)
+        f = np.array([[fun_d]])
+        return f
+
+    #%%%% rel-tran
+    def A_rel_tran(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+        Bi = self.Joints[Ji,0].iBindex
+        Bj = self.Joints[Ji,0].jBindex
+        d  = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        d_d  = self.Points[Pi,0].rP_d - self.Points[Pj,0].rP_d
+        fun, fun_d, fun_dd = self.functs(self.Joints[Ji,0].iFunct, self.t)
+
+        # the points of ground have sP_d = 0 and row 0 of qd_array is ground
+        f = fun*fun_dd + fun_d**2 - d_d.T@d_d \
+            + d.T@s_rot(self.Points[Pj,0].sP_d)*self.qd_array[Bj,2] - d.T@s_rot(self.Points[Pi,0].sP_d)*self.qd_array[Bi,2]
+
+        return f
+
+    def C_rel_tran(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+        d  = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+
+        fun, fun_d, fun_dd = self.functs(self.Joints[Ji,0].iFunct, self.t)
+
+        f = (d.T@d - fun**2)/2
+
+        return f
+
+    def J_rel_tran(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+        d  = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+
+        Di = np.concatenate( ( d.T,  d.T@self.Points[Pi,0].sP_r), axis=1 )
+        Dj = np.concatenate( (-d.T, -d.T@self.Points[Pj,0].sP_r), axis=1 )
+
+        return Di, Dj
+
+    def V_rel_tran(self, Ji):
+        fun, fun_d, fun_dd = self.functs(self.Joints[Ji,0].iFunct, self.t)
+        f = np.array([[fun*fun_d]])
+
+        return f
+
+    #%%%% rev
+    def A_rev(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+        Bi = self.Points[Pi,0].Bindex
+        Bj = self.Points[Pj,0].Bindex
+
+        if Bi == 0:
+            f = s_rot(self.Points[Pj,0].sP_d)*self.Bodies[Bj,0].p_d
+
+        elif Bj == 0:
+            f = -s_rot(self.Points[Pi,0].sP_d)* self.Bodies[Bi,0].p_d
+
+        else:
+            f = -s_rot(self.Points[Pi,0].sP_d) * self.Bodies[Bi,0].p_d + s_rot(self.Points[Pj,0].sP_d)* self.Bodies[Bj,0].p_d
+
+        if self.Joints[Ji,0].fix == 1:
+            f = np.array([ [f],
+                           [0] ])
+
+        return f
+
+    def C_rev(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+
+        f = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        if self.Joints[Ji,0].fix == 1:
+            Bi = self.Joints[Ji,0].iBindex
+            Bj = self.Joints[Ji,0].jBindex
+
+            if Bi == 0:
+                f = np.array([ [f], [(- self.Bodies[Bj,0]).p - self.Joints[Ji,0].p0] ])
+            elif Bj == 0:
+                f = np.array([ [f],[self.Bodies[Bi,0].p - self.Joints[Ji,0].p0] ])
+            else:
+                f = np.array([ [f],[self.Bodies[Bi,0].p - self.Bodies[Bj,0].p - self.Joints[Ji,0].p0] ])
+
+        return f
+
+    def J_rev(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+
+        Di = np.concatenate(( np.eye(2),  self.Points[Pi,0].sP_r),axis=1 )
+        Dj = np.concatenate( (-np.eye(2), -self.Points[Pj,0].sP_r), axis=1)
+
+        if self.Joints[Ji,0].fix == 1:
+            Di = np.array([ [Di], [0,0,1] ])
+            Dj = np.array([ [Dj], [0,0,-1] ])
+
+        return Di, Dj
+
+    #%%%% rev-rev
+    def A_rev_rev(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+        Bi = self.Joints[Ji,0].iBindex
+        Bj = self.Joints[Ji,0].jBindex
+        d  = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        d_d  = self.Points[Pi,0].rP_d - self.Points[Pj,0].rP_d
+
+        L = self.Joints[Ji,0].L
+        u = d/L
+        u_d = d_d/L
+
+        f = - u_d.T @ d_d
+
+        if (Bi == 0):
+            f = f + u.T@s_rot(self.Points[Pj,0].sP_d)*self.Bodies[Bj,0].p_d
+        elif (Bj == 0):
+            f = f - u.T@s_rot(self.Points[Pi,0].sP_d)*self.Bodies[Bi,0].p_d
+        else:
+            f = f - u.T@(s_rot(self.Points[Pi,0].sP_d*self.Bodies[Bi,0].p_d - self.Points[Pj,0].sP_d*self.Bodies[Bj,0].p_d))
+
+        return f
+
+    def C_rev_rev(self, Ji):
+        Pi = self.Joints(Ji).iPindex
+        Pj = self.Joints(Ji).jPindex
+        d = self.Points(Pi).rP - self.Points(Pj).rP
+        L = self.Joints(Ji).L
+        u = d/L
+        f = (u.T@d - L)/2
+        return f
+
+    def J_rev_rev(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+        d  = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        L = self.Joints[Ji,0].L
+        u = d/L
+
+        Di = np.array([[ u.T,  u.T*self.Points[Pi,0].sP_r]])
+        Dj = np.array([[-u.T, -u.T*self.Points[Pj,0].sP_r]])
+
+        return Di, Dj
+
+    #%%%% rev-tran
+    def A_rev_tran(self, Ji):
+        Pi = self.Joints[Ji,0].iPindex
+        Pj = self.Joints[Ji,0].jPindex
+        Bi = self.Joints[Ji,0].iBindex
+        Bj = self.Joints[Ji,0].jBindex;
+        ui  = self.Uvectors(self.Joints[Ji,0].iUindex).u
+        ui_d = self.Uvectors(self.Joints[Ji,0].iUindex).u_d
+        d  = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        d_d  = self.Points[Pi,0].rP_d - self.Points[Pj,0].rP_d
+
+        if Bi == 0:
+            f = ui.T*self.Points[Pj,0].sP_d*self.Bodies[Bj,0].p_d
+        elif Bj == 0:
+            f = ui_d.T@(d*self.Bodies[Bi,0].p_d + 2*s_rot(d_d)) - ui.T@self.Points[Pi,0].sP_d*self.Bodies[Bi,0].p_d
+        else:
+            f = ui_d.T@(d*self.Bodies[Bi,0].p_d + 2*s_rot(d_d)) - ui.T@(self.Points[Pi,0].sP_d*self.Bodies[Bi,0].p_d - self.Points[Pj,0].sP_d*self.Bodies[Bj,0].p_d)
+
+        return f
+
+    def C_rev_tran(self, Ji):
+        Pi   = self.Joints[Ji,0].iPindex
+        Pj   = self.Joints[Ji,0].jPindex
+        ui_r = self.Uvectors(self.Joints[Ji,0].iUindex).u_r
+        d    = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        f    = ui_r.T@d - self.Joints[Ji,0].L
+
+        return f
+
+    def J_rev_tran(self, Ji):
+        Pi   = self.Joints[Ji,0].iPindex
+        Pj   = self.Joints[Ji,0].jPindex
+        ui   = self.Uvectors(self.Joints[Ji,0].iUindex).u;
+        ui_r  = self.Uvectors(self.Joints[Ji,0].iUindex).u_r
+        d    = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        Di   = np.array([[ ui_r.T,  ui.T*(self.Points[Pi,0].sP - d)]])
+        Dj   = np.array([[-ui_r.T, -ui.T*self.Points[Pj,0].sP]])
+
+        return Di, Dj
+
+    #%%%% rigid
+    def A_rigid(self, Ji):
+        Bj = self.Joints[Ji,0].jBindex
+        f  = np.array([[0, 0, 0]]).T
+        if Bj != 0:
+            f = np.array([ [-self.Bodies[Bj,0].A@self.Joints[Ji,0].d0*self.Bodies[Bj,0].p_d**2, 0] ]).T
+
+        return f
+
+    def C_rigid(self, Ji):
+        Bi = self.Joints[Ji,0].iBindex
+        Bj = self.Joints[Ji,0].jBindex
+
+        if Bi == 0:
+            f = np.array([ [ -1*(self.Bodies[Bj,0].r + self.Bodies[Bj,0].A@self.Joints[Ji,0].d0),
+                                   -self.Bodies[Bj,0].p - self.Joints[Ji,0].p0] ]).T
+        elif Bj == 0:
+            f = np.array([ [self.Bodies[Bi,0].r - self.Joints[Ji,0].d0,
+                         self.Bodies[Bi,0].p - self.Joints[Ji,0].p0] ]).T
+        else:
+            f = np.array([ [self.Bodies[Bi,0].r - (self.Bodies[Bj,0].r + self.Bodies[Bj,0].A@self.Joints[Ji,0].d0),
+                           self.Bodies[Bi,0].p - self.Bodies[Bj,0].p - self.Joints[Ji,0].p0] ]).T
+
+        return f
+
+    def J_rigid(self, Ji):
+        Bj = self.Joints[Ji,0].jBindex
+        Di = np.eye[3]
+
+        if Bj != 0:
+            Dj = np.array([ [-np.eye[2], -s_rot(self.Bodies[Bj,0].A@self.Joints[Ji,0].d0)],
+                   [0,  0,   -1] ])
+
+        return Di, Dj
+
+    #%%%% tran
+    def A_tran(self, Ji):
+        Bi    = self.Joints[Ji,0].iBindex
+        Bj    = self.Joints[Ji,0].jBindex
+        Pi    = self.Joints[Ji,0].iPindex
+        Pj    = self.Joints[Ji,0].jPindex
+        ujd   = self.Uvectors[self.Joints[Ji,0].jUindex,0].u_d
+        ujd_r = s_rot(ujd)
+
+        if Bi == 0:
+            f2 = 0
+        elif Bj == 0:
+            f2 = 0
+        else:
+            f2 = ujd.T@(self.Bodies[Bi,0].r - self.Bodies[Bj,0].r)*self.Bodies[Bi,0].p_d - 2*ujd_r.T@(self.Bodies[Bi,0].r_d - self.Bodies[Bj,0].r_d)
+
+        f  = np.atleast_2d( np.concatenate( (f2, np.array([[0]]) ), axis=None) ).T
+
+        if self.Joints[Ji,0].fix == 1:
+            d    = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+            d_d  = self.Points[Pi,0].rP_d - self.Points[Pj,0].rP_d
+            L    = self.Joints[Ji,0].p0; u = d/L; u_d = d_d/L
+            f3   = (- u_d.T@d_d)
+
+            if Bi == 0:
+                f3 = (- u_d.T@d_d) + u.T@s_rot(self.Points[Pj,0].sP_d)@self.Bodies[Bj,0].p_d
+            elif Bj == 0:
+                f3 = (- u_d.T@d_d) - u.T@s_rot(self.Points[Pi,0].sP_d)@self.Bodies[Bi,0].p_d
+            else:
+                f3 = (- u_d.T@d_d) - u.T@(s_rot(self.Points[Pi,0].sP_d*self.Bodies[Bi,0].p_d -
+                                     self.Points[Pj,0].sP_d*self.Bodies[Bj,0].p_d))
+
+            f = np.array([[f], [f3]])
+
+        return f
+
+    def C_tran(self, Ji):
+        Pi   = self.Joints[Ji,0].iPindex
+        Pj   = self.Joints[Ji,0].jPindex
+        uj_r = self.Uvectors[self.Joints[Ji,0].jUindex, 0].u_r
+        ui   = self.Uvectors[self.Joints[Ji,0].iUindex,0].u
+        d    = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        f    = np.array([ [uj_r.T@d], [uj_r.T@ui] ]).T
+
+        if self.Joints[Ji,0].fix == 1:
+            f = np.array([ [f],
+                      [(ui.T@d - self.Joints[Ji,0].p0)/2] ])
+
+        return f
+
+    def J_tran(self, Ji):
+        Pi   = self.Joints[Ji,0].iPindex
+        Pj   = self.Joints[Ji,0].jPindex
+        uj   = self.Uvectors[self.Joints[Ji,0].jUindex,0].u
+        uj_r = self.Uvectors[self.Joints[Ji,0].jUindex,0].u_r
+        d    = self.Points[Pi,0].rP - self.Points[Pj,0].rP
+        Di1  = np.concatenate( (uj_r.T, uj.T@self.Points[Pi,0].sP), axis=1 )
+        Di2  = np.array([[0,0,1]])
+        Di   = np.concatenate((Di1, Di2), axis=0)
+        Dj1  = np.concatenate( (-uj_r.T, -uj.T@(self.Points[Pi,0].sP + d)), axis=1 )
+        Dj2  = np.array([[0,0,-1]])
+        Dj   = np.concatenate((Dj1, Dj2), axis=0)
+
+        return Di, Dj
+
+
+
+    ################################################################
+    #
+    # RHS
+    #
+    ################################################################
+
+    def RHSAcc(self, t):
+
+        self.t = t
+        rhs = np.zeros((self.nConst,1))
+
+        kernels.rev_gamma(self.J_rev_group['iP'], self.J_rev_group['jP'], self.J_rev_group['iB'], self.J_rev_group['jB'], self.sP_d_array, self.qd_array, self.J_rev_group['gamma'])
+        kernels.tran_gamma(self.J_tran_group['iB'], self.J_tran_group['jB'], self.J_tran_group['jU'], self.q_array, self.qd_array, self.uvec_d_array, self.J_tran_group['gamma'])
+        rhs[self.J_rev_group['rows'],0]  = self.J_rev_group['gamma'].ravel()
+        rhs[self.J_tran_group['rows'],0] = self.J_tran_group['gamma'].ravel()
+
+        for Ji in self.J_other:
+            if self.Joints[Ji,0].type == 'rev':
+                f = self.A_rev(Ji)
+
+            if self.Joints[Ji,0].type == 'tran':
+                f = self.A_tran(Ji)
+
+            if self.Joints[Ji,0].type == 'rev_rev':
+                f = self.A_rev_rev(Ji)
+
+            if self.Joints[Ji,0].type == 'rev_tran':
+                f = self.A_rev_tran(Ji)
+
+            if self.Joints[Ji,0].type == 'rigid':
+                f = self.A_rigid(Ji)
+
+            if self.Joints[Ji,0].type == 'disc':
+                f = self.A_disc(Ji)
+
+            if self.Joints[Ji,0].type == 'rel_rot':
+                f = self.A_rel_rot(Ji,t)
+
+            if self.Joints[Ji,0].type == 'rel_tran':
+                f = self.A_rel_tran(Ji)
+
+            rs = self.Joints[Ji,0].rows -1
+            re = self.Joints[Ji,0].rowe
+            rhs[rs:re] = f
+
+        return rhs
+
+    #%%% RHSVel
+    def RHSVel(self, t):
+        # Only the driven joints have a velocity right hand side
+        self.t = t
+        rhs = np.zeros((self.nConst,1))
+
+        for Ji in self.J_other:
+            if self.Joints[Ji,0].type == 'rel_rot':
+                rhs[self.Joints[Ji,0].rows-1:self.Joints[Ji,0].rowe] = self.V_rel_rot(Ji)
+            if self.Joints[Ji,0].type == 'rel_tran':
+                rhs[self.Joints[Ji,0].rows-1:self.Joints[Ji,0].rowe] = self.V_rel_tran(Ji)
+
+        return rhs
+
+
+
+    ################################################################
+    #
+    # Transfer
+    #
+    ################################################################
+
+
+    # Unpack u into coordinate and velocity sub-arrays
+    # The coordinates of body Bi are u[irc:irc+3] with irc = 3*(Bi-1) + 1 and the velocities
+    # follow in the same order, so both blocks map directly onto rows 1: of q_array/qd_array
+    def u_to_Bodies(self, u):
+
+        u  = np.ravel(u)
+        nm = self.nB - 1
+        self.q_array[1:]  = u[1:3*nm+1].reshape(nm,3)
+        self.qd_array[1:] = u[3*nm+1:6*nm+1].reshape(nm,3)
+        return None
+
+    #%%% Bodies_to_u
+    def Bodies_to_u(self, u):
+
+        nm = self.nB - 1
+        u = np.zeros((self.nB6,1))
+        u[1:3*nm+1,0]      = self.q_array[1:].ravel()
+        u[3*nm+1:6*nm+1,0] = self.qd_array[1:].ravel()
+        return u
+
+    #%%% Bodies_to_u_d
+    # Transfer Bodies to u
+    def Bodies_to_u_d(self):
+
+        nm = self.nB - 1
+        u_d = np.zeros((self.nB6, 1))
+        u_d[1:3*nm+1,0]      = self.qd_array[1:].ravel()
+        u_d[3*nm+1:6*nm+1,0] = self.qdd_array[1:].ravel()
+        return u_d
+
+
+
+
+    ################################################################
+    #
+    # ANIMATION PLOTTER
+    #
+    ################################################################
+
+    def plot_system(self):                    # 2D Animation
+        import matplotlib.pyplot as plt       # only needed here, the solver runs without matplotlib
+
+    ##### set axis limits
+        #max_val = max(xmax, ymax)
+        #min_val = min(xmin, ymin)
+        #plt.xlim(xmin, xmax)
+        #plt.ylim(ymin, ymax)
+        plt.gca().set_aspect('equal')
+
+    ##### Plot body centre points
+        for Bi in range(1,self.nB):
+            plt.plot(self.Bodies[Bi,0].r[0,0],self.Bodies[Bi,0].r[1,0],'ko' )
+            plt.text(self.Bodies[Bi,0].r[0,0],self.Bodies[Bi,0].r[1,0],'   (%i'%Bi)
+            plt.text(self.Bodies[Bi,0].r[0,0],self.Bodies[Bi,0].r[1,0],'       )')
+        #plt.show()
+    ##### Draw lines between body centers and points on those bodies
+        for Bi in range(1,self.nB):
+            npts = len(self.Bodies[Bi,0].pts)
+            linecolor = self.Bodies[Bi,0].color
+            linecolor = "k"
+            #for j in range(1-1,npts):
+            for j in range(npts):
+
+            #for j in range(npts):
+                a1 = self.Bodies[Bi,0].r[0,0]
+                a2 = self.Points[int(self.Bodies[Bi,0].pts[j,0]),0].rP[0][0]
+                b1 = self.Bodies[Bi,0].r[1,0]
+                b2 = self.Points[int(self.Bodies[Bi,0].pts[j,0]),0].rP[1][0]
+                plt.plot([a1, a2], [b1, b2], color = linecolor, linewidth=1)
+                #print(Bi,j)
+                #print(Bodies[Bi,0].pts)
+                #print(Points[int(Bodies[Bi,0].pts[j,0]),0].rP)
+                #print(Bodies[Bi,0].pts)
+                #print(Points
+        #plt.show()
+
+        #print("Number of points",nP)
+    ##### Plot points that are defined by 's' vectors
+        for i in range(1,self.nP):
+            plt.plot(self.Points[i,0].rP[0][0], self.Points[i,0].rP[1][0],'ko', markerfacecolor='k', markersize=2)
+            plt.plot(self.Points[i,0].rP[0][0], self.Points[i,0].rP[1][0],'ko', markerfacecolor='k', markersize=2)
+
+        #plt.show()
+    ##### Draw lines between points that are connected by springs
+        for i in range(1,self.nF):
+
+            if self.Forces[i,0].type == 'ptp':
+                pt1 = self.Forces[i,0].iPindex
+                pt2 = self.Forces[i,0].jPindex
+                a1  = self.Points[int(pt1),0].rP[0][0]
+                a2  = self.Points[int(pt2),0].rP[0][0]
+                b1  = self.Points[int(pt1),0].rP[1][0]
+                b2  = self.Points[int(pt2),0].rP[1][0]
+                plt.plot([a1, a2], [b1, b2], color='m',linestyle='--')
+
+        for Ji in range(1,self.nJ):
+
+            if self.Joints[Ji,0].type == 'rev_rev':
+                Pi = self.Joints[Ji,0].iPindex
+                Pj = self.Joints[Ji,0].jPindex
+                a1 = self.Points[Pi,0].rP[0][0]
+                a2 = self.Points[Pj,0].rP[0][0]
+                b1 = self.Points[Pi,0].rP[1][0]
+                b2 = self.Points[Pj,0].rP[1][0]
+                plt.plot([a1, a2], [b1, b2], color='k')
+            elif self.Joints[Ji,0].type == 'rev_tran':
+                Pi = self.Joints[Ji,0].iPindex
+                plt.plot(self.Points[Pi,0].rP[0][0] , self.Points[Pi-1,0].rP[1][0],'ko', markerfacecolor='k',markersize=4)
+
+
+        for Bi in range(1,self.nB):
+
+            linecolor = self.Bodies[Bi,0].color
+
+            if self.Bodies[Bi,0].shape == 'circle':
+                radius = self.Bodies[Bi,0].R
+
+                w1x = self.Bodies[Bi,0].r[0,0]
+                w1y = self.Bodies[Bi,0].r[1,0]
+
+                w1 = plt.Circle((w1x, w1y), radius, color='k', fill=False)
+                plt.gca().add_patch(w1)
+            elif self.Bodies[Bi,0].shape == 'rect':
+                P5 = np.zeros((2,5))
+
+                for i in range(0,4):
+                    P5[:,i] = self.Bodies[Bi,0].r.T + self.Bodies[Bi,0].A@self.Bodies[Bi,0].P4[:,i].T
+
+                P5[:,5-1] = P5[:,1-1]
+                for i in range(0,4):
+                    plt.plot([P5[1-1,i], P5[1-1,i+1]], [P5[2-1,i], P5[2-1,i+1]], color='k')
+            elif self.Bodies[Bi,0].shape == 'line':
+                P5 = np.zeros((2,2))
+                for i in range(1-1,2):
+                    P5[:,i] = self.Bodies[Bi,0].r.T + self.Bodies[Bi,0].A@self.Bodies[Bi,0].P4[:,i]
+
+                plt.plot([P5[1-1,1-1], P5[1-1,2-1]], [P5[2-1,1-1], P5[2-1,2-1]],color='k')
+
+        plt.grid()
+        return None
+
+
+
+    ################################################################
+    #
+    # UPDATES
+    #
+    ################################################################
+
+    #%%% Update_Position
+    def Update_Position(self):
+
+        # Update_Position
+        # Compute A's (the ground row has p = 0 and therefore keeps A = I)
+        # Compute sP = A * sP_prime; rP = r + sP; u = A * u_prime
+        kernels.update_position(self.q_array, self.A_array, self.PBindex, self.sPlocal_array, self.sP_array, self.sP_r_array, self.rP_array,
+                                self.UBindex, self.ulocal_array, self.uvec_array, self.uvec_r_array)
+
+    #%%% Update_Velocity
+    def Update_Velocity(self):
+        # Update_Velocity
+        # Compute sP_dot and rP_dot vectors
+
+        # Compute u_dot vectors
+        kernels.update_velocity(self.qd_array, self.PBindex, self.sP_r_array, self.sP_d_array, self.rP_d_array,
+                                self.UBindex, self.uvec_r_array, self.uvec_d_array)
+
+
+
+    ##TODO: not working
+    #def ic_correct():
+        #global Bodies, nB, nB3, nB6
+        #global Points, nP, Points_anim, nPanim, nPtot
+        #global Uvectors, nU
+        #global Joints, nJ, nConst
+        #global Forces, nF
+        #global M_array, M_inv_array
+        #global Functs, nFc
+        #global ZZ, redund, cfriction
+        #global num, D, Dt, Lambda
+        #global xmin, xmax, ymin, ymax
+        #global showtime, t10
+        #global flags, pen_d0
+
+
+        #flag = 0;
+        #for n in range(20):
+            #Update_Position();      #% Update position entities
+            ##TODO: should contraints have an input
+            ##Phi = Constraints(0); #% Evaluate constraints
+            ##TODO: I think somehting is wrong with this Phi construction
+            #Phi = Constraints(); #% Evaluate constraints
+            #print("Phi",Phi)
+            #D   = Jacobian(0);       #% Evaluate Jacobian
+            #ff = np.sqrt(np.dot(Phi.T,Phi));  #% Are the constraints violated?
+            #if ff < 1.0e-10:
+                #flag = 1;
+                ##break
+                ##print("BROKEN")
+            ##end
+                ##delta_c = -np.dot(D.T,(np.dot(D,D.T)))\Phi   # % Solve for corrections
+            #D_ = D[:,0:3*(nB-1)]
+            #print("nConst",nConst)
+            #print("D",D_)
+            #print(np.dot(D_,D_.T))
+            #print("D",D)
+            #print(np.dot(D_.T, np.dot(D_,D_.T)))
+
+            ##delta_c = np.linalg.solve(-np.dot(D_.T,(np.dot(D_,D_.T))), Phi)
+            ##delta_c = np.dot(np.linalg.pinv(-np.dot(D_.T,(np.dot(D_,D_.T))).T), Phi)
+            #delta_c = -np.dot(D_.T, np.linalg.solve(np.dot(D_, D_.T), Phi))
+            #for Bi in  range(1,nB):        # % Correct estimates
+                ##ir = 1 + (Bi - 1)*3;
+                #ir = (Bi - 1)*3;
+                #print("ir",ir)
+                ##print("ir",ir)
+                #print("Bi", Bi)
+                #print("delta_c",delta_c)
+                #print("delta_c[ir:ir+1]",delta_c[ir:ir+2])
+                ##broken
+                #Bodies[Bi,0].r = Bodies[Bi,0].r + delta_c[ir:ir+2,0];
+                #Bodies[Bi,0].p = Bodies[Bi,0].p + delta_c[ir+2,0];
+            ##end
+        ##end
+            #if flag == 0:
+                #error(' Convergence failed in Newton-Raphson ');
+            ##end
+
+        ##% Velocity correction
+            #Phi2 = np.zeros(((nB-1)*3,1))
+            #for Bi in range(1,nB):    # % Move velocities to an arbitrary array Phi
+                ##ir = 1 + (Bi - 1)*3;
+                #ir = (Bi - 1)*3;
+                #print("ir",ir)
+                #print("Bi", Bi)
+                #print("Phi2",Phi2)
+                #print("nB",nB)
+                #print("Bodies[Bi].p_d",Bodies[Bi,0].p_d)
+                #print("Biodes.r_d",Bodies[Bi,0].r_d[:,0])
+                #print("ir:ir+1",ir,ir+1)
+                #print("Phi[ir:ir+2,0]",Phi[ir:ir+2,0])
+
+                #Phi2[ir:ir+2,0] = Bodies[Bi,0].r_d[:,0]
+                #Phi2[ir+2,0] = Bodies[Bi,0].p_d
+                ##0:3*(nB-1)
+                ##Phi[ir:ir+2,0] = np.array([[Bodies[Bi,0].r_d, Bodies[Bi,0].p_d]]);
+                #print("Phi2", Phi2)
+                #print("Bodies",Bodies)
+                ##print("Bodies(Bi)", Bodies(Bi))
+            ##end
+            #print("NCONST", nConst)
+            #rhs = RHSVel(0);
+            #print("rhs",rhs)
+            ##broken
+            #np.dot(D_, D_.T)
+            #np.dot(D_,Phi - rhs)
+            ##delta_v = np.dot(-D_.T, )
+            ##delta_v = -D'*((D*D')\(D*Phi - rhs)); % Compute corrections
+            ##for Bi = 1:nB     % Move corrected velocities to sub-arrays
+                ##ir  = 1 + (Bi - 1)*3;
+                ##Bodies(Bi).r_d = Bodies(Bi).r_d + delta_v(ir:ir+1);
+                ##Bodies(Bi).p_d = Bodies(Bi).p_d + delta_v(ir+2);
+            ##end
+
+        ##% Report corrected coordinates and velocities
+            ##coords = zeros(nB,3); vels = zeros(nB,3);
+            ##for Bi = 1:nB
+                ##coords(Bi,:) = [Bodies(Bi).r'  Bodies(Bi).p];
+                ##vels(Bi,:) = [Bodies(Bi).r_d'  Bodies(Bi).p_d];
+            ##end
+            ##display(' ')
+            ##display('Corrected coordinates')
+            ##display(' x           y           phi')
+            ##display(num2str(coords))
+            ##display('Corrected velocities')
+            ##display(' x-dot       y-dot       phi-dot')
+            ##display(num2str(vels))
+            ##display(' ')
+    #######################################################################
+    #
+    # MAIN SOLVER
+    #
+    #######################################################################
+    def readInputFiles(self):
+        # The model bundle written by DapSolverBuilder, or the in*.py input files of older folders
+        bundle_file = os.path.join(self.folder, bundle.BUNDLE_FILE)
+        if os.path.exists(bundle_file):
+            model = bundle.readBundle(bundle_file)
+        else:
+            model = bundle.readInputFiles(self.folder)
+
+        self.Bodies   = model['Bodies']
+        self.Forces   = model['Forces']
+        self.Functs   = model['Functs']
+        self.Joints   = model['Joints']
+        self.Points   = model['Points']
+        self.Uvectors = model['Uvectors']
+
+        # labels of the results store, DapSolverBuilder replaces them with the FreeCAD labels
+        self.body_labels  = ["Body" + str(Bi) for Bi in range(1,len(self.Bodies))]
+        self.point_labels = ["Point" + str(Pi) for Pi in range(1,len(self.Points))]
+
+    #%%% Integrate
+    def Integrate(self, fun, Tspan, u0, capture, jac_sparsity=None, first_step=None):
+        # Integrates u_d = fun(t, u) from u0. The integrator takes its own steps;
+        # the reporting times are interpolated from the dense output of each step that
+        # passes them and capture(i, t, u, u_d) is called for each of them, with u_d
+        # the derivative of the dense output (None at the initial time)
+        options = {}
+        if jac_sparsity is not None:
+            options['jac_sparsity'] = jac_sparsity
+        if first_step is not None and Tspan[-1] > Tspan[0]:
+            options['first_step'] = min(first_step, Tspan[-1] - Tspan[0])
+
+        r = INTEGRATORS[self.integrator](fun, Tspan[0], u0, Tspan[-1], rtol=self.rtol, atol=self.atol, **options)
+        self.ode_solver = r
+        capture(0, Tspan[0], u0, None)
+
+        step = r.step
+        if self.timers is not None:
+            step = self.timers.wrap('step', r.step)
+            counters = self.timers.counters
+            counters.update(steps=0, rejected_steps=0)
+            # the explicit methods evaluate all of their stages once per attempted step
+            n_stages = getattr(r, 'n_stages', None)
+            if n_stages is None:
+                counters['rejected_steps'] = None
+
+        i = 1
+        steps = 0
+        t_start = last_report = time.perf_counter()
+        while i < Tspan.size:
+            nfev = r.nfev
+            step()
+            if r.status == 'failed':
+                raise RuntimeError("Could not integrate at t = " + str(r.t))
+            steps = steps + 1
+            if self.timers is not None:
+                counters['steps'] = steps
+                if n_stages is not None:
+                    counters['rejected_steps'] += (r.nfev - nfev)//n_stages - 1
+            if self.progress is not None and time.perf_counter() - last_report >= self.progress_interval:
+                last_report = time.perf_counter()
+                self.progress(r.t, last_report - t_start, steps, self.num)
+            if Tspan[i] <= r.t:
+                u_t = r.dense_output()
+                while i < Tspan.size and Tspan[i] <= r.t:
+                    capture(i, Tspan[i], u_t(Tspan[i]), self.Dense_derivative(u_t, Tspan[i]))
+                    i = i + 1
+        if self.progress is not None:
+            self.progress(r.t, time.perf_counter() - t_start, steps, self.num)
+        if self.timers is not None:
+            self.timers.counters['evaluations'] = self.num
+
+    #%%% Dense_derivative
+    def Dense_derivative(self, u_t, t):
+        # Derivative at t of the dense output u_t of a step, by a central difference of
+        # its interpolating polynomial
+        h = 1e-3*(u_t.t_max - u_t.t_min)
+        return (u_t(t + h) - u_t(t - h))/(2*h)
+
+    #%%% Kinematics
+    def Kinematics(self, Tspan, u0, capture):
+        # Kinematic analysis of a fully driven mechanism (the drivers are rel_rot and
+        # rel_tran joints with functions). At each reporting time the positions are solved
+        # by Newton iteration on Constraints(), starting from the previous solution
+        # extrapolated with its velocities and accelerations, then the velocities and
+        # accelerations from D c_d = RHSVel and D c_dd = RHSAcc. capture(i, t, u) is
+        # called for each reporting time as by Integrate()
+        n = 3*(self.nB-1)
+        if self.nConst < n:
+            raise ValueError(KINEMATIC_DOF_ERROR.format(n - self.nConst))
+        self.ode_solver = None
+        self.u_to_Bodies(u0)
+
+        t_start = last_report = time.perf_counter()
+        for i in range(Tspan.size):
+            t = Tspan[i]
+            if i > 0:
+                h = t - Tspan[i-1]
+                self.q_array[1:] += h*self.qd_array[1:] + 0.5*h**2*self.qdd_array[1:]
+            solve = self.Kinematic_position(t)
+
+            self.Update_Velocity()
+            self.qd_array[1:] = solve(self.RHSVel(t)).reshape(self.nB-1,3)
+            self.Update_Velocity()
+            self.qdd_array[1:] = solve(self.RHSAcc(t)).reshape(self.nB-1,3)
+
+            u = np.ravel(self.Bodies_to_u(None))
+            # the state is complete, Capture_outputs() does not call analysis()
+            self.t_last = t
+            self.u_last[:] = u
+            capture(i, t, u)
+
+            if self.progress is not None and (time.perf_counter() - last_report >= self.progress_interval or i == Tspan.size - 1):
+                last_report = time.perf_counter()
+                self.progress(t, last_report - t_start, i + 1, self.num)
+        if self.timers is not None:
+            self.timers.counters['steps'] = Tspan.size
+            self.timers.counters['iterations'] = self.num
+
+    #%%% Kinematic_position
+    def Kinematic_position(self, t):
+        # Newton iteration on the constraints at time t. Returns the solver of the
+        # Jacobian at the solution (see Kinematic_solver)
+        for iteration in range(self.kinematic_iterations):
+            self.Update_Position()
+            phi = self.Constraints(t)
+            solve = self.Kinematic_solver(t)
+            self.num = self.num + 1
+            if np.max(np.abs(phi), initial=0.0) <= self.kinematic_tol:
+                return solve
+            self.q_array[1:] -= solve(phi).reshape(self.nB-1,3)
+        raise RuntimeError("The positions did not converge at t = " + str(t) +
+                           ", the mechanism may be locked or not fully driven")
+
+    #%%% Kinematic_solver
+    def Kinematic_solver(self, t):
+        # Factorizes the Jacobian of the moving bodies at the current positions and returns
+        # a function that solves D x = rhs. Redundant constraints are solved in the least
+        # squares sense
+        n = 3*(self.nB-1)
+        if self.linear_solver == 'sparse' and self.nConst == n:
+            lu = splu(self.Jacobian_sparse(t).tocsc())
+            return lambda rhs: lu.solve(np.ravel(rhs))
+
+        if self.linear_solver == 'sparse':
+            D = self.Jacobian_sparse(t).toarray()
+        else:
+            D = self.Jacobian(t)[:,0:n]
+        if self.nConst == n:
+            lu = lu_factor(D)
+            return lambda rhs: lu_solve(lu, np.ravel(rhs))
+        # redundant constraints: the least squares solution from the SVD of D, which
+        # must still have full column rank (every degree of freedom constrained or driven)
+        U, S, Vt = np.linalg.svd(D, full_matrices=False)
+        rank = np.count_nonzero(S > S.max(initial=0.0)*max(D.shape)*np.finfo(float).eps)
+        if rank < n:
+            raise ValueError(KINEMATIC_DOF_ERROR.format(n - rank))
+        return lambda rhs: Vt.T @ ((U.T @ np.ravel(rhs))/S)
+
+    #%%% Init_outputs
+    def Init_outputs(self, nt, resume=0):
+        # the outputs are streamed to the results store, see results.ResultsWriter
+        nm = self.nB - 1
+        nP = self.nP - 1
+        shapes = {'time':         (),
+                  'Bodies_r':     (nm,2),       # x, y of each body
+                  'Bodies_p':     (nm,),        # phi
+                  'Bodies_r_d':   (nm,2),       # velocities
+                  'Bodies_p_d':   (nm,),
+                  'Bodies_r_d_d': (nm,2),       # accelerations
+                  'Bodies_p_d_d': (nm,),
+                  'Points_r':     (nP,2),       # coordinates of points
+                  'Points_r_d':   (nP,2),       # velocity of points
+                  'energy':       (3,)}         # Energy (kinetic, potential, total)
+        self.writer = results.ResultsWriter(self.folder, nt, shapes, self.body_labels, self.point_labels, resume)
+
+    #%%% Capture_outputs
+    def Capture_outputs(self, i, t, u, u_d=None):
+        # Record the derived quantities of reporting time i. The accelerations are
+        # taken from u_d, the derivative of the interpolated state, so the KKT system
+        # is not solved for the outputs. Without u_d (at the initial time), or with
+        # contact forces, whose onset within a step the interpolation does not follow,
+        # analysis() is called if its last evaluation was not already at (t, u); these
+        # calls are not counted in num
+        if u_d is not None and len(self.F_con) == 0:
+            nm = self.nB - 1
+            self.u_to_Bodies(u)
+            self.Update_Position()
+            self.Update_Velocity()
+            self.qdd_array[1:] = np.ravel(u_d)[3*nm+1:6*nm+1].reshape(nm,3)
+        elif self.t_last != t or not np.array_equal(self.u_last, u):
+            num = self.num
+            self.analysis(t, u)
+            self.num = num
+
+        kin = 0.5*np.sum(self.M_array_[:,0]*self.qd_array[1:].ravel()**2)
+        potential = self.Potential_energy()
+        self.writer.append(time=t,
+                           Bodies_r=self.q_array[1:,0:2],     Bodies_p=self.q_array[1:,2],
+                           Bodies_r_d=self.qd_array[1:,0:2],  Bodies_p_d=self.qd_array[1:,2],
+                           Bodies_r_d_d=self.qdd_array[1:,0:2], Bodies_p_d_d=self.qdd_array[1:,2],
+                           Points_r=self.rP_array[1:],        Points_r_d=self.rP_d_array[1:],
+                           energy=[kin, potential, kin + potential])
+
+        self.last_capture = (i, t, np.array(u))
+        if self.checkpoint_interval is not None and time.perf_counter() - self.checkpoint_time >= self.checkpoint_interval:
+            self.Write_checkpoint()
+
+    #%%% Write_checkpoint
+    def Write_checkpoint(self):
+        # Saves the state of the last captured reporting time, after the results up to
+        # it have been written, so that solve() can resume from it (see restart)
+        i, t, u = self.last_capture
+        self.writer.flush()
+        step_size = getattr(self.ode_solver, 'step_size', None)
+        file_name = os.path.join(self.folder, CHECKPOINT_FILE)
+        with open(file_name + ".tmp", 'wb') as fid:
+            np.savez(fid, row=i, t=t, u=u, step_size=np.nan if step_size is None else step_size,
+                     t_initial=self.t_initial, dt=self.dt, num=self.num,
+                     flags=self.flags, pen_d0=self.pen_d0)
+        os.replace(file_name + ".tmp", file_name)
+        self.checkpoint_time = time.perf_counter()
+
+    #%%% Read_checkpoint
+    def Read_checkpoint(self, Tspan):
+        # Returns the reporting time index, state and step size to resume from
+        file_name = os.path.join(self.folder, CHECKPOINT_FILE)
+        if not os.path.exists(file_name):
+            raise FileNotFoundError("No checkpoint to restart from in " + str(self.folder))
+        with np.load(file_name) as checkpoint:
+            i = int(checkpoint['row'])
+            u = checkpoint['u']
+            if (u.size != self.nB6 or checkpoint['t_initial'] != self.t_initial or checkpoint['dt'] != self.dt
+                    or i >= Tspan.size or Tspan[i] != checkpoint['t']):
+                raise ValueError("The checkpoint does not match the model or the reporting times")
+            self.num    = int(checkpoint['num'])
+            self.flags  = checkpoint['flags'].copy()
+            self.pen_d0 = checkpoint['pen_d0'].copy()
+            step_size   = float(checkpoint['step_size'])
+        return i, u, None if np.isnan(step_size) or step_size <= 0 else step_size
+
+    #%%% Potential_energy
+    def Potential_energy(self):
+        potential = -np.sum(self.wgt_array[1:]*self.q_array[1:,0:2])
+
+        if len(self.F_ptp) > 0:
+            d = self.rP_array[self.F_ptp_iP] - self.rP_array[self.F_ptp_jP]
+            delta = np.sqrt(np.einsum('ij,ij->i', d, d)) - self.F_ptp_par[:,1]
+            potential = potential + 0.5*np.sum(self.F_ptp_par[:,0]*delta**2)
+
+        if len(self.F_rot) > 0:
+            theta = self.q_array[self.F_rot_i,2] - self.q_array[self.F_rot_j,2] - self.F_rot_par[:,1]
+            potential = potential + 0.5*np.sum(self.F_rot_par[:,0]*theta**2)
+
+        if len(self.F_con) > 0:
+            pen = np.maximum(-self.rP_array[self.F_con_P,1], 0.0)
+            potential = potential + np.sum(self.F_con_par[:,0]*pen**2.5)/2.5
+        return potential
+
+    #%%% State_jac_sparsity
+    def State_jac_sparsity(self):
+        # Sparsity of d(u_d)/du: the velocities are the derivatives of the positions, and
+        # the accelerations of a body depend on the positions and velocities of all bodies
+        # connected to it through joints or force elements (ground does not connect)
+        nm = self.nB - 1
+        links = []
+        for Ji in range(1, self.nJ):
+            links.append((self.Joints[Ji,0].iBindex, self.Joints[Ji,0].jBindex))
+        for Fi in range(1, self.nF):
+            if self.Forces[Fi,0].type in ('ptp', 'rot_sda'):
+                links.append((self.Forces[Fi,0].iBindex, self.Forces[Fi,0].jBindex))
+        links = np.array([(Bi-1, Bj-1) for (Bi, Bj) in links if Bi != 0 and Bj != 0], dtype=int).reshape(-1,2)
+
+        graph = sparse.coo_matrix((np.ones(len(links)), (links[:,0], links[:,1])), shape=(nm,nm))
+        n_comp, comp = connected_components(graph, directed=False)
+
+        C       = sparse.csr_matrix((np.ones(nm), (np.arange(nm), comp)), shape=(nm,n_comp))
+        coupled = sparse.kron(C @ C.T, np.ones((3,3)))
+        eye     = sparse.identity(3*nm)
+        pattern = sparse.bmat([[None, eye], [coupled, coupled]])
+
+        # pad with the unused first and last entries of u
+        return sparse.block_diag((sparse.csr_matrix((1,1)), pattern, sparse.csr_matrix((self.nB6-6*nm-1,self.nB6-6*nm-1))), format='csr')
+
+    def solve(self):
+
+        self.solution_success = False
+
+        if self.linear_solver == 'sparse' and self.nConst > 0 and self.D_sparse is None:
+            # the settings were changed after initialize()
+            self.Sparsity_pattern()
+
+        Tspan  = np.arange(self.t_initial,self.t_final,self.dt)
+
+        if self.restart:
+            # the results before the checkpoint are kept, reporting time i0 is recomputed
+            i0, u, first_step = self.Read_checkpoint(Tspan)
+            if i0 == Tspan.size - 1:
+                # the run is complete, its results are kept as they are
+                self.solution_success = True
+                return self.solution_success
+        else:
+            i0, first_step = 0, None
+            u = np.zeros( (6*(self.nB),1) )
+            u = self.Bodies_to_u(u)
+            u = np.concatenate((u), axis=None)
+
+        jac_sparsity = None
+        if self.analysis_type == 'dynamic' and self.integrator in ('BDF', 'Radau'):
+            # the implicit methods approximate the Jacobian of analysis() by finite
+            # differences, grouped by the sparsity pattern of the mechanism
+            jac_sparsity = self.State_jac_sparsity()
+
+        self.Init_outputs(Tspan.size, i0)
+        self.last_capture = None
+        self.checkpoint_time = time.perf_counter()
+        self.timers = None
+        if self.timing:
+            self.timers = timers.PhaseTimers()
+            self.timers.instrument(self)
+        elif os.path.exists(os.path.join(self.folder, results.RESULTS_FOLDER, timers.TIMINGS_FILE)):
+            # timings of an earlier run
+            os.remove(os.path.join(self.folder, results.RESULTS_FOLDER, timers.TIMINGS_FILE))
+        profiler = None
+        if self.profile:
+            profiler = profiling.SolveProfiler()
+        else:
+            profiling.removeProfiles(self.folder)
+        t0 = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.start()
+            if self.analysis_type == 'kinematic':
+                self.Kinematics(Tspan[i0:], u, lambda i, t, u: self.Capture_outputs(i0 + i, t, u))
+            else:
+                self.Integrate(self.analysis, Tspan[i0:], u, lambda i, t, u, u_d: self.Capture_outputs(i0 + i, t, u, u_d),
+                               jac_sparsity, first_step)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            # keeps the results and a checkpoint up to a failure
+            if self.last_capture is not None:
+                self.Write_checkpoint()
+            self.writer.close()
+            if self.timers is not None:
+                self.timers.release(self)
+                self.timers.wall_time = time.perf_counter() - t0
+                self.timers.write(self.folder)
+            if profiler is not None:
+                profiler.write(self.folder)
+
+        self.solution_success = True
+        return self.solution_success
+
+
+    def writeOutputs(self, text_export=False):
+        # The outputs are written to the results store by solve(), see Init_outputs().
+        # Writes the Dap* text files if text_export is set
+
+        self.write_success = False
+
+        if text_export:
+            results.exportText(self.folder)
+        self.write_success = True
@@ -0,0 +1,236 @@
+import numpy as np
+import re
+from scipy import sparse
+
+from dapSolver import DapSolver
+import kernels
+# Ensemble mode: the same mechanism solved for many parameter variants at once. The
+# state arrays of DapSolver get a leading variant dimension, so that one call of
+# DapEnsemble.analysis() evaluates the right-hand side of all variants.
+#
+# Variants are given as dictionaries of overrides of the input structures, e.g.
+#   {'Bodies[2].m': 2.0, 'Forces[3].k': 1e4, 'Bodies[1].r_d': [0.0, 1.5]}
+# Supported are the body attributes m, J, r, p, r_d, p_d and the force attributes
+# k, dc, L0, f_a (ptp) and k, dc, theta0, T_a (rot_sda).
+
+BODY_ATTRIBUTES = ['m', 'J', 'r', 'p', 'r_d', 'p_d']
+PTP_ATTRIBUTES  = ['k', 'L0', 'dc', 'f_a']          # order of DapSolver.F_ptp_par
+ROT_ATTRIBUTES  = ['k', 'theta0', 'dc', 'T_a']      # order of DapSolver.F_rot_par
+
+
+class DapEnsemble:
+    def __init__(self, folder, variants, **settings):
+        """ Reads the model in folder and sets up len(variants) copies of its state. The
+        settings (linear_solver, integrator, rtol, atol) are passed on to DapSolver """
+        self.model = DapSolver(folder, **settings)
+
+        if len(self.model.J_other) > 0:
+            raise RuntimeError("Ensemble mode only supports rev and tran joints without the fix option")
+        if len(self.model.F_con) > 0:
+            raise RuntimeError("Ensemble mode does not support contact forces")
+
+        self.nV = len(variants)
+        self.num = 0
+        self.nB = self.model.nB
+        self.nConst = self.model.nConst
+        nB, nV, nm = self.nB, self.nV, self.nB - 1
+
+        self.q   = np.repeat(self.model.q_array[np.newaxis], nV, axis=0)
+        self.qd  = np.repeat(self.model.qd_array[np.newaxis], nV, axis=0)
+        self.qdd = np.zeros((nV,nB,3))
+        self.A   = np.zeros((nV,nB,2,2))
+        self.A[:] = np.eye(2)
+        nP, nU = len(self.model.PBindex), len(self.model.UBindex)
+        self.sP, self.sP_r, self.rP = np.zeros((nV,nP,2)), np.zeros((nV,nP,2)), np.zeros((nV,nP,2))
+        self.sP_d, self.rP_d = np.zeros((nV,nP,2)), np.zeros((nV,nP,2))
+        self.uvec, self.uvec_r, self.uvec_d = np.zeros((nV,nU,2)), np.zeros((nV,nU,2)), np.zeros((nV,nU,2))
+
+        self.M     = np.repeat(self.model.M_array_[:,0][np.newaxis], nV, axis=0)
+        self.ptp   = np.repeat(self.model.F_ptp_par[np.newaxis], nV, axis=0)
+        self.rot   = np.repeat(self.model.F_rot_par[np.newaxis], nV, axis=0)
+        self.fn    = np.zeros((nV,nB,3))
+
+        for Vi, variant in enumerate(variants):
+            for key, value in variant.items():
+                self.setParameter(Vi, key, value)
+
+        # the weight scales with the mass of each variant
+        m_base = np.ones(nB)
+        m_base[1:] = self.model.M_array_[0::3,0]
+        m = np.ones((nV,nB))
+        m[:,1:] = self.M[:,0::3]
+        self.fn_const = np.repeat(self.model.fn_const_array[np.newaxis], nV, axis=0)
+        self.fn_const[:,:,0:2] += (m/m_base - 1)[:,:,np.newaxis]*self.model.wgt_array
+        self.fn_const[:,0,:] = 0
+        self.M_inv = 1/self.M
+
+        self.groups = [group for group in (self.model.J_rev_group, self.model.J_tran_group) if len(group['J']) > 0]
+        for group in self.groups:
+            n = len(group['J'])
+            group['Di_batch']    = np.zeros((nV,n,2,3))
+            group['Dj_batch']    = np.zeros((nV,n,2,3))
+            group['gamma_batch'] = np.zeros((nV,n,2))
+
+    def setParameter(self, Vi, key, value):
+        match = re.fullmatch(r"(Bodies|Forces)\[(\d+)\]\.(\w+)", key.replace(' ', ''))
+        if match is None:
+            raise ValueError("Cannot interpret ensemble parameter " + key)
+        struct, index, attr = match.group(1), int(match.group(2)), match.group(3)
+
+        if struct == 'Bodies':
+            Bi = index
+            if not 0 < Bi < self.nB or attr not in BODY_ATTRIBUTES:
+                raise ValueError("Unsupported ensemble parameter " + key)
+            if attr == 'm':
+                self.M[Vi,3*(Bi-1):3*(Bi-1)+2] = value
+            elif attr == 'J':
+                self.M[Vi,3*(Bi-1)+2] = value
+            elif attr == 'r':
+                self.q[Vi,Bi,0:2] = np.ravel(value)
+            elif attr == 'p':
+                self.q[Vi,Bi,2] = value
+            elif attr == 'r_d':
+                self.qd[Vi,Bi,0:2] = np.ravel(value)
+            elif attr == 'p_d':
+                self.qd[Vi,Bi,2] = value
+        else:
+            Fi = index
+            if Fi in self.model.F_ptp and attr in PTP_ATTRIBUTES:
+                self.ptp[Vi,self.model.F_ptp.index(Fi),PTP_ATTRIBUTES.index(attr)] = value
+            elif Fi in self.model.F_rot and attr in ROT_ATTRIBUTES:
+                self.rot[Vi,self.model.F_rot.index(Fi),ROT_ATTRIBUTES.index(attr)] = value
+            else:
+                raise ValueError("Unsupported ensemble parameter " + key)
+
+    #%%% State
+    def u_to_Bodies(self, u):
+        nm = self.nB - 1
+        u = u.reshape(self.nV, -1)
+        self.q[:,1:]  = u[:,1:3*nm+1].reshape(self.nV,nm,3)
+        self.qd[:,1:] = u[:,3*nm+1:6*nm+1].reshape(self.nV,nm,3)
+
+    def Bodies_to_u(self):
+        nm = self.nB - 1
+        u = np.zeros((self.nV, self.model.nB6))
+        u[:,1:3*nm+1]      = self.q[:,1:].reshape(self.nV,-1)
+        u[:,3*nm+1:6*nm+1] = self.qd[:,1:].reshape(self.nV,-1)
+        return u
+
+    def Bodies_to_u_d(self):
+        nm = self.nB - 1
+        u_d = np.zeros((self.nV, self.model.nB6))
+        u_d[:,1:3*nm+1]      = self.qd[:,1:].reshape(self.nV,-1)
+        u_d[:,3*nm+1:6*nm+1] = self.qdd[:,1:].reshape(self.nV,-1)
+        return u_d
+
+    #%%% Forces
+    def Force_array(self):
+        fn = self.fn
+        fn[:] = self.fn_const
+
+        if len(self.model.F_ptp) > 0:
+            iP, jP = self.model.F_ptp_iP, self.model.F_ptp_jP
+            d     = self.rP[:,iP] - self.rP[:,jP]
+            d_dot = self.rP_d[:,iP] - self.rP_d[:,jP]
+            L     = np.sqrt(np.einsum('...j,...j->...', d, d))
+            L_dot = np.einsum('...j,...j->...', d, d_dot)/L
+            par   = self.ptp
+            f  = par[...,0]*(L - par[...,1]) + par[...,2]*L_dot + par[...,3]
+            fi = (f/L)[...,np.newaxis]*d
+            ni = np.einsum('...j,...j->...', self.sP_r[:,iP], fi)
+            nj = np.einsum('...j,...j->...', self.sP_r[:,jP], fi)
+            np.subtract.at(fn, (slice(None), self.model.F_ptp_iB, slice(0,2)), fi)
+            np.subtract.at(fn, (slice(None), self.model.F_ptp_iB, 2), ni)
+            np.add.at(fn, (slice(None), self.model.F_ptp_jB, slice(0,2)), fi)
+            np.add.at(fn, (slice(None), self.model.F_ptp_jB, 2), nj)
+
+        if len(self.model.F_rot) > 0:
+            Bi, Bj  = self.model.F_rot_i, self.model.F_rot_j
+            theta   = self.q[:,Bi,2] - self.q[:,Bj,2]
+            theta_d = self.qd[:,Bi,2] - self.qd[:,Bj,2]
+            par = self.rot
+            T = par[...,0]*(theta - par[...,1]) + par[...,2]*theta_d + par[...,3]
+            np.subtract.at(fn, (slice(None), Bi, 2), T)
+            np.add.at(fn, (slice(None), Bj, 2), T)
+
+        if len(self.model.F_loc_B) > 0:
+            Bi = self.model.F_loc_B
+            np.add.at(fn, (slice(None), Bi, slice(0,2)), np.einsum('...ij,...j->...i', self.A[:,Bi], self.model.F_loc_array))
+
+        return fn[:,1:].reshape(self.nV,-1)
+
+    #%%% Jacobian and RHSAcc
+    def Jacobian(self):
+        D = np.zeros((self.nV, self.nConst, self.model.nB3))
+        J_rev, J_tran = self.model.J_rev_group, self.model.J_tran_group
+        if len(J_rev['J']) > 0:
+            kernels.rev_jacobian_batch(J_rev['iP'], J_rev['jP'], self.sP_r, J_rev['Di_batch'], J_rev['Dj_batch'])
+        if len(J_tran['J']) > 0:
+            kernels.tran_jacobian_batch(J_tran['iP'], J_tran['jP'], J_tran['jU'], self.sP, self.rP, self.uvec,
+                                        self.uvec_r, J_tran['Di_batch'], J_tran['Dj_batch'])
+        for group in self.groups:
+            values = np.concatenate((group['Di_batch'].reshape(self.nV,-1), group['Dj_batch'].reshape(self.nV,-1)), axis=1)
+            D.reshape(self.nV,-1)[:,group['dense']] = values[:,group['sel']]
+        return D[:,:,0:3*(self.nB-1)]
+
+    def RHSAcc(self):
+        rhs = np.zeros((self.nV, self.nConst))
+        J_rev, J_tran = self.model.J_rev_group, self.model.J_tran_group
+        if len(J_rev['J']) > 0:
+            kernels.rev_gamma_batch(J_rev['iP'], J_rev['jP'], J_rev['iB'], J_rev['jB'], self.sP_d, self.qd, J_rev['gamma_batch'])
+            rhs[:,J_rev['rows']] = J_rev['gamma_batch'].reshape(self.nV,-1)
+        if len(J_tran['J']) > 0:
+            kernels.tran_gamma_batch(J_tran['iB'], J_tran['jB'], J_tran['jU'], self.q, self.qd, self.uvec_d, J_tran['gamma_batch'])
+            rhs[:,J_tran['rows']] = J_tran['gamma_batch'].reshape(self.nV,-1)
+        return rhs
+
+    #%%% analysis
+    def analysis(self, t, u):
+        self.u_to_Bodies(u)
+        kernels.update_position_batch(self.q, self.A, self.model.PBindex, self.model.sPlocal_array, self.sP, self.sP_r,
+                                      self.rP, self.model.UBindex, self.model.ulocal_array, self.uvec, self.uvec_r)
+        kernels.update_velocity_batch(self.qd, self.model.PBindex, self.sP_r, self.sP_d, self.rP_d,
+                                      self.model.UBindex, self.uvec_r, self.uvec_d)
+
+        h = self.Force_array()
+        if self.nConst == 0:
+            c_dd = self.M_inv*h
+        elif self.model.linear_solver == 'schur':
+            D    = self.Jacobian()
+            DMi  = D*self.M_inv[:,np.newaxis,:]
+            DMD  = DMi @ np.swapaxes(D, 1, 2)
+            rhs  = self.RHSAcc() - np.einsum('vij,vj->vi', DMi, h)
+            Lambda = np.linalg.solve(DMD, rhs[...,np.newaxis])[...,0]
+            c_dd = self.M_inv*(h + np.einsum('vji,vj->vi', D, Lambda))
+        else:
+            # stacked KKT systems [M -D'; D 0]
+            D  = self.Jacobian()
+            n3 = h.shape[1]
+            KKT = np.zeros((self.nV, n3 + self.nConst, n3 + self.nConst))
+            KKT[:,np.arange(n3),np.arange(n3)] = self.M
+            KKT[:,0:n3,n3:] = -np.swapaxes(D, 1, 2)
+            KKT[:,n3:,0:n3] = D
+            rhs = np.concatenate((h, self.RHSAcc()), axis=1)
+            c_dd = np.linalg.solve(KKT, rhs[...,np.newaxis])[:,0:n3,0]
+
+        self.qdd[:,1:] = c_dd.reshape(self.nV,self.nB-1,3)
+        self.num = self.num + 1
+        return self.Bodies_to_u_d().ravel()
+
+    #%%% solve
+    def solve(self, t_initial, t_final, dt):
+        """ Returns the reporting times and the stacked results array Tarray[variant, time, u] """
+        Tspan  = np.arange(t_initial, t_final, dt)
+        u0     = self.Bodies_to_u()
+        Tarray = np.zeros((len(Tspan), u0.size))
+
+        jac_sparsity = None
+        if self.model.integrator in ('BDF', 'Radau'):
+            # the variants are independent of each other
+            jac_sparsity = sparse.block_diag([self.model.State_jac_sparsity()]*self.nV, format='csr')
+
+        self.num = 0
+        def capture(i, t, u, u_d):
+            Tarray[i,:] = u
+        self.model.Integrate(self.analysis, Tspan, u0.ravel(), capture, jac_sparsity)
+        return Tspan, np.swapaxes(Tarray.reshape(len(Tspan), self.nV, -1), 0, 1)
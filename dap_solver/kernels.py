@@ -0,0 +1,240 @@
+import numpy as np
+# Kinematic and joint kernels on the flat state arrays of DapSolver (row 0 of the body
+# arrays is ground). Each kernel has an explicit loop version, which is compiled with
+# Numba (cached on disk) when it is installed, and a NumPy version that is used otherwise.
+# The NumPy versions also accept arrays with a leading ensemble dimension (see ensemble.py).
+
+try:
+    import numba
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+def jit(fun):
+    if HAVE_NUMBA:
+        return numba.njit(cache=True)(fun)
+    return fun
+
+backend = 'numba' if HAVE_NUMBA else 'numpy'
+
+def set_backend(name):
+    # 'numba' or 'numpy'
+    global backend
+    if name == 'numba' and not HAVE_NUMBA:
+        raise RuntimeError("Numba is not installed")
+    backend = name
+
+
+
+#%%% Update_Position
+@jit
+def _update_position_loop(q, A, PBindex, sPlocal, sP, sP_r, rP, UBindex, ulocal, u, u_r):
+    for Bi in range(q.shape[0]):
+        c = np.cos(q[Bi,2])
+        s = np.sin(q[Bi,2])
+        A[Bi,0,0] = c
+        A[Bi,0,1] = -s
+        A[Bi,1,0] = s
+        A[Bi,1,1] = c
+
+    for Pi in range(PBindex.shape[0]):
+        Bi = PBindex[Pi]
+        sP[Pi,0] = A[Bi,0,0]*sPlocal[Pi,0] + A[Bi,0,1]*sPlocal[Pi,1]
+        sP[Pi,1] = A[Bi,1,0]*sPlocal[Pi,0] + A[Bi,1,1]*sPlocal[Pi,1]
+        sP_r[Pi,0] = -sP[Pi,1]
+        sP_r[Pi,1] =  sP[Pi,0]
+        rP[Pi,0] = q[Bi,0] + sP[Pi,0]
+        rP[Pi,1] = q[Bi,1] + sP[Pi,1]
+
+    for Vi in range(UBindex.shape[0]):
+        Bi = UBindex[Vi]
+        u[Vi,0] = A[Bi,0,0]*ulocal[Vi,0] + A[Bi,0,1]*ulocal[Vi,1]
+        u[Vi,1] = A[Bi,1,0]*ulocal[Vi,0] + A[Bi,1,1]*ulocal[Vi,1]
+        u_r[Vi,0] = -u[Vi,1]
+        u_r[Vi,1] =  u[Vi,0]
+
+def _update_position_numpy(q, A, PBindex, sPlocal, sP, sP_r, rP, UBindex, ulocal, u, u_r):
+    c = np.cos(q[...,2])
+    s = np.sin(q[...,2])
+    A[...,0,0] = c
+    A[...,0,1] = -s
+    A[...,1,0] = s
+    A[...,1,1] = c
+
+    cP = c[...,PBindex]
+    sn = s[...,PBindex]
+    sP[...,0] = cP*sPlocal[:,0] - sn*sPlocal[:,1]
+    sP[...,1] = sn*sPlocal[:,0] + cP*sPlocal[:,1]
+    sP_r[...,0] = -sP[...,1]
+    sP_r[...,1] =  sP[...,0]
+    np.add(q[...,PBindex,0:2], sP, out=rP)
+
+    cU = c[...,UBindex]
+    sn = s[...,UBindex]
+    u[...,0] = cU*ulocal[:,0] - sn*ulocal[:,1]
+    u[...,1] = sn*ulocal[:,0] + cU*ulocal[:,1]
+    u_r[...,0] = -u[...,1]
+    u_r[...,1] =  u[...,0]
+
+#%%% Update_Velocity
+@jit
+def _update_velocity_loop(qd, PBindex, sP_r, sP_d, rP_d, UBindex, u_r, u_d):
+    for Pi in range(PBindex.shape[0]):
+        Bi = PBindex[Pi]
+        sP_d[Pi,0] = sP_r[Pi,0]*qd[Bi,2]
+        sP_d[Pi,1] = sP_r[Pi,1]*qd[Bi,2]
+        rP_d[Pi,0] = qd[Bi,0] + sP_d[Pi,0]
+        rP_d[Pi,1] = qd[Bi,1] + sP_d[Pi,1]
+
+    for Vi in range(UBindex.shape[0]):
+        Bi = UBindex[Vi]
+        u_d[Vi,0] = u_r[Vi,0]*qd[Bi,2]
+        u_d[Vi,1] = u_r[Vi,1]*qd[Bi,2]
+
+def _update_velocity_numpy(qd, PBindex, sP_r, sP_d, rP_d, UBindex, u_r, u_d):
+    np.multiply(sP_r, qd[...,PBindex,2:3], out=sP_d)
+    np.add(qd[...,PBindex,0:2], sP_d, out=rP_d)
+    np.multiply(u_r, qd[...,UBindex,2:3], out=u_d)
+
+
+
+#%%% rev
+# Di, Dj are (n,2,3) blocks and gamma is (n,2); the ground point has sP = sP_d = 0
+# and the ground body has p_d = 0, so no special cases are needed
+@jit
+def _rev_jacobian_loop(iP, jP, sP_r, Di, Dj):
+    for n in range(iP.shape[0]):
+        Di[n,0,0] = 1.0
+        Di[n,0,1] = 0.0
+        Di[n,0,2] = sP_r[iP[n],0]
+        Di[n,1,0] = 0.0
+        Di[n,1,1] = 1.0
+        Di[n,1,2] = sP_r[iP[n],1]
+        Dj[n,0,0] = -1.0
+        Dj[n,0,1] = 0.0
+        Dj[n,0,2] = -sP_r[jP[n],0]
+        Dj[n,1,0] = 0.0
+        Dj[n,1,1] = -1.0
+        Dj[n,1,2] = -sP_r[jP[n],1]
+
+def _rev_jacobian_numpy(iP, jP, sP_r, Di, Dj):
+    Di[...,0,0:2] = [1.0, 0.0]
+    Di[...,1,0:2] = [0.0, 1.0]
+    Di[...,:,2]   = sP_r[...,iP,:]
+    Dj[...,0,0:2] = [-1.0, 0.0]
+    Dj[...,1,0:2] = [0.0, -1.0]
+    Dj[...,:,2]   = -sP_r[...,jP,:]
+
+@jit
+def _rev_gamma_loop(iP, jP, iB, jB, sP_d, qd, gamma):
+    # -s_rot(sP_d_i)*p_d_i + s_rot(sP_d_j)*p_d_j
+    for n in range(iP.shape[0]):
+        pdi = qd[iB[n],2]
+        pdj = qd[jB[n],2]
+        gamma[n,0] =  sP_d[iP[n],1]*pdi - sP_d[jP[n],1]*pdj
+        gamma[n,1] = -sP_d[iP[n],0]*pdi + sP_d[jP[n],0]*pdj
+
+def _rev_gamma_numpy(iP, jP, iB, jB, sP_d, qd, gamma):
+    pdi = qd[...,iB,2]
+    pdj = qd[...,jB,2]
+    gamma[...,0] =  sP_d[...,iP,1]*pdi - sP_d[...,jP,1]*pdj
+    gamma[...,1] = -sP_d[...,iP,0]*pdi + sP_d[...,jP,0]*pdj
+
+#%%% tran
+@jit
+def _tran_jacobian_loop(iP, jP, jU, sP, rP, u, u_r, Di, Dj):
+    for n in range(iP.shape[0]):
+        ux  = u[jU[n],0]
+        uy  = u[jU[n],1]
+        sx  = sP[iP[n],0]
+        sy  = sP[iP[n],1]
+        dx  = rP[iP[n],0] - rP[jP[n],0]
+        dy  = rP[iP[n],1] - rP[jP[n],1]
+        Di[n,0,0] = u_r[jU[n],0]
+        Di[n,0,1] = u_r[jU[n],1]
+        Di[n,0,2] = ux*sx + uy*sy
+        Di[n,1,0] = 0.0
+        Di[n,1,1] = 0.0
+        Di[n,1,2] = 1.0
+        Dj[n,0,0] = -u_r[jU[n],0]
+        Dj[n,0,1] = -u_r[jU[n],1]
+        Dj[n,0,2] = -(ux*(sx + dx) + uy*(sy + dy))
+        Dj[n,1,0] = 0.0
+        Dj[n,1,1] = 0.0
+        Dj[n,1,2] = -1.0
+
+def _tran_jacobian_numpy(iP, jP, jU, sP, rP, u, u_r, Di, Dj):
+    uj = u[...,jU,:]
+    s  = sP[...,iP,:]
+    d  = rP[...,iP,:] - rP[...,jP,:]
+    Di[...,0,0:2] = u_r[...,jU,:]
+    Di[...,0,2]   = np.einsum('...j,...j->...', uj, s)
+    Di[...,1,:]   = [0.0, 0.0, 1.0]
+    Dj[...,0,0:2] = -u_r[...,jU,:]
+    Dj[...,0,2]   = -np.einsum('...j,...j->...', uj, s + d)
+    Dj[...,1,:]   = [0.0, 0.0, -1.0]
+
+@jit
+def _tran_gamma_loop(iB, jB, jU, q, qd, u_d, gamma):
+    # u_j_d'(r_i - r_j) p_d_i - 2 s_rot(u_j_d)'(r_i_d - r_j_d), zero if one of the bodies is ground
+    for n in range(iB.shape[0]):
+        gamma[n,1] = 0.0
+        if iB[n] == 0 or jB[n] == 0:
+            gamma[n,0] = 0.0
+        else:
+            Bi  = iB[n]
+            Bj  = jB[n]
+            udx = u_d[jU[n],0]
+            udy = u_d[jU[n],1]
+            gamma[n,0] = (udx*(q[Bi,0] - q[Bj,0]) + udy*(q[Bi,1] - q[Bj,1]))*qd[Bi,2] \
+                         - 2*(-udy*(qd[Bi,0] - qd[Bj,0]) + udx*(qd[Bi,1] - qd[Bj,1]))
+
+def _tran_gamma_numpy(iB, jB, jU, q, qd, u_d, gamma):
+    ujd   = u_d[...,jU,:]
+    ujd_r = np.stack((-ujd[...,1], ujd[...,0]), axis=-1)
+    f = np.einsum('...j,...j->...', ujd, q[...,iB,0:2] - q[...,jB,0:2])*qd[...,iB,2] \
+        - 2*np.einsum('...j,...j->...', ujd_r, qd[...,iB,0:2] - qd[...,jB,0:2])
+    gamma[...,0] = np.where((iB == 0) | (jB == 0), 0.0, f)
+    gamma[...,1] = 0.0
+
+
+
+#%%% Dispatch
+def update_position(*args):
+    if backend == 'numba':
+        return _update_position_loop(*args)
+    return _update_position_numpy(*args)
+
+def update_velocity(*args):
+    if backend == 'numba':
+        return _update_velocity_loop(*args)
+    return _update_velocity_numpy(*args)
+
+def rev_jacobian(*args):
+    if backend == 'numba':
+        return _rev_jacobian_loop(*args)
+    return _rev_jacobian_numpy(*args)
+
+def rev_gamma(*args):
+    if backend == 'numba':
+        return _rev_gamma_loop(*args)
+    return _rev_gamma_numpy(*args)
+
+def tran_jacobian(*args):
+    if backend == 'numba':
+        return _tran_jacobian_loop(*args)
+    return _tran_jacobian_numpy(*args)
+
+def tran_gamma(*args):
+    if backend == 'numba':
+        return _tran_gamma_loop(*args)
+    return _tran_gamma_numpy(*args)
+
+#%%% Batched
+# NumPy versions, for state arrays with a leading ensemble dimension
+update_position_batch = _update_position_numpy
+update_velocity_batch = _update_velocity_numpy
+rev_jacobian_batch    = _rev_jacobian_numpy
+rev_gamma_batch       = _rev_gamma_numpy
+tran_jacobian_batch   = _tran_jacobian_numpy
+tran_gamma_batch      = _tran_gamma_numpy
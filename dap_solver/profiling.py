@@ -0,0 +1,89 @@
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+
+import results
+# Profiler capture of a solve. When DapSolver.profile is set, solve() runs under
+# cProfile and a sampling profiler at the same time and writes to DapResults:
+#   dapSolve.prof       cProfile statistics (python -m pstats, snakeviz, ...)
+#   dapSolve.collapsed  sampled call stacks in the collapsed format of flamegraph.pl,
+#                       speedscope etc., one "frame;frame;...;frame count" per line
+# The sampling profiler is a thread that records the stack of the solving thread every
+# SAMPLE_INTERVAL seconds, so it needs no other packages.
+
+PROFILE_FILE   = 'dapSolve.prof'
+COLLAPSED_FILE = 'dapSolve.collapsed'
+
+SAMPLE_INTERVAL = 0.002             # [s]
+
+
+
+class SamplingProfiler():
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self, thread_id=None):
+        """ Samples the thread thread_id (the calling thread if None) until stop() """
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(code.co_name + " (" + os.path.basename(code.co_filename) + ":" + str(code.co_firstlineno) + ")")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, file_name):
+        with open(file_name, 'w') as fid:
+            for stack, count in self.stacks.most_common():
+                fid.write(stack + " " + str(count) + "\n")
+
+
+
+class SolveProfiler():
+    # Both profilers of a solve:
+    #   profiler = SolveProfiler(); profiler.start()
+    #   ...
+    #   profiler.stop(); profiler.write(folder)
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.sampler = SamplingProfiler()
+
+    def start(self):
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.sampler.stop()
+
+    def write(self, folder):
+        self.profile.dump_stats(os.path.join(folder, results.RESULTS_FOLDER, PROFILE_FILE))
+        self.sampler.write(os.path.join(folder, results.RESULTS_FOLDER, COLLAPSED_FILE))
+
+#%%% removeProfiles
+def removeProfiles(folder):
+    """ Removes the profiles of an earlier solve """
+    for file_name in (PROFILE_FILE, COLLAPSED_FILE):
+        if os.path.exists(os.path.join(folder, results.RESULTS_FOLDER, file_name)):
+            os.remove(os.path.join(folder, results.RESULTS_FOLDER, file_name))
@@ -0,0 +1,181 @@
+import json
+import os
+import numpy as np
+
+# Results store: the reported outputs of a solution written as one .npy file per
+# channel into the DapResults folder, time-major (first axis is the reported time),
+# so that every channel can be opened with np.load(mmap_mode='r'). metadata.json
+# holds the labels of the bodies and points, the shape of every channel and the
+# number of reporting times written so far. The channels are written in chunks
+# during the integration by a ResultsWriter.
+#
+# The fixed width Dap* text files written before are an optional export, see exportText().
+
+RESULTS_FOLDER = 'DapResults'
+METADATA_FILE  = 'metadata.json'
+CHUNK_BYTES    = 4*1024*1024        # size of the row buffers of a ResultsWriter
+
+# channel: (label axis, columns)
+CHANNELS = {'time':         (None,     None),
+            'Bodies_r':     ('bodies', ['x', 'y']),
+            'Bodies_p':     ('bodies', ['angle']),
+            'Bodies_r_d':   ('bodies', ['x', 'y']),
+            'Bodies_p_d':   ('bodies', ['angle']),
+            'Bodies_r_d_d': ('bodies', ['x', 'y']),
+            'Bodies_p_d_d': ('bodies', ['angle']),
+            'Points_r':     ('points', ['x', 'y']),
+            'Points_r_d':   ('points', ['x', 'y']),
+            'energy':       (None,     ['kinetic', 'potential', 'total'])}
+
+# text file: channels written side by side for every label (None: no labels)
+TEXT_FILES = {'DapBodyPositions':     ('bodies', ['Bodies_r', 'Bodies_p'], "{:15f}"),
+              'DapBodyVelocities':    ('bodies', ['Bodies_r_d', 'Bodies_p_d'], "{:15f}"),
+              'DapBodyAccelerations': ('bodies', ['Bodies_r_d_d', 'Bodies_p_d_d'], "{:15f}"),
+              'DapPointsPositions':   ('points', ['Points_r'], "{:15f}"),
+              'DapPointsVelocities':  ('points', ['Points_r_d'], "{:15f}"),
+              'DapSystemEnergy':      (None, ['energy'], "{:15e}")}
+
+
+
+#%%% ResultsWriter
+class ResultsWriter():
+    # Streams the channels to folder/DapResults while the solver runs. The .npy files
+    # are created with their final shape, the rows are buffered and written in chunks
+    # of about CHUNK_BYTES, and the number of rows on disk is kept in metadata.json
+    # ('count'), so the results written so far can be read during the run:
+    #   writer = ResultsWriter(folder, nt, {'time': (), 'Bodies_r': (nm,2), ...}, bodies, points)
+    #   writer.append(time=t, Bodies_r=r, ...)     # once per reporting time
+    #   writer.close()
+    # With resume > 0 the first resume rows of the existing store are kept (e.g. to
+    # restart from a checkpoint, possibly with more reporting times than before).
+
+    def __init__(self, folder, nt, shapes, bodies, points, resume=0):
+        self.folder = os.path.join(folder, RESULTS_FOLDER)
+        os.makedirs(self.folder, exist_ok=True)
+        # results of a previous run are gone until the new files are created
+        if os.path.exists(os.path.join(self.folder, METADATA_FILE)):
+            os.remove(os.path.join(self.folder, METADATA_FILE))
+        self.nt = nt
+        self.count = 0
+        self.metadata = {'bodies': list(bodies), 'points': list(points), 'count': 0, 'complete': False,
+                         'channels': {}}
+
+        row_bytes = sum(8*int(np.prod(shape)) for shape in shapes.values())
+        self.chunk = int(max(1, min(nt, CHUNK_BYTES // max(row_bytes, 1))))
+        self.n_buffered = 0
+        self.buffers = {}
+        self.files = {}
+        self.offsets = {}
+        for name, shape in shapes.items():
+            if name not in CHANNELS:
+                raise ValueError("Unknown results channel " + name)
+            shape = tuple(int(n) for n in shape)
+            self.buffers[name] = np.zeros((self.chunk,) + shape)
+            file_name = os.path.join(self.folder, name + ".npy")
+            if resume > 0:
+                os.replace(file_name, file_name + ".old")
+            fid = open(file_name, 'wb')
+            np.lib.format.write_array_header_1_0(fid, {'descr': '<f8', 'fortran_order': False,
+                                                       'shape': (nt,) + shape})
+            self.offsets[name] = fid.tell()
+            fid.truncate(self.offsets[name] + 8*nt*int(np.prod(shape)))
+            if resume > 0:
+                old = np.load(file_name + ".old", mmap_mode='r')
+                if old.shape[1:] != shape or len(old) < resume:
+                    raise ValueError("Cannot resume the results channel " + name + ", the model has changed")
+                for row in range(0, resume, self.chunk):
+                    fid.write(old[row:min(row + self.chunk, resume)].tobytes())
+                del old
+                os.remove(file_name + ".old")
+            self.files[name] = fid
+            self.metadata['channels'][name] = {'shape': [nt] + list(shape),
+                                               'labels': CHANNELS[name][0],
+                                               'columns': CHANNELS[name][1]}
+        self.count = resume
+        self.writeMetadata()
+
+    def append(self, **values):
+        for name, value in values.items():
+            self.buffers[name][self.n_buffered] = value
+        self.n_buffered = self.n_buffered + 1
+        if self.n_buffered == self.chunk:
+            self.flush()
+
+    def flush(self):
+        if self.n_buffered == 0:
+            return
+        for name, fid in self.files.items():
+            buffer = self.buffers[name][0:self.n_buffered]
+            fid.seek(self.offsets[name] + self.count*buffer[0].nbytes)
+            fid.write(buffer.tobytes())
+            fid.flush()
+        self.count = self.count + self.n_buffered
+        self.n_buffered = 0
+        self.writeMetadata()
+
+    def close(self):
+        self.flush()
+        for fid in self.files.values():
+            fid.close()
+        self.files = {}
+        self.metadata['complete'] = self.count == self.nt
+        self.writeMetadata()
+
+    def writeMetadata(self):
+        # replaced in one step, so that readers never see a partly written file
+        self.metadata['count'] = self.count
+        file_name = os.path.join(self.folder, METADATA_FILE)
+        with open(file_name + ".tmp", 'w') as fid:
+            json.dump(self.metadata, fid, indent=1)
+        os.replace(file_name + ".tmp", file_name)
+
+#%%% readMetadata
+def readMetadata(folder):
+    with open(os.path.join(folder, RESULTS_FOLDER, METADATA_FILE)) as fid:
+        return json.load(fid)
+
+#%%% readChannel
+def readChannel(folder, name, count=None, mmap_mode='r'):
+    """ Returns the first count rows of a channel (the rows written so far if None) """
+    if count is None:
+        count = readMetadata(folder)['count']
+    return np.load(os.path.join(folder, RESULTS_FOLDER, name + ".npy"), mmap_mode=mmap_mode)[0:count]
+
+#%%% readResults
+def readResults(folder, mmap_mode='r'):
+    """ Returns the metadata and a dictionary of name: array of all the channels. The
+    arrays hold the rows written so far (all of them if metadata['complete']) and are
+    memory mapped unless mmap_mode is None """
+    metadata = readMetadata(folder)
+    return metadata, {name: readChannel(folder, name, metadata['count'], mmap_mode) for name in metadata['channels']}
+
+#%%% exportText
+def exportText(folder):
+    """ Writes the Dap* text files of the results in folder/DapResults into folder """
+    time_size = 5
+    num_size = 15
+
+    metadata, channels = readResults(folder)
+    Tspan = channels['time']
+    for file_name, (labels, names, number_format) in TEXT_FILES.items():
+        if labels is None:
+            header = "".join(str(column.capitalize()).rjust(num_size) for column in CHANNELS[names[0]][1])
+            columns = channels[names[0]]
+        else:
+            # the text files number the bodies and points, the labels are in the metadata
+            prefix = "Body" if labels == 'bodies' else "Point"
+            header = ""
+            blocks = []
+            for i in range(len(metadata[labels])):
+                for name in names:
+                    for j, column in enumerate(CHANNELS[name][1]):
+                        header += (prefix + str(i + 1) + "_" + column).rjust(num_size)
+                        values = channels[name]
+                        blocks.append(values[:,i,j] if values.ndim == 3 else values[:,i])
+            columns = np.array(blocks).T if blocks else np.zeros((len(Tspan), 0))
+
+        row_format = number_format*columns.shape[1]
+        with open(os.path.join(folder, file_name), 'w') as fid:
+            fid.write(str("Time").ljust(time_size) + header + "\n")
+            for i in range(len(Tspan)):
+                fid.write(str(Tspan[i]).ljust(time_size) + row_format.format(*columns[i]) + "\n")
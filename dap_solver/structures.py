@@ -36,7 +36,7 @@ class Body_struct:
 #%% Force Structure
 class Force_struct:
     def __init__(self):
-        self.type       = 'ptp'                 # element type: ptp, rot_sda, weight, fp, f, T
+        self.type       = 'ptp'                 # element type: ptp, rot_sda, weight, fp, f, T, contact
         self.iPindex    = 0                     # index of the head (arrow) point
         self.jPindex    = 0                     # index of the tail point
         self.iBindex    = 0                     # index of the head (arrow) body
@@ -52,6 +52,8 @@ class Force_struct:
         self.flocal     = np.array([[0,0]]).T   # constant force in local frame
         self.f          = np.array([[0,0]]).T   # constant force in x-y frame
         self.t          = 0                     # constant torque in x-y frame
+        self.e          = 1                     # coefficient of restitution (contact of point iPindex with y = 0)
+        self.model      = 1                     # contact force model: 1 Lankarani-Nikravesh, 2 Flores et al.
         self.iFunct     = 0
         return
     
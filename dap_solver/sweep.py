@@ -0,0 +1,179 @@
+import contextlib
+import csv
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+import bundle
+# Parameter sweeps over a DapSolverBuilder input folder. Every row of the parameter
+# table becomes a case folder (a copy of the base folder with the parameters patched
+# into its model bundle) which is solved by a DapSolver in a separate process.
+#
+# Parameters use the ensemble.py syntax, e.g. 'Bodies[2].m', 'Forces[3].k' or
+# 'Joints[1].L', or name a solver setting of dapInputSettings.py, e.g. 't_final'.
+# A component of a vector attribute is given by its index, e.g. 'Bodies[1].r[0]'.
+
+SETTINGS = {'analysis_type': 'dynamic',
+            't_initial': 0.0,
+            'dt': 0.01,
+            't_final': 0.5,
+            'linear_solver': 'dense',
+            'integrator': 'dop853',
+            'rtol': 1e-6,
+            'atol': 1e-12}
+
+# the files of a case folder, copied from the base folder
+INPUT_FILES = [bundle.BUNDLE_FILE, 'dapInputSettings.py'] + sorted(bundle.LEGACY_FILES.values())
+
+
+def _valueString(value):
+    if isinstance(value, (list, tuple)):
+        return "np.array([[" + ",".join(str(float(v)) for v in value) + "]]).T"
+    return repr(value)
+
+
+def writeCase(base_folder, case_folder, parameters):
+    """ Copies the input files of base_folder (the model bundle or the in*.py files and
+    dapInputSettings.py, not the results of a base run) to case_folder and patches the
+    parameters into the model bundle """
+    if os.path.exists(case_folder):
+        shutil.rmtree(case_folder)
+    os.makedirs(case_folder)
+    for file_name in INPUT_FILES:
+        if os.path.exists(os.path.join(base_folder, file_name)):
+            shutil.copy2(os.path.join(base_folder, file_name), case_folder)
+
+    bundle_file = os.path.join(case_folder, bundle.BUNDLE_FILE)
+    if not os.path.exists(bundle_file):
+        bundle.convertInputFiles(case_folder)
+    with np.load(bundle_file) as model:
+        arrays = {key: model[key] for key in model.files}
+
+    for key, value in parameters.items():
+        key = key.replace(' ', '')
+        name = key.split('[')[0]
+        if name in bundle.SCHEMA:
+            match = re.fullmatch(r"\w+\[(\d+)\]\.(\w+)(?:\[([01])\])?", key)
+            if match is None:
+                raise ValueError("Cannot interpret sweep parameter " + key)
+            index, attr, component = int(match.group(1)) - 1, match.group(2), match.group(3)
+            column = name + "." + attr
+            if column not in arrays:
+                raise ValueError("Unknown sweep parameter " + key)
+            kind = bundle.SCHEMA[name][1][attr]
+            if kind == 'v':
+                # a vector takes two values, or one value with its component, e.g. 'Bodies[1].r[0]'
+                if component is not None:
+                    arrays[column][index, int(component)] = value
+                elif np.size(value) == 2 and not isinstance(value, str):
+                    arrays[column][index] = np.ravel(value)
+                else:
+                    raise ValueError("Sweep parameter " + key + " is a vector, give two values or a component, e.g. " +
+                                     key + "[0]")
+            elif component is not None:
+                raise ValueError("Sweep parameter " + key + " is not a vector")
+            elif arrays[column].dtype.kind == 'U':
+                # fixed width strings
+                values = arrays[column].tolist()
+                values[index] = value
+                arrays[column] = np.array(values, dtype=str)
+            else:
+                arrays[column][index] = value
+        elif name in SETTINGS:
+            with open(os.path.join(case_folder, 'dapInputSettings.py'), 'a') as fid:
+                fid.write(name + " = " + _valueString(value) + "\n")
+        else:
+            raise ValueError("Unknown sweep parameter " + key)
+    np.savez(bundle_file, **arrays)
+
+
+def readSettings(folder, defaults=SETTINGS):
+    settings = dict(defaults)
+    settings_file = os.path.join(folder, 'dapInputSettings.py')
+    if os.path.exists(settings_file):
+        values = {}
+        exec(open(settings_file).read(), {}, values)
+        settings.update({key: values[key] for key in defaults if key in values})
+    return settings
+
+
+def solveCase(case_folder):
+    """ Solves one case folder and writes its results store (DapResults) into it. Runs in a worker process """
+    from dapSolver import DapSolver
+
+    settings = readSettings(case_folder)
+    result = {'success': False, 'wall_time': 0.0, 'evaluations': 0, 'message': ''}
+    t0 = time.perf_counter()
+    with open(os.path.join(case_folder, 'log.txt'), 'w') as log, contextlib.redirect_stdout(log):
+        try:
+            solver = DapSolver(case_folder, settings['linear_solver'], settings['integrator'],
+                               settings['rtol'], settings['atol'])
+            solver.t_initial = settings['t_initial']
+            solver.dt        = settings['dt']
+            solver.t_final   = settings['t_final']
+            solver.analysis_type = settings['analysis_type']
+            result['success'] = solver.solve()
+            solver.writeOutputs()
+            result['evaluations'] = solver.num
+        except Exception as e:
+            result['message'] = type(e).__name__ + ": " + str(e)
+    result['wall_time'] = time.perf_counter() - t0
+    return result
+
+
+def readTable(table_file):
+    """ Reads a csv parameter table with one column per parameter (and an optional 'case' column) """
+    table = []
+    with open(table_file, newline='') as fid:
+        for row in csv.DictReader(fid):
+            parameters = {}
+            for key, value in row.items():
+                try:
+                    parameters[key] = float(value) if key != 'case' else value
+                except ValueError:
+                    parameters[key] = value
+            table.append(parameters)
+    return table
+
+
+def runSweep(base_folder, table, output_folder, max_workers=None):
+    """ Solves every row of table (a list of parameter dictionaries) in a process pool.
+    The cases are written to output_folder/<case> and a summary table to
+    output_folder/sweep_summary.csv, which is also returned as a list of rows """
+    os.makedirs(output_folder, exist_ok=True)
+    cases = []
+    for i, row in enumerate(table):
+        parameters = dict(row)
+        case = str(parameters.pop('case', 'case_' + str(i).zfill(len(str(len(table))))))
+        case_folder = os.path.join(output_folder, case)
+        writeCase(base_folder, case_folder, parameters)
+        cases.append((case, case_folder, parameters))
+
+    summary = [None]*len(cases)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        jobs = {pool.submit(solveCase, case_folder): i for i, (case, case_folder, parameters) in enumerate(cases)}
+        for job in as_completed(jobs):
+            i = jobs[job]
+            case, case_folder, parameters = cases[i]
+            summary[i] = dict(case=case, **parameters, **job.result())
+            print(case + (" solved" if summary[i]['success'] else " failed " + summary[i]['message']))
+
+    columns = []
+    for row in summary:
+        columns += [key for key in row if key not in columns]
+    with open(os.path.join(output_folder, 'sweep_summary.csv'), 'w', newline='') as fid:
+        writer = csv.DictWriter(fid, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(summary)
+    return summary
+
+
+if __name__ == '__main__':
+    # python sweep.py <base folder> <parameter table.csv> <output folder> [number of processes]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    runSweep(sys.argv[1], readTable(sys.argv[2]), sys.argv[3],
+             int(sys.argv[4]) if len(sys.argv) > 4 else None)
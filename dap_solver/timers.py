@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+import results
+# Phase timers of a solve. When DapSolver.timing is set, solve() replaces the methods
+# named in PHASES on the instance by timed wrappers, so a solve without timing runs
+# the methods unchanged. Every phase records its number of calls and its cumulative
+# and longest time; the phases nest ('analysis' includes 'Force_array' etc.).
+# The counters of the integrator ('steps', 'rejected_steps', 'evaluations') are set
+# by DapSolver.Integrate(). The timings are written to DapResults/timings.json.
+
+TIMINGS_FILE = 'timings.json'
+
+PHASES = ['analysis',
+          'u_to_Bodies',
+          'Update_Position',
+          'Update_Velocity',
+          'Force_array',
+          'Jacobian',
+          'Jacobian_sparse',
+          'RHSAcc',
+          'KKT_solve_dense',
+          'KKT_solve_sparse',
+          'Schur_solve',
+          'Bodies_to_u_d',
+          'Constraints',
+          'RHSVel',
+          'Kinematic_position',
+          'Kinematic_solver',
+          'Capture_outputs',
+          'Write_checkpoint']
+
+
+
+class PhaseTimers():
+
+    def __init__(self):
+        self.phases = {}                    # name: [calls, cumulative time, max time]
+        self.counters = {}
+        self.wall_time = 0.0
+
+    def wrap(self, name, fun):
+        record = self.phases.setdefault(name, [0, 0.0, 0.0])
+        clock = time.perf_counter
+        def timed(*args):
+            t0 = clock()
+            try:
+                return fun(*args)
+            finally:
+                dt = clock() - t0
+                record[0] += 1
+                record[1] += dt
+                if dt > record[2]:
+                    record[2] = dt
+        return timed
+
+    def instrument(self, obj, names=PHASES):
+        for name in names:
+            if hasattr(obj, name):
+                setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def release(self, obj, names=PHASES):
+        # removes the wrappers from the instance, the methods of the class are used again
+        for name in names:
+            obj.__dict__.pop(name, None)
+
+    def report(self):
+        return {'wall_time': self.wall_time,
+                'counters': dict(self.counters),
+                'phases': {name: {'calls': calls, 'time': total, 'max_time': longest,
+                                  'mean_time': total/calls if calls else 0.0}
+                           for name, (calls, total, longest) in self.phases.items() if calls}}
+
+    def write(self, folder):
+        file_name = os.path.join(folder, results.RESULTS_FOLDER, TIMINGS_FILE)
+        with open(file_name, 'w') as fid:
+            json.dump(self.report(), fid, indent=1)
+
+#%%% readTimings
+def readTimings(folder):
+    with open(os.path.join(folder, results.RESULTS_FOLDER, TIMINGS_FILE)) as fid:
+        return json.load(fid)
+
+#%%% formatTimings
+def formatTimings(timings):
+    """ Returns the timings as a text table, the phases sorted by their cumulative time """
+    lines = ["{:<20s}{:>10s}{:>14s}{:>14s}{:>14s}".format("phase", "calls", "time [s]", "mean [ms]", "max [ms]")]
+    phases = sorted(timings['phases'].items(), key=lambda item: -item[1]['time'])
+    for name, phase in phases:
+        lines.append("{:<20s}{:>10d}{:>14.4f}{:>14.4f}{:>14.4f}".format(name, phase['calls'], phase['time'],
+                                                                        1e3*phase['mean_time'], 1e3*phase['max_time']))
+    lines.append("wall time {:.4f} s, ".format(timings['wall_time']) +
+                 ", ".join(key + " " + str(value) for key, value in timings['counters'].items()))
+    return "\n".join(lines)
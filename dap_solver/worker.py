@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+import traceback
+
+import sweep
+# Solver worker: solves a DapSolverBuilder folder in a process of its own, so that
+# FreeCAD stays responsive (see DapSolverBuilder.startSolve()):
+#   python worker.py <folder>
+# The settings are read from dapInputSettings.py. Progress is written to stdout as
+#   progress <t> <t_final> <wall time> <steps> <evaluations>
+# lines, and the solve is stopped cleanly (the results and a checkpoint up to the
+# current time are kept) when "cancel" is written to the stdin of the worker.
+# Other solver messages are written to stdout as they are.
+
+SETTINGS = dict(sweep.SETTINGS,
+                text_outputs=False,
+                restart=False,
+                timing=False,
+                profile=False,
+                body_labels=None,
+                point_labels=None)
+
+PROGRESS_INTERVAL = 0.2             # wall time [s] between progress lines
+
+EXIT_SOLVED    = 0
+EXIT_FAILED    = 1
+EXIT_CANCELLED = 2
+
+
+class SolveCancelled(Exception):
+    pass
+
+
+def runSolver(folder, cancel=None, settings=None, progress=None, progress_interval=PROGRESS_INTERVAL):
+    """ Solves folder and writes its results. cancel is a threading.Event that stops
+    the solve with SolveCancelled when it is set (checked every progress_interval).
+    settings (see SETTINGS) are read from the folder if not given. progress(t, wall_time,
+    steps, evaluations) is called every progress_interval seconds and at the end """
+    from dapSolver import DapSolver
+
+    if settings is None:
+        settings = readSettings(folder)
+    solver = DapSolver(folder, settings['linear_solver'], settings['integrator'], settings['rtol'], settings['atol'])
+    solver.t_initial = settings['t_initial']
+    solver.dt        = settings['dt']
+    solver.t_final   = settings['t_final']
+    solver.analysis_type = settings['analysis_type']
+    solver.restart   = settings['restart']
+    solver.timing    = settings['timing']
+    solver.profile   = settings['profile']
+    if settings['body_labels'] is not None:
+        solver.body_labels = list(settings['body_labels'])
+    if settings['point_labels'] is not None:
+        solver.point_labels = list(settings['point_labels'])
+
+    def report(t, wall_time, steps, evaluations):
+        if cancel is not None and cancel.is_set():
+            raise SolveCancelled("Cancelled at t = " + str(t))
+        if progress is not None:
+            progress(t, wall_time, steps, evaluations)
+    if cancel is not None or progress is not None:
+        solver.progress = report
+        solver.progress_interval = progress_interval
+
+    solver.solve()
+    solver.writeOutputs(settings['text_outputs'])
+    return solver
+
+
+def readSettings(folder):
+    return sweep.readSettings(folder, SETTINGS)
+
+
+def _printProgress(t_final):
+    def progress(t, wall_time, steps, evaluations):
+        print("progress", t, t_final, wall_time, steps, evaluations, flush=True)
+    return progress
+
+
+def _readCommands(cancel):
+    for line in sys.stdin:
+        if line.strip() == "cancel":
+            cancel.set()
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    cancel = threading.Event()
+    threading.Thread(target=_readCommands, args=(cancel,), daemon=True).start()
+    try:
+        settings = readSettings(sys.argv[1])
+        runSolver(sys.argv[1], cancel, settings, _printProgress(settings['t_final']))
+    except SolveCancelled as e:
+        print(str(e), flush=True)
+        sys.exit(EXIT_CANCELLED)
+    except Exception:
+        traceback.print_exc()
+        sys.exit(EXIT_FAILED)
+    sys.exit(EXIT_SOLVED)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import models
+import results
+from dapSolver import DapSolver
+
+
+def solve(folder, linear_solver='dense', t_final=0.5):
+    solver = DapSolver(folder, linear_solver)
+    solver.analysis_type = 'kinematic'
+    solver.t_initial, solver.dt, solver.t_final = 0.0, 0.01, t_final
+    solver.solve()
+    return np.array(results.readChannel(folder, 'Bodies_r'))
+
+
+@pytest.mark.parametrize('linear_solver', ['dense', 'sparse'])
+def test_redundant_underdriven_mechanism_raises(tmp_path, linear_solver):
+    # a pendulum hinged to the ground by two revolute joints at the same point: four
+    # constraints for three coordinates, but the rotation is neither constrained nor driven
+    folder = str(tmp_path)
+    bodies = [{'m': 1.0, 'J': 1/12, 'r': [0.5, 0.0]}]
+    points = [{'Bindex': 0, 'sPlocal': [0.0, 0.0]}, {'Bindex': 1, 'sPlocal': [-0.5, 0.0]}]
+    joints = [{'type': 'rev', 'iPindex': 1, 'jPindex': 2}, {'type': 'rev', 'iPindex': 1, 'jPindex': 2}]
+    models.writeModel(folder, bodies, points, joints, [{'type': 'weight', 'gravity': 9.81, 'wgt': [0.0, -1.0]}])
+    with pytest.raises(ValueError, match="1 degrees of freedom"):
+        solve(folder, linear_solver)
+
+
+def test_redundant_driven_mechanism(tmp_path):
+    # the same slider-crank with a duplicated crank pivot
+    models.sliderCrank(str(tmp_path / "crank"))
+    captured = {}
+    def writer(folder, bodies, points, joints, forces, uvectors, functs):
+        captured.update(bodies=bodies, points=points, joints=joints + [joints[0]], forces=forces,
+                        uvectors=uvectors, functs=functs)
+        models.writeModel(folder, **captured)
+    models.sliderCrank(str(tmp_path / "redundant"), writer=writer)
+    assert np.allclose(solve(str(tmp_path / "crank")), solve(str(tmp_path / "redundant")), atol=1e-9)
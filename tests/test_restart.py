@@ -0,0 +1,26 @@
+import numpy as np
+
+import models
+import results
+from dapSolver import DapSolver
+
+
+def solve(folder, restart=False):
+    solver = DapSolver(folder)
+    solver.restart = restart
+    solver.t_initial, solver.dt, solver.t_final = 0.0, 0.01, 0.3
+    return solver.solve()
+
+
+def test_restart_of_a_complete_run(tmp_path):
+    folder = str(tmp_path)
+    models.pendulumChain(folder, 2)
+    solve(folder)
+    metadata = results.readMetadata(folder)
+    rows = {name: np.array(results.readChannel(folder, name)) for name in ['time', 'Bodies_r', 'Bodies_p_d_d']}
+
+    assert solve(folder, restart=True)
+    restarted = results.readMetadata(folder)
+    assert (restarted['count'], restarted['complete']) == (metadata['count'], True)
+    for name, values in rows.items():
+        assert np.array_equal(np.array(results.readChannel(folder, name)), values)
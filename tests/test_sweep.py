@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pytest
+
+import bundle
+import models
+import results
+import sweep
+from dapSolver import DapSolver, CHECKPOINT_FILE
+
+
+def test_case_folder_has_no_base_outputs(tmp_path):
+    base = str(tmp_path / "base")
+    models.pendulumChain(base, 2)
+    solver = DapSolver(base)
+    solver.t_initial, solver.dt, solver.t_final = 0.0, 0.01, 0.2
+    solver.solve()
+    solver.writeOutputs(text_export=True)
+    open(os.path.join(base, CHECKPOINT_FILE), 'w').close()
+    assert os.path.exists(os.path.join(base, 'DapBodyPositions'))
+
+    case = str(tmp_path / "case_0")
+    sweep.writeCase(base, case, {'Bodies[1].m': 2.0, 't_final': 0.1})
+    files = os.listdir(case)
+    assert sorted(files) == sorted([bundle.BUNDLE_FILE, 'dapInputSettings.py'])
+    assert not any(name.startswith('Dap') for name in files)
+    assert results.RESULTS_FOLDER not in files
+    assert CHECKPOINT_FILE not in files
+
+
+def test_vector_parameters(tmp_path):
+    base = str(tmp_path / "base")
+    models.pendulumChain(base, 2)
+    case = str(tmp_path / "case")
+    sweep.writeCase(base, case, {'Bodies[1].r[1]': 0.25, 'Bodies[2].r_d': [1.0, 2.0]})
+    with np.load(os.path.join(case, bundle.BUNDLE_FILE)) as model:
+        assert model['Bodies.r'][0].tolist() == [0.5, 0.25]
+        assert model['Bodies.r_d'][1].tolist() == [1.0, 2.0]
+
+    with pytest.raises(ValueError):
+        sweep.writeCase(base, case, {'Bodies[1].r': 0.5})
+    with pytest.raises(ValueError):
+        sweep.writeCase(base, case, {'Bodies[1].m[0]': 0.5})